@@ -13,24 +13,23 @@ from concurrent.futures import ThreadPoolExecutor, as_completed
 from ai.utils import *
 from ai.utils.path_constants import get_8_1_audio_task, get_audio_tmp_dir, get_audio_segs_dir
 from ai.asr_backend.audio_preprocess import get_audio_duration
+from ai.utils.srt_codec import parse_time
 from ai.tts_backend.tts_main import tts_main
+from ai.tts_backend.tts_client import get_tts_concurrency
+from ai.tts_backend.rate_calibration import record_speaking_rate
 
 console = Console()
 
-WARMUP_SIZE = 5
+def parse_df_srt_time(time_value) -> float:
+    """Task start/end time in seconds (older task files stored SRT-style strings)"""
+    return parse_time(time_value)
 
-def parse_df_srt_time(time_str: str) -> float:
-    """Convert SRT time format to seconds"""
-    hours, minutes, seconds = time_str.strip().split(':')
-    seconds, milliseconds = seconds.split('.')
-    return int(hours) * 3600 + int(minutes) * 60 + int(seconds) + int(milliseconds) / 1000
-
-def adjust_audio_speed(input_file: str, output_file: str, speed_factor: float) -> None:
-    """Adjust audio speed and handle edge cases"""
+def adjust_audio_speed(input_file: str, output_file: str, speed_factor: float) -> float:
+    """Adjust audio speed and handle edge cases, return the duration of the output audio"""
     # If the speed factor is close to 1, directly copy the file
     if abs(speed_factor - 1.0) < 0.001:
         shutil.copy2(input_file, output_file)
-        return
+        return get_audio_duration(output_file)
         
     atempo = speed_factor
     cmd = ['ffmpeg', '-i', input_file, '-filter:a', f'atempo={atempo}', '-y', output_file]
@@ -48,10 +47,10 @@ def adjust_audio_speed(input_file: str, output_file: str, speed_factor: float) -
                 trimmed_audio = audio[:(expected_duration * 1000)]  # pydub uses milliseconds
                 trimmed_audio.export(output_file, format="wav")
                 print(f"✂️ Trimmed to expected duration: {expected_duration:.2f} seconds")
-                return
+                return len(trimmed_audio) / 1000
             elif output_duration >= expected_duration * 1.02:
                 raise Exception(f"Audio duration abnormal: input file={input_file}, output file={output_file}, speed factor={speed_factor}, input duration={input_duration:.2f}s, output duration={output_duration:.2f}s")
-            return
+            return output_duration
         except subprocess.CalledProcessError as e:
             if attempt < max_retries - 1:
                 rprint(f"[yellow]⚠️ Audio speed adjustment failed, retrying in 1s ({attempt + 1}/{max_retries})[/yellow]")
@@ -76,43 +75,33 @@ def process_row(row: pd.Series, tasks_df: pd.DataFrame, workspace_path: str = ".
     return number, real_dur
 
 def generate_tts_audio(tasks_df: pd.DataFrame, workspace_path: str = ".", config_path: str = None) -> pd.DataFrame:
-    """Generate TTS audio sequentially and calculate actual duration"""
+    """Generate TTS audio concurrently and calculate actual duration"""
     tasks_df['real_dur'] = 0
     rprint("[bold green]🎯 Starting TTS audio generation...[/bold green]")
     
     with Progress() as progress:
         task = progress.add_task("[cyan]🔄 Generating TTS audio...", total=len(tasks_df))
         
-        # warm up for first 5 rows
-        warmup_size = min(WARMUP_SIZE, len(tasks_df))
-        for _, row in tasks_df.head(warmup_size).iterrows():
-            try:
-                number, real_dur = process_row(row, tasks_df, workspace_path, config_path)
-                tasks_df.loc[tasks_df['number'] == number, 'real_dur'] = real_dur
-                progress.advance(task)
-            except Exception as e:
-                rprint(f"[red]❌ Error in warmup: {str(e)}[/red]")
-                raise e
-        
+        # lines run concurrently up to the provider's limit, which the shared tts client enforces across jobs
+        tts_method = load_key("tts_method", config_path)
         # for gpt_sovits, do not use parallel to avoid mistakes
-        max_workers = load_key("max_workers", config_path) if load_key("tts_method", config_path) != "gpt_sovits" else 1
-        # parallel processing for remaining tasks
-        if len(tasks_df) > warmup_size:
-            remaining_tasks = tasks_df.iloc[warmup_size:].copy()
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                futures = [
-                    executor.submit(process_row, row, tasks_df.copy(), workspace_path, config_path)
-                    for _, row in remaining_tasks.iterrows()
-                ]
-                
-                for future in as_completed(futures):
-                    try:
-                        number, real_dur = future.result()
-                        tasks_df.loc[tasks_df['number'] == number, 'real_dur'] = real_dur
-                        progress.advance(task)
-                    except Exception as e:
-                        rprint(f"[red]❌ Error: {str(e)}[/red]")
-                        raise e
+        max_workers = get_tts_concurrency(tts_method, workspace_path, config_path) if tts_method != "gpt_sovits" else 1
+        # one read-only snapshot for backends that pick reference audio from the tasks (f5tts)
+        tasks_snapshot = tasks_df.copy()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(process_row, row, tasks_snapshot, workspace_path, config_path)
+                for _, row in tasks_df.iterrows()
+            ]
+            
+            for future in as_completed(futures):
+                try:
+                    number, real_dur = future.result()
+                    tasks_df.loc[tasks_df['number'] == number, 'real_dur'] = real_dur
+                    progress.advance(task)
+                except Exception as e:
+                    rprint(f"[red]❌ Error: {str(e)}[/red]")
+                    raise e
 
     rprint("[bold green]✨ TTS audio generation completed![/bold green]")
     return tasks_df
@@ -174,8 +163,7 @@ def merge_chunks(tasks_df: pd.DataFrame, workspace_path: str = ".", config_path:
                     # 🔄 Step2: Start speed change and save as OUTPUT_FILE_TEMPLATE
                     temp_file = temp_file_template.format(f"{number}_{line_index}")
                     output_file = output_file_template.format(f"{number}_{line_index}")
-                    adjust_audio_speed(temp_file, output_file, speed_factor)
-                    ad_dur = get_audio_duration(output_file)
+                    ad_dur = adjust_audio_speed(temp_file, output_file, speed_factor)
                     new_sub_times.append([cur_time, cur_time+ad_dur])
                     cur_time += ad_dur
                 # 🔄 Step3: Find corresponding main DataFrame index and update new_sub_times
@@ -236,6 +224,14 @@ def gen_audio(workspace_path: str = ".", config_path: str = None) -> None:
     # 🔊 Step3: Generate TTS audio
     tasks_df = generate_tts_audio(tasks_df, workspace_path, config_path)
     
+    # 📈 Learn the voice's speaking rate for the next jobs' speed planning
+    try:
+        rate = record_speaking_rate(tasks_df, workspace_path, config_path)
+        if rate is not None:
+            rprint(f"[green]📈 Speaking rate calibration updated: {rate:.3f}x estimate[/green]")
+    except Exception as e:
+        rprint(f"[yellow]⚠️ Speaking rate calibration skipped: {e}[/yellow]")
+    
     # 🔄 Step4: Merge audio chunks
     tasks_df = merge_chunks(tasks_df, workspace_path, config_path)
     
@@ -6,6 +6,7 @@ from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TaskPr
 from rich.console import Console
 from ai.utils import *
 from ai.utils.path_constants import get_8_1_audio_task, get_audio_segs_dir, get_output_dir
+from ai.utils.srt_codec import format_srt
 
 console = Console()
 
@@ -89,13 +90,7 @@ def create_srt_subtitle(workspace_path: str = ".", config_path: str = None):
     dub_sub_file = f"{output_dir}/dub.srt"
     
     with open(dub_sub_file, 'w', encoding='utf-8') as f:
-        for i, ((start_time, end_time), line) in enumerate(zip(new_sub_times, lines), 1):
-            start_str = f"{int(start_time//3600):02d}:{int((start_time%3600)//60):02d}:{int(start_time%60):02d},{int((start_time*1000)%1000):03d}"
-            end_str = f"{int(end_time//3600):02d}:{int((end_time%3600)//60):02d}:{int(end_time%60):02d},{int((end_time*1000)%1000):03d}"
-            
-            f.write(f"{i}\n")
-            f.write(f"{start_str} --> {end_str}\n")
-            f.write(f"{line}\n\n")
+        f.write(format_srt([t[0] for t in new_sub_times], [t[1] for t in new_sub_times], lines))
     
     rprint(f"[bold green]✅ Subtitle file created: {dub_sub_file}[/bold green]")
 
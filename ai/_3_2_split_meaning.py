@@ -3,6 +3,7 @@ from difflib import SequenceMatcher
 import math
 from ai.prompts import get_split_prompt
 from ai.spacy_utils.load_nlp_model import init_nlp
+from ai.spacy_utils.split_heuristic import split_doc
 from ai.utils import *
 from rich.console import Console
 from rich.table import Table
@@ -47,7 +48,7 @@ def find_split_positions(original, modified, config_path: str = None):
 
     return split_positions
 
-def split_sentence(sentence, num_parts, word_limit=20, index=-1, retry_attempt=0, config_path: str = None):
+def split_sentence(sentence, num_parts, word_limit=20, index=-1, retry_attempt=0, workspace_path: str = ".", config_path: str = None):
     """Split a long sentence using GPT and return the result as a string."""
     split_prompt = get_split_prompt(sentence, num_parts, word_limit, config_path)
     def valid_split(response_data):
@@ -82,32 +83,50 @@ def split_sentence(sentence, num_parts, word_limit=20, index=-1, retry_attempt=0
     
     return best_split
 
-def parallel_split_sentences(sentences, max_length, max_workers, nlp, retry_attempt=0, config_path: str = None):
-    """Split sentences in parallel using a thread pool."""
-    new_sentences = [None] * len(sentences)
+def parallel_split_sentences(sentences, max_length, max_workers, nlp, retry_attempt=0, to_check=None, workspace_path: str = ".", config_path: str = None):
+    """
+    Split sentences in parallel using a thread pool.
+
+    Sentences with a clear split (punctuation, clause boundary, balanced length) are split locally,
+    only ambiguous ones go to the LLM. Only indices in `to_check` are considered (all when None).
+    Returns the flattened sentences and the indices to check next round: the parts produced in
+    this round and the over-length sentences that could not be split.
+    """
+    new_sentences = [[sentence] for sentence in sentences]
+    min_confidence = load_key("split_heuristic_confidence", config_path)
     futures = []
+    over_length = set()
+    local_splits = 0
 
     with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-        for index, sentence in enumerate(sentences):
-            # Use tokenizer to split the sentence
-            tokens = tokenize_sentence(sentence, nlp)
-            # print("Tokenization result:", tokens)
-            num_parts = math.ceil(len(tokens) / max_length)
-            if len(tokens) > max_length:
-                future = executor.submit(split_sentence, sentence, num_parts, max_length, index=index, retry_attempt=retry_attempt, config_path=config_path)
-                futures.append((future, index, num_parts, sentence))
+        for index in (range(len(sentences)) if to_check is None else to_check):
+            sentence = sentences[index]
+            doc = nlp(sentence)
+            if len(doc) <= max_length:
+                continue
+            over_length.add(index)
+            num_parts = math.ceil(len(doc) / max_length)
+            parts, confidence = split_doc(doc, num_parts)
+            if confidence >= min_confidence:
+                new_sentences[index] = parts
+                local_splits += 1
             else:
-                new_sentences[index] = [sentence]
+                future = executor.submit(split_sentence, sentence, num_parts, max_length, index=index, retry_attempt=retry_attempt, workspace_path=workspace_path, config_path=config_path)
+                futures.append((future, index))
 
-        for future, index, num_parts, sentence in futures:
+        for future, index in futures:
             split_result = future.result()
             if split_result:
                 split_lines = split_result.strip().split('\n')
                 new_sentences[index] = [line.strip() for line in split_lines]
-            else:
-                new_sentences[index] = [sentence]
 
-    return [sentence for sublist in new_sentences for sentence in sublist]
+    console.print(f'[green]✂️  {local_splits} sentences split locally, {len(futures)} sent to the LLM[/green]')
+    flat_sentences, next_check = [], []
+    for index, parts in enumerate(new_sentences):
+        if len(parts) > 1 or index in over_length:
+            next_check.extend(range(len(flat_sentences), len(flat_sentences) + len(parts)))
+        flat_sentences.extend(parts)
+    return flat_sentences, next_check
 
 def split_sentences_by_meaning(workspace_path: str = ".", config_path: str = None):
     """
@@ -130,16 +149,21 @@ def split_sentences_by_meaning(workspace_path: str = ".", config_path: str = Non
         sentences = [line.strip() for line in f.readlines()]
 
     nlp = init_nlp(config_path)
-    # 🔄 process sentences multiple times to ensure all are split
+    # 🔄 process sentences multiple times to ensure all are split, later rounds revisit new parts and failed splits
+    to_check = None
     for retry_attempt in range(3):
-        sentences = parallel_split_sentences(
+        sentences, to_check = parallel_split_sentences(
             sentences, 
             max_length=load_key("max_split_length", config_path), 
             max_workers=load_key("max_workers", config_path), 
             nlp=nlp, 
             retry_attempt=retry_attempt,
+            to_check=to_check,
+            workspace_path=workspace_path,
             config_path=config_path
         )
+        if not to_check:
+            break
 
     # 💾 save results
     with open(output_file, 'w', encoding='utf-8') as f:
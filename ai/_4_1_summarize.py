@@ -1,10 +1,12 @@
 import json
 import os
-from ai.prompts import get_summary_prompt
+import concurrent.futures
+from ai.prompts import get_summary_prompt, get_theme_merge_prompt
 import pandas as pd
 from ai.utils import *
 from ai.utils.path_constants import get_3_2_split_by_meaning, get_4_1_terminology
 from ai.utils.workspace_utils import get_workspace_custom_terms_path
+from ai.utils.term_index import load_term_index
 
 def combine_chunks(workspace_path: str = ".", config_path: str = None):
     """Combine the text chunks identified by whisper into a single long text"""
@@ -15,25 +17,79 @@ def combine_chunks(workspace_path: str = ".", config_path: str = None):
     combined_text = ' '.join(cleaned_sentences)
     return combined_text[:load_key('summary_length', config_path)]  #! Return only the first x characters
 
+def split_into_shards(workspace_path: str = ".", config_path: str = None):
+    """Split the whole transcript into shards of at most `summary_length` characters, at sentence boundaries"""
+    input_file = get_3_2_split_by_meaning(workspace_path)
+    with open(input_file, 'r', encoding='utf-8') as file:
+        sentences = [line.strip() for line in file.readlines() if line.strip()]
+    shard_length = load_key('summary_length', config_path)
+
+    shards, shard = [], ''
+    for sentence in sentences:
+        if shard and len(shard) + len(sentence) + 1 > shard_length:
+            shards.append(shard)
+            shard = ''
+        shard = f"{shard} {sentence}" if shard else sentence
+    if shard:
+        shards.append(shard)
+    return shards
+
+def valid_summary(response_data):
+    required_keys = {'src', 'tgt', 'note'}
+    if 'terms' not in response_data:
+        return {"status": "error", "message": "Invalid response format"}
+    for term in response_data['terms']:
+        if not all(key in term for key in required_keys):
+            return {"status": "error", "message": "Invalid response format"}   
+    return {"status": "success", "message": "Summary completed"}
+
+def valid_theme(response_data):
+    if 'theme' not in response_data:
+        return {"status": "error", "message": "Missing required key: `theme`"}
+    return {"status": "success", "message": "Theme merged"}
+
+def merge_terms(term_lists, exclude_terms=()):
+    """Merge extracted term lists, keeping the first occurrence of each `src` (case-insensitive)"""
+    seen = {str(term['src']).strip().lower() for term in exclude_terms}
+    merged = []
+    for terms in term_lists:
+        for term in terms:
+            key = str(term['src']).strip().lower()
+            if key and key not in seen:
+                seen.add(key)
+                merged.append(term)
+    return merged
+
+def summarize_map_reduce(custom_terms_json, workspace_path: str = ".", config_path: str = None):
+    """Extract terms from every transcript shard in parallel, then merge themes and deduplicate terms"""
+    shards = split_into_shards(workspace_path, config_path)
+    rprint(f"📝 Summarizing and extracting terminology from {len(shards)} shards ...")
+
+    def summarize_shard(shard):
+        summary_prompt = get_summary_prompt(shard, custom_terms_json, config_path)
+        return ask_gpt(summary_prompt, resp_type='json', valid_def=valid_summary, workspace_path=workspace_path, config_path=config_path, log_title='summary_shard')
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=load_key("max_workers", config_path)) as executor:
+        summaries = list(executor.map(summarize_shard, shards))
+
+    themes = [summary.get('theme', '') for summary in summaries if summary.get('theme')]
+    theme = themes[0] if themes else ''
+    if len(themes) > 1:
+        try:
+            merged = ask_gpt(get_theme_merge_prompt(themes, config_path), resp_type='json', valid_def=valid_theme, workspace_path=workspace_path, config_path=config_path, log_title='summary_merge')
+            theme = merged['theme']
+        except Exception:
+            rprint("[yellow]Failed to merge shard summaries, using the first one[/yellow]")
+
+    terms = merge_terms([summary['terms'] for summary in summaries], custom_terms_json['terms'])
+    return {"theme": theme, "terms": terms}
+
 def search_things_to_note_in_prompt(sentence, workspace_path: str = "."):
     """Search for terms to note in the given sentence"""
-    terminology_file = get_4_1_terminology(workspace_path)
-    if not os.path.exists(terminology_file):
-        return None
-        
-    with open(terminology_file, 'r', encoding='utf-8') as file:
-        things_to_note = json.load(file)
-    things_to_note_list = [term['src'] for term in things_to_note['terms'] if term['src'].lower() in sentence.lower()]
-    if things_to_note_list:
-        prompt = '\n'.join(
-            f'{i+1}. "{term["src"]}": "{term["tgt"]}",'
-            f' meaning: {term["note"]}'
-            for i, term in enumerate(things_to_note['terms'])
-            if term['src'] in things_to_note_list
-        )
-        return prompt
-    else:
+    term_index = load_term_index(get_4_1_terminology(workspace_path))
+    if term_index is None:
         return None
+    return term_index.format_prompt(sentence)
 
 def get_summary(workspace_path: str = ".", config_path: str = None):
     """
@@ -50,8 +106,6 @@ def get_summary(workspace_path: str = ".", config_path: str = None):
         print(f"Output file already exists: {output_file}")
         return
     
-    src_content = combine_chunks(workspace_path, config_path)
-    
     # Load custom terms from workspace
     custom_terms_path = get_workspace_custom_terms_path(workspace_path)
     custom_terms = pd.read_excel(custom_terms_path) if os.path.exists(custom_terms_path) else pd.DataFrame()
@@ -70,19 +124,13 @@ def get_summary(workspace_path: str = ".", config_path: str = None):
     if len(custom_terms) > 0:
         rprint(f"📖 Custom Terms Loaded: {len(custom_terms)} terms")
         rprint("📝 Terms Content:", json.dumps(custom_terms_json, indent=2, ensure_ascii=False))
-    summary_prompt = get_summary_prompt(src_content, custom_terms_json)
-    rprint("📝 Summarizing and extracting terminology ...")
     
-    def valid_summary(response_data):
-        required_keys = {'src', 'tgt', 'note'}
-        if 'terms' not in response_data:
-            return {"status": "error", "message": "Invalid response format"}
-        for term in response_data['terms']:
-            if not all(key in term for key in required_keys):
-                return {"status": "error", "message": "Invalid response format"}   
-        return {"status": "success", "message": "Summary completed"}
-
-    summary = ask_gpt(summary_prompt, resp_type='json', valid_def=valid_summary, workspace_path=workspace_path, config_path=config_path, log_title='summary')
+    if load_key('summary_mode', config_path) == 'map_reduce':
+        summary = summarize_map_reduce(custom_terms_json, workspace_path, config_path)
+    else:
+        summary_prompt = get_summary_prompt(combine_chunks(workspace_path, config_path), custom_terms_json, config_path)
+        rprint("📝 Summarizing and extracting terminology ...")
+        summary = ask_gpt(summary_prompt, resp_type='json', valid_def=valid_summary, workspace_path=workspace_path, config_path=config_path, log_title='summary')
     summary['terms'].extend(custom_terms_json['terms'])
     
     with open(output_file, 'w', encoding='utf-8') as f:
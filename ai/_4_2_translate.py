@@ -1,38 +1,60 @@
 import pandas as pd
 import json
+import math
 import concurrent.futures
 import os
 from ai.translate_lines import translate_lines
 from ai._4_1_summarize import search_things_to_note_in_prompt
-from ai._8_1_audio_task import check_len_then_trim
+from ai._8_1_audio_task import trim_subtitles
 from ai._6_gen_sub import align_timestamp
 from ai.utils import *
+from ai.utils.llm_client import count_tokens
+from ai.utils.translation_memory import get_translation_memory, get_language_pair, get_terms_id
 from rich.console import Console
 from rich.progress import Progress, SpinnerColumn, TextColumn
 from difflib import SequenceMatcher
-from ai.utils.path_constants import get_3_2_split_by_meaning, get_4_1_terminology, get_4_2_translation, get_2_cleaned_chunks
+from ai.utils.path_constants import get_3_2_split_by_meaning, get_4_1_terminology, get_4_2_translation, get_4_2_translation_raw, get_2_cleaned_chunks
 
 console = Console()
 
-# Function to split text into chunks
-def split_chunks_by_chars(chunk_size, max_i, workspace_path: str = "."): 
-    """Split text into chunks based on character count, return a list of multi-line text chunks"""
+def split_chunks_by_tokens(workspace_path: str = ".", config_path: str = None):
+    """
+    Split text into chunks sized by token count, return a list of multi-line text chunks
+
+    Every request re-sends the shared prompt (theme, terminology, context), so chunks are
+    kept above `min_tokens` and below `max_tokens`, and the chunk count is rounded up to a
+    multiple of `max_workers` so the last wave of the thread pool isn't left half-empty.
+    Chunk boundaries always fall between lines.
+    """
     input_file = get_3_2_split_by_meaning(workspace_path)
     with open(input_file, "r", encoding="utf-8") as file:
         sentences = file.read().strip().split('\n')
 
-    chunks = []
-    chunk = ''
-    sentence_count = 0
-    for sentence in sentences:
-        if len(chunk) + len(sentence + '\n') > chunk_size or sentence_count == max_i:
-            chunks.append(chunk.strip())
-            chunk = sentence + '\n'
-            sentence_count = 1
-        else:
-            chunk += sentence + '\n'
-            sentence_count += 1
-    chunks.append(chunk.strip())
+    chunk_set = load_key("translate_chunk", config_path)
+    max_tokens, min_tokens, max_lines = chunk_set["max_tokens"], chunk_set["min_tokens"], chunk_set["max_lines"]
+    max_workers = load_key("max_workers", config_path)
+    model = load_key("api.model", config_path)
+
+    token_counts = [count_tokens(sentence + '\n', model) for sentence in sentences]
+    total_tokens = sum(token_counts)
+
+    # balance chunk count against the worker pool, without going below min_tokens per chunk
+    num_chunks = max(math.ceil(total_tokens / max_tokens), math.ceil(len(sentences) / max_lines), 1)
+    num_chunks = math.ceil(num_chunks / max_workers) * max_workers
+    target = min(max_tokens, max(min_tokens, total_tokens / num_chunks))
+
+    chunks, chunk, chunk_tokens = [], [], 0
+    for sentence, tokens in zip(sentences, token_counts):
+        if chunk:
+            over_hard_limit = chunk_tokens + tokens > max_tokens or len(chunk) == max_lines
+            # close the chunk when adding this line overshoots the target more than stopping undershoots it
+            past_target = chunk_tokens + tokens - target > target - chunk_tokens
+            if over_hard_limit or past_target:
+                chunks.append('\n'.join(chunk))
+                chunk, chunk_tokens = [], 0
+        chunk.append(sentence)
+        chunk_tokens += tokens
+    chunks.append('\n'.join(chunk))
     return chunks
 
 # Get context from surrounding chunks
@@ -42,13 +64,46 @@ def get_after_content(chunks, chunk_index):
     return None if chunk_index == len(chunks) - 1 else chunks[chunk_index + 1].split('\n')[:2] # Get first 2 lines
 
 # 🔍 Translate a single chunk
-def translate_chunk(chunk, chunks, theme_prompt, i, workspace_path: str = "."):
+def translate_chunk(chunk, chunks, theme_prompt, i, workspace_path: str = ".", config_path: str = None):
     things_to_note_prompt = search_things_to_note_in_prompt(chunk, workspace_path)
     previous_content_prompt = get_previous_content(chunks, i)
     after_content_prompt = get_after_content(chunks, i)
     translation, english_result = translate_lines(chunk, previous_content_prompt, after_content_prompt, things_to_note_prompt, theme_prompt, i, workspace_path, config_path)
     return i, english_result, translation
 
+# 📚 Translate chunks fully covered by the translation memory without the LLM
+def lookup_translation_memory(chunks, workspace_path: str = ".", config_path: str = None):
+    """Return {chunk index: (i, chunk, translation)} for chunks whose every line is in the translation memory"""
+    memory = get_translation_memory(workspace_path, config_path)
+    if memory is None:
+        return {}
+    src_lang, tgt_lang = get_language_pair(workspace_path, config_path)
+    terms_id = get_terms_id(workspace_path)
+    covered = {}
+    for i, chunk in enumerate(chunks):
+        hits = memory.lookup(src_lang, tgt_lang, chunk.split('\n'), terms_id)
+        if all(hit is not None for hit in hits):
+            covered[i] = (i, chunk, '\n'.join(hits))
+    return covered
+
+def save_to_translation_memory(workspace_path: str = ".", config_path: str = None):
+    """
+    Store the job's LLM translations (before length trimming) in the translation memory
+
+    Args:
+        workspace_path: Path to workspace directory
+        config_path: Path to config file (optional)
+    """
+    memory = get_translation_memory(workspace_path, config_path)
+    raw_file = get_4_2_translation_raw(workspace_path)
+    if memory is None or not os.path.exists(raw_file):
+        return 0
+    df = pd.read_excel(raw_file)
+    # lines reused from the memory are not written back, so fuzzy matches don't drift further
+    df = df[~df['From_Memory'].astype(bool)].dropna(subset=['Source', 'Translation'])
+    src_lang, tgt_lang = get_language_pair(workspace_path, config_path)
+    return memory.add(src_lang, tgt_lang, list(zip(df['Source'].astype(str), df['Translation'].astype(str))), get_terms_id(workspace_path))
+
 # Add similarity calculation function
 def similar(a, b):
     return SequenceMatcher(None, a, b).ratio()
@@ -70,57 +125,70 @@ def translate_all(workspace_path: str = ".", config_path: str = None):
         return
     
     console.print("[bold green]Start Translating All...[/bold green]")
-    chunks = split_chunks_by_chars(chunk_size=600, max_i=10, workspace_path=workspace_path)
+    chunks = split_chunks_by_tokens(workspace_path, config_path)
     
     terminology_file = get_4_1_terminology(workspace_path)
     with open(terminology_file, 'r', encoding='utf-8') as file:
         theme_prompt = json.load(file).get('theme')
 
+    # 📚 Only chunks with lines missing from the translation memory go to the LLM
+    memory_results = lookup_translation_memory(chunks, workspace_path, config_path)
+    if memory_results:
+        console.print(f"[green]Translation memory covered {len(memory_results)} / {len(chunks)} chunks[/green]")
+
     # 🔄 Use concurrent execution for translation
     with Progress(SpinnerColumn(), TextColumn("[progress.description]{task.description}"), transient=True) as progress:
-        task = progress.add_task("[cyan]Translating chunks...", total=len(chunks))
+        task = progress.add_task("[cyan]Translating chunks...", total=len(chunks) - len(memory_results))
         with concurrent.futures.ThreadPoolExecutor(max_workers=load_key("max_workers", config_path)) as executor:
             futures = []
             for i, chunk in enumerate(chunks):
-                future = executor.submit(translate_chunk, chunk, chunks, theme_prompt, i, workspace_path)
+                if i in memory_results:
+                    continue
+                future = executor.submit(translate_chunk, chunk, chunks, theme_prompt, i, workspace_path, config_path)
                 futures.append(future)
-            results = []
+            results = list(memory_results.values())
             for future in concurrent.futures.as_completed(futures):
                 results.append(future.result())
                 progress.update(task, advance=1)
 
-    results.sort(key=lambda x: x[0])  # Sort results based on original order
+    results_by_index = {r[0]: r for r in results}
     
     # 💾 Save results to lists and Excel file
-    src_text, trans_text = [], []
+    src_text, trans_text, from_memory = [], [], []
     for i, chunk in enumerate(chunks):
         chunk_lines = chunk.split('\n')
         src_text.extend(chunk_lines)
         
-        # Calculate similarity between current chunk and translation results
+        # Results are tagged with their chunk index, similarity is only a sanity check on the pair
+        result = results_by_index.get(i)
+        if result is None:
+            console.print(f"[yellow]Warning: No matching translation found for chunk {i}[/yellow]")
+            raise ValueError(f"Translation matching failed (chunk {i})")
         chunk_text = ''.join(chunk_lines).lower()
-        matching_results = [(r, similar(''.join(r[1].split('\n')).lower(), chunk_text)) 
-                          for r in results]
-        best_match = max(matching_results, key=lambda x: x[1])
+        result_text = ''.join(result[1].split('\n')).lower()
+        similarity = 1.0 if result_text == chunk_text else similar(result_text, chunk_text)
         
         # Check similarity and handle exceptions
-        if best_match[1] < 0.9:
+        if similarity < 0.9:
             console.print(f"[yellow]Warning: No matching translation found for chunk {i}[/yellow]")
             raise ValueError(f"Translation matching failed (chunk {i})")
-        elif best_match[1] < 1.0:
-            console.print(f"[yellow]Warning: Similar match found (chunk {i}, similarity: {best_match[1]:.3f})[/yellow]")
+        elif similarity < 1.0:
+            console.print(f"[yellow]Warning: Similar match found (chunk {i}, similarity: {similarity:.3f})[/yellow]")
             
-        trans_text.extend(best_match[0][2].split('\n'))
+        trans_text.extend(result[2].split('\n'))
+        from_memory.extend([i in memory_results] * len(chunk_lines))
     
     # Trim long translation text
     df_text = pd.read_excel(get_2_cleaned_chunks(workspace_path))
     df_text['text'] = df_text['text'].str.strip('"').str.strip()
     df_translate = pd.DataFrame({'Source': src_text, 'Translation': trans_text})
+    # untrimmed translations, picked up by the translation memory once the job completes
+    df_translate.assign(From_Memory=from_memory).to_excel(get_4_2_translation_raw(workspace_path), index=False)
     subtitle_output_configs = [('trans_subs_for_audio.srt', ['Translation'])]
-    df_time = align_timestamp(df_text, df_translate, subtitle_output_configs, output_dir=None, for_display=False)
+    df_time = align_timestamp(df_text, df_translate, subtitle_output_configs, output_dir=None, for_display=False, workspace_path=workspace_path)
     console.print(df_time)
-    # apply check_len_then_trim to df_time['Translation'], only when duration > MIN_TRIM_DURATION.
-    df_time['Translation'] = df_time.apply(lambda x: check_len_then_trim(x['Translation'], x['duration']) if x['duration'] > load_key("min_trim_duration", config_path) else x['Translation'], axis=1)
+    # trim over-length translations in batches, only when duration > MIN_TRIM_DURATION.
+    df_time['Translation'] = trim_subtitles(df_time['Translation'].tolist(), df_time['duration'].tolist(), workspace_path, config_path)
     console.print(df_time)
     
     df_time.to_excel(output_file, index=False)
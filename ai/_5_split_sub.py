@@ -5,10 +5,13 @@ import os
 
 from ai._3_2_split_meaning import split_sentence
 from ai.prompts import get_align_prompt
+from ai.spacy_utils.load_nlp_model import init_nlp
+from ai.spacy_utils.split_heuristic import split_doc, split_by_ratio
 from rich.panel import Panel
 from rich.console import Console
 from rich.table import Table
 from ai.utils import *
+from ai.utils.llm_batch import DeferredToBatch
 from ai.utils.path_constants import get_4_2_translation, get_5_split_sub, get_5_remerged
 
 console = Console()
@@ -60,34 +63,50 @@ def align_subs(src_sub: str, tr_sub: str, src_part: str, workspace_path: str = "
     
     return src_parts, tr_parts, tr_remerged
 
-def split_align_subs(src_lines: List[str], tr_lines: List[str], config_path: str = None):
-    subtitle_set = load_key("subtitle", config_path)
-    MAX_SUB_LENGTH = subtitle_set["max_length"]
-    TARGET_SUB_MULTIPLIER = subtitle_set["target_multiplier"]
+def is_too_long(src, tr, max_length, target_multiplier) -> bool:
+    return len(str(src)) > max_length or calc_len(tr) * target_multiplier > max_length
+
+def split_heuristic(src: str, tr: str, nlp, min_confidence: float, config_path: str = None):
+    """Split a line in two without the LLM, return (src_parts, tr_parts); either is None when confidence is too low"""
+    src_parts, src_confidence = split_doc(nlp(src), 2)
+    if src_confidence < min_confidence:
+        return None, None
+    target_joiner = get_joiner(load_key("target_language", config_path), config_path)
+    tr_parts, tr_confidence = split_by_ratio(tr, [len(part) for part in src_parts], target_joiner)
+    return src_parts, (tr_parts if tr_confidence >= min_confidence else None)
+
+def split_align_subs(src_lines: List[str], tr_lines: List[str], to_split: List[int], nlp, workspace_path: str = ".", config_path: str = None):
+    """Split the lines at `to_split` in two, return flattened lines and remerged translations"""
     remerged_tr_lines = tr_lines.copy()
-    
-    to_split = []
-    for i, (src, tr) in enumerate(zip(src_lines, tr_lines)):
-        src, tr = str(src), str(tr)
-        if len(src) > MAX_SUB_LENGTH or calc_len(tr) * TARGET_SUB_MULTIPLIER > MAX_SUB_LENGTH:
-            to_split.append(i)
-            table = Table(title=f"📏 Line {i} needs to be split")
-            table.add_column("Type", style="cyan")
-            table.add_column("Content", style="magenta")
-            table.add_row("Source Line", src)
-            table.add_row("Target Line", tr)
-            console.print(table)
+    min_confidence = load_key("split_heuristic_confidence", config_path)
+    for i in to_split:
+        table = Table(title=f"📏 Line {i} needs to be split")
+        table.add_column("Type", style="cyan")
+        table.add_column("Content", style="magenta")
+        table.add_row("Source Line", str(src_lines[i]))
+        table.add_row("Target Line", str(tr_lines[i]))
+        console.print(table)
     
     @except_handler("Error in split_align_subs")
     def process(i):
-        split_src = split_sentence(src_lines[i], num_parts=2, config_path=config_path).strip()
-        src_parts, tr_parts, tr_remerged = align_subs(src_lines[i], tr_lines[i], split_src, workspace_path, config_path)
+        src, tr = str(src_lines[i]), str(tr_lines[i])
+        # punctuation / clause boundaries first, the LLM only when the split is ambiguous
+        src_parts, tr_parts = split_heuristic(src, tr, nlp, min_confidence, config_path)
+        if tr_parts is not None:
+            src_lines[i], tr_lines[i] = src_parts, tr_parts
+            return
+        split_src = '\n'.join(src_parts) if src_parts else split_sentence(src, num_parts=2, workspace_path=workspace_path, config_path=config_path).strip()
+        src_parts, tr_parts, tr_remerged = align_subs(src, tr, split_src, workspace_path, config_path)
         src_lines[i] = src_parts
         tr_lines[i] = tr_parts
         remerged_tr_lines[i] = tr_remerged
     
     with concurrent.futures.ThreadPoolExecutor(max_workers=load_key("max_workers", config_path)) as executor:
-        executor.map(process, to_split)
+        futures = [executor.submit(process, i) for i in to_split]
+    # a failed line stays unsplit, but a request deferred to an LLM batch has to stop the stage
+    for future in futures:
+        if isinstance(future.exception(), DeferredToBatch):
+            raise future.exception()
     
     # Flatten `src_lines` and `tr_lines`
     src_lines = [item for sublist in src_lines for item in (sublist if isinstance(sublist, list) else [sublist])]
@@ -120,18 +139,20 @@ def split_for_sub_main(workspace_path: str = ".", config_path: str = None):
     subtitle_set = load_key("subtitle", config_path)
     MAX_SUB_LENGTH = subtitle_set["max_length"]
     TARGET_SUB_MULTIPLIER = subtitle_set["target_multiplier"]
+    nlp = init_nlp(config_path)
     
+    to_split = [i for i, (s, t) in enumerate(zip(src, trans)) if is_too_long(s, t, MAX_SUB_LENGTH, TARGET_SUB_MULTIPLIER)]
+    split_src, split_trans, remerged = src, trans, trans
     for attempt in range(3):  # Multiple cutting
-        console.print(Panel(f"🔄 Split attempt {attempt + 1}", expand=False))
-        split_src, split_trans, remerged = split_align_subs(src.copy(), trans, config_path)
-        
         # Check if all subtitles meet the length requirements
-        if all(len(src) <= MAX_SUB_LENGTH for src in split_src) and \
-           all(calc_len(tr) * TARGET_SUB_MULTIPLIER <= MAX_SUB_LENGTH for tr in split_trans):
+        if not to_split:
             break
-        
-        # Update source data to continue the next round of segmentation
+        console.print(Panel(f"🔄 Split attempt {attempt + 1}: {len(to_split)} lines", expand=False))
         src, trans = split_src, split_trans
+        split_src, split_trans, remerged = split_align_subs(src.copy(), trans.copy(), to_split, nlp, workspace_path, config_path)
+        
+        # Re-check every line: new parts may still be too long, and lines whose split failed are retried
+        to_split = [i for i, (s, t) in enumerate(zip(split_src, split_trans)) if is_too_long(s, t, MAX_SUB_LENGTH, TARGET_SUB_MULTIPLIER)]
 
     # Make sure they have the same length to avoid errors.
     if len(src) > len(remerged):
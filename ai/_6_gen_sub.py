@@ -1,10 +1,14 @@
 import pandas as pd
+import numpy as np
 import os
 import re
+import threading
+from collections import OrderedDict
 from rich.panel import Panel
 from rich.console import Console
 from ai.utils import *
-from ai.utils.path_constants import get_2_cleaned_chunks, get_5_split_sub, get_5_remerged, get_output_dir, get_audio_dir
+from ai.utils.path_constants import get_2_cleaned_chunks, get_5_split_sub, get_5_remerged, get_6_audio_timeline, get_output_dir, get_audio_dir
+from ai.utils.srt_codec import format_times, format_srt
 
 console = Console()
 
@@ -20,19 +24,6 @@ AUDIO_SUBTITLE_OUTPUT_CONFIGS = [
     ('trans_subs_for_audio.srt', ['Translation'])
 ]
 
-def convert_to_srt_format(start_time, end_time):
-    """Convert time (in seconds) to the format: hours:minutes:seconds,milliseconds"""
-    def seconds_to_hmsm(seconds):
-        hours = int(seconds // 3600)
-        minutes = int((seconds % 3600) // 60)
-        seconds = seconds % 60
-        milliseconds = int(seconds * 1000) % 1000
-        return f"{hours:02d}:{minutes:02d}:{int(seconds):02d},{milliseconds:03d}"
-
-    start_srt = seconds_to_hmsm(start_time)
-    end_srt = seconds_to_hmsm(end_time)
-    return f"{start_srt} --> {end_srt}"
-
 def remove_punctuation(text):
     text = re.sub(r'\s+', ' ', text)
     text = re.sub(r'[^\w\s]', '', text)
@@ -56,87 +47,123 @@ def show_difference(str1, str2):
     print("Position markers: " + "".join("^" if i in diff_positions else " " for i in range(max(len(str1), len(str2)))))
     print(f"Difference indices: {diff_positions}")
 
-def get_sentence_timestamps(df_words, df_sentences):
-    time_stamp_list = []
-    
-    # Build complete string and position mapping
-    full_words_str = ''
-    position_to_word_idx = {}
-    
-    for idx, word in enumerate(df_words['text']):
-        clean_word = remove_punctuation(word.lower())
-        start_pos = len(full_words_str)
-        full_words_str += clean_word
-        for pos in range(start_pos, len(full_words_str)):
-            position_to_word_idx[pos] = idx
-    
+# ------------
+# word index of the transcript
+# ------------
+
+class WordIndex:
+    """
+    Concatenated lowercase, punctuation-free transcript with the cumulative end offset of
+    each word, so a character position maps to its word with a binary search.
+    """
+
+    def __init__(self, df_words):
+        clean_words = (df_words['text'].astype(str).str.lower()
+                       .str.replace(r'\s+', ' ', regex=True)
+                       .str.replace(r'[^\w\s]', '', regex=True)
+                       .str.strip())
+        self.text = ''.join(clean_words)
+        self.ends = np.cumsum(clean_words.str.len().to_numpy())
+        self.starts_time = df_words['start'].to_numpy(dtype=float)
+        self.ends_time = df_words['end'].to_numpy(dtype=float)
+
+    def word_at(self, positions):
+        """Index of the word covering each character position"""
+        return np.searchsorted(self.ends, positions, side='right')
+
+_WORD_INDEXES = OrderedDict()
+_WORD_INDEXES_LOCK = threading.Lock()
+WORD_INDEX_CACHE_SIZE = 8
+
+def get_word_index(df_words, workspace_path: str = None) -> WordIndex:
+    """
+    Word index of the job transcript, built once per workspace and reused by every align_timestamp call
+
+    Args:
+        df_words: Cleaned transcript chunks (text, start, end)
+        workspace_path: Path to workspace directory, None to skip caching
+    """
+    if workspace_path is None:
+        return WordIndex(df_words)
+    source_file = get_2_cleaned_chunks(workspace_path)
+    index_id = os.path.abspath(source_file)
+    mtime = os.path.getmtime(source_file) if os.path.exists(source_file) else None
+    with _WORD_INDEXES_LOCK:
+        cached = _WORD_INDEXES.get(index_id)
+        if cached is not None and cached[0] == mtime and cached[1] == len(df_words):
+            _WORD_INDEXES.move_to_end(index_id)
+            return cached[2]
+    index = WordIndex(df_words)
+    with _WORD_INDEXES_LOCK:
+        _WORD_INDEXES[index_id] = (mtime, len(df_words), index)
+        while len(_WORD_INDEXES) > WORD_INDEX_CACHE_SIZE:
+            _WORD_INDEXES.popitem(last=False)
+    return index
+
+def get_sentence_timestamps(df_words, df_sentences, word_index: WordIndex = None):
+    """(start, end) of each sentence, matched in order against the transcript words"""
+    index = word_index or WordIndex(df_words)
+    full_words_str = index.text
+
+    match_starts, match_ends = [], []
     current_pos = 0
     for idx, sentence in df_sentences['Source'].items():
-        clean_sentence = remove_punctuation(sentence.lower()).replace(" ", "")
-        sentence_len = len(clean_sentence)
-        
-        match_found = False
-        while current_pos <= len(full_words_str) - sentence_len:
-            if full_words_str[current_pos:current_pos+sentence_len] == clean_sentence:
-                start_word_idx = position_to_word_idx[current_pos]
-                end_word_idx = position_to_word_idx[current_pos + sentence_len - 1]
-                
-                time_stamp_list.append((
-                    float(df_words['start'][start_word_idx]),
-                    float(df_words['end'][end_word_idx])
-                ))
-                
-                current_pos += sentence_len
-                match_found = True
-                break
-            current_pos += 1
-            
-        if not match_found:
+        clean_sentence = remove_punctuation(str(sentence).lower()).replace(" ", "")
+        if not clean_sentence:
+            # punctuation/symbol-only line: zero-length match at the current word
+            last_pos = max(len(full_words_str) - 1, 0)
+            match_starts.append(min(current_pos, last_pos))
+            match_ends.append(min(current_pos, last_pos))
+            continue
+        match_pos = full_words_str.find(clean_sentence, current_pos)
+
+        if match_pos < 0:
             print(f"\n⚠️ Warning: No exact match found for sentence: {sentence}")
             show_difference(clean_sentence, 
                           full_words_str[current_pos:current_pos+len(clean_sentence)])
             print("\nOriginal sentence:", df_sentences['Source'][idx])
             raise ValueError("❎ No match found for sentence.")
-    
-    return time_stamp_list
 
-def align_timestamp(df_text, df_translate, subtitle_output_configs: list, output_dir: str, for_display: bool = True):
+        match_starts.append(match_pos)
+        match_ends.append(match_pos + len(clean_sentence) - 1)
+        current_pos = match_pos + len(clean_sentence)
+
+    start_words = index.word_at(match_starts)
+    end_words = index.word_at(match_ends)
+    return list(zip(index.starts_time[start_words].tolist(), index.ends_time[end_words].tolist()))
+
+def align_timestamp(df_text, df_translate, subtitle_output_configs: list, output_dir: str, for_display: bool = True, workspace_path: str = None):
     """Align timestamps and add a new timestamp column to df_translate"""
     df_trans_time = df_translate.copy()
 
-    # Assign an ID to each word in df_text['text'] and create a new DataFrame
-    words = df_text['text'].str.split(expand=True).stack().reset_index(level=1, drop=True).reset_index()
-    words.columns = ['id', 'word']
-    words['id'] = words['id'].astype(int)
-
     # Process timestamps ⏰
-    time_stamp_list = get_sentence_timestamps(df_text, df_translate)
-    df_trans_time['timestamp'] = time_stamp_list
-    df_trans_time['duration'] = df_trans_time['timestamp'].apply(lambda x: x[1] - x[0])
-
-    # Remove gaps 🕳️
-    for i in range(len(df_trans_time)-1):
-        delta_time = df_trans_time.loc[i+1, 'timestamp'][0] - df_trans_time.loc[i, 'timestamp'][1]
-        if 0 < delta_time < 1:
-            df_trans_time.at[i, 'timestamp'] = (df_trans_time.loc[i, 'timestamp'][0], df_trans_time.loc[i+1, 'timestamp'][0])
-
-    # Convert start and end timestamps to SRT format
-    df_trans_time['timestamp'] = df_trans_time['timestamp'].apply(lambda x: convert_to_srt_format(x[0], x[1]))
+    time_stamp_list = get_sentence_timestamps(df_text, df_translate, get_word_index(df_text, workspace_path))
+    starts = np.array([t[0] for t in time_stamp_list], dtype=float)
+    ends = np.array([t[1] for t in time_stamp_list], dtype=float)
+    df_trans_time['duration'] = ends - starts
+
+    # Remove gaps 🕳️ (shorter than 1s, by extending each line to the next start)
+    if len(starts) > 1:
+        delta_time = starts[1:] - ends[:-1]
+        close = (delta_time > 0) & (delta_time < 1)
+        ends[:-1][close] = starts[1:][close]
+
+    # Keep the timeline in seconds, SRT strings are only rendered for output
+    df_trans_time['start'] = starts
+    df_trans_time['end'] = ends
+    df_trans_time['timestamp'] = [f"{a} --> {b}" for a, b in zip(format_times(starts), format_times(ends))]
 
     # Polish subtitles: replace punctuation in Translation if for_display
     if for_display:
         df_trans_time['Translation'] = df_trans_time['Translation'].apply(lambda x: re.sub(r'[，。]', ' ', x).strip())
 
     # Output subtitles 📜
-    def generate_subtitle_string(df, columns):
-        return ''.join([f"{i+1}\n{row['timestamp']}\n{row[columns[0]].strip()}\n{row[columns[1]].strip() if len(columns) > 1 else ''}\n\n" for i, row in df.iterrows()]).strip()
-
     if output_dir:
         os.makedirs(output_dir, exist_ok=True)
         for filename, columns in subtitle_output_configs:
-            subtitle_str = generate_subtitle_string(df_trans_time, columns)
+            texts = df_trans_time[columns].astype(str).apply(lambda col: col.str.strip()).agg('\n'.join, axis=1)
             with open(os.path.join(output_dir, filename), 'w', encoding='utf-8') as f:
-                f.write(subtitle_str)
+                f.write(format_srt(starts, ends, texts))
     
     return df_trans_time
 
@@ -153,14 +180,17 @@ def align_timestamp_main(workspace_path: str = ".", config_path: str = None):
     df_translate = pd.read_excel(get_5_split_sub(workspace_path))
     
     output_dir = get_output_dir(workspace_path)
-    align_timestamp(df_text, df_translate, SUBTITLE_OUTPUT_CONFIGS, output_dir)
+    align_timestamp(df_text, df_translate, SUBTITLE_OUTPUT_CONFIGS, output_dir, workspace_path=workspace_path)
     console.print(Panel("[bold green]🎉📝 Subtitles generation completed! Please check in the `output` folder 👀[/bold green]"))
 
     # for audio
     df_translate_for_audio = pd.read_excel(get_5_remerged(workspace_path)) # use remerged file to avoid unmatched lines when dubbing
     
     audio_dir = get_audio_dir(workspace_path)
-    align_timestamp(df_text, df_translate_for_audio, AUDIO_SUBTITLE_OUTPUT_CONFIGS, audio_dir)
+    df_audio_time = align_timestamp(df_text, df_translate_for_audio, AUDIO_SUBTITLE_OUTPUT_CONFIGS, audio_dir, workspace_path=workspace_path)
+    # timeline in seconds for the audio stages, the srt files above are for reading only
+    df_audio_time.insert(0, 'number', range(1, len(df_audio_time) + 1))
+    df_audio_time[['number', 'start', 'end', 'Source', 'Translation']].to_excel(get_6_audio_timeline(workspace_path), index=False)
     console.print(Panel(f"[bold green]🎉📝 Audio subtitles generation completed! Please check in the `{audio_dir}` folder 👀[/bold green]"))
 
 if __name__ == '__main__':
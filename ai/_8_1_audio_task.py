@@ -1,23 +1,32 @@
-import datetime
 import re
+import bisect
+import itertools
 import pandas as pd
 import os
+import concurrent.futures
 from rich.console import Console
 from rich.panel import Panel
-from ai.prompts import get_subtitle_trim_prompt
-from ai.tts_backend.estimate_duration import init_estimator, estimate_duration
+from ai.prompts import get_subtitle_trim_prompt, get_subtitle_trim_batch_prompt
+from ai.tts_backend.estimate_duration import init_estimator, estimate_duration, estimate_durations
 from ai.utils import *
-from ai.utils.path_constants import get_8_1_audio_task, get_audio_dir
+from ai.utils.path_constants import get_6_audio_timeline, get_8_1_audio_task, get_audio_dir, get_output_dir
+from ai.utils.srt_codec import parse_srt
 
 console = Console()
+ESTIMATOR = None
 
-def check_len_then_trim(text, duration, config_path: str = None):
+def get_estimator():
     global ESTIMATOR
     if ESTIMATOR is None:
         ESTIMATOR = init_estimator()
-    
+    return ESTIMATOR
+
+def strip_punctuation(text):
+    return re.sub(r'[,.!?;:，。！？；：]', ' ', text).strip()
+
+def check_len_then_trim(text, duration, workspace_path: str = ".", config_path: str = None):
     speed_factor = load_key("speed_factor", config_path)
-    estimated_duration = estimate_duration(text, ESTIMATOR) / speed_factor['max']
+    estimated_duration = estimate_duration(text, get_estimator()) / speed_factor['max']
     
     console.print(f"Subtitle text: {text}, "
                   f"[bold green]Estimated reading duration: {estimated_duration:.2f} seconds[/bold green]")
@@ -35,97 +44,187 @@ def check_len_then_trim(text, duration, config_path: str = None):
             shortened_text = response['result']
         except Exception:
             rprint("[bold red]🚫 AI refused to answer due to sensitivity, so manually remove punctuation[/bold red]")
-            shortened_text = re.sub(r'[,.!?;:，。！？；：]', ' ', text).strip()
+            shortened_text = strip_punctuation(text)
         rprint(Panel(f"Subtitle before shortening: {original_text}\nSubtitle after shortening: {shortened_text}", title="Subtitle Shortening Result", border_style="green"))
         return shortened_text
     else:
         return text
 
-def time_diff_seconds(t1, t2, base_date):
-    """Calculate the difference in seconds between two time objects"""
-    dt1 = datetime.datetime.combine(base_date, t1)
-    dt2 = datetime.datetime.combine(base_date, t2)
-    return (dt2 - dt1).total_seconds()
+def trim_batch(items, workspace_path: str = ".", config_path: str = None):
+    """Shorten several (text, duration) subtitles with one request, falling back to punctuation removal per line"""
+    def valid_trim_batch(response):
+        # partial answers are kept, lines without a result fall back individually
+        if not isinstance(response, dict):
+            return {'status': 'error', 'message': 'Response is not a JSON object'}
+        return {'status': 'success', 'message': ''}
+    try:
+        response = ask_gpt(get_subtitle_trim_batch_prompt(items), resp_type='json', workspace_path=workspace_path, config_path=config_path, log_title='sub_trim_batch', valid_def=valid_trim_batch)
+    except Exception:
+        rprint("[bold red]🚫 AI refused to answer due to sensitivity, so manually remove punctuation[/bold red]")
+        response = {}
+    results = []
+    for i in range(1, len(items) + 1):
+        item = response.get(str(i))
+        results.append(str(item.get('result') or '').strip() if isinstance(item, dict) else '')
+    missing = sum(1 for result in results if not result)
+    if response and missing:
+        rprint(f"[yellow]⚠️ {missing} subtitles without a shortened result, removing punctuation instead[/yellow]")
+    return [result or strip_punctuation(text) for result, (text, _) in zip(results, items)]
+
+def trim_subtitles(texts, durations, workspace_path: str = ".", config_path: str = None):
+    """
+    Shorten every subtitle whose estimated reading time exceeds its duration
+
+    Over-length lines are collected first and trimmed in batched prompts that run concurrently.
+
+    Args:
+        texts: Subtitle texts
+        durations: Duration of each subtitle in seconds
+        workspace_path: Path to workspace directory
+        config_path: Path to config file (optional)
+    """
+    estimator = get_estimator()
+    max_speed = load_key("speed_factor", config_path)['max']
+    min_trim_duration = load_key("min_trim_duration", config_path)
+    batch_size = load_key("subtitle_trim_batch_size", config_path)
+
+    texts, durations = list(texts), list(durations)
+    candidates = [i for i, duration in enumerate(durations) if duration > min_trim_duration]
+    estimates = estimate_durations([texts[i] for i in candidates], estimator)
+    over_length = [i for i, estimate in zip(candidates, estimates) if estimate / max_speed > durations[i]]
+    if not over_length:
+        return texts
+    rprint(Panel(f"{len(over_length)} subtitles exceed their duration, shortening in batches of {batch_size}...", title="Processing", border_style="yellow"))
+
+    batches = [over_length[i:i + batch_size] for i in range(0, len(over_length), batch_size)]
+    with concurrent.futures.ThreadPoolExecutor(max_workers=load_key("max_workers", config_path)) as executor:
+        futures = {
+            executor.submit(trim_batch, [(texts[i], round(durations[i], 2)) for i in batch], workspace_path, config_path): batch
+            for batch in batches
+        }
+        for future in concurrent.futures.as_completed(futures):
+            for i, shortened_text in zip(futures[future], future.result()):
+                console.print(f"Subtitle before shortening: {texts[i]}\nSubtitle after shortening: {shortened_text}")
+                texts[i] = shortened_text
+    return texts
+
+def clean_task_text(text):
+    # Remove content within parentheses (including English and Chinese parentheses)
+    text = re.sub(r'\([^)]*\)', '', text).strip()
+    text = re.sub(r'（[^）]*）', '', text).strip()
+    # Remove '-' character, can continue to add illegal characters that cause errors
+    return text.replace('-', '')
+
+def load_audio_subtitles(workspace_path: str = "."):
+    """Audio subtitle timeline (number, start, end in seconds, text, origin), from the _6 sidecar or the srt files"""
+    timeline_file = get_6_audio_timeline(workspace_path)
+    if os.path.exists(timeline_file):
+        df = pd.read_excel(timeline_file)
+        texts, origins = df['Translation'], df['Source']
+    else:
+        audio_dir = get_audio_dir(workspace_path)
+        with open(f"{audio_dir}/trans_subs_for_audio.srt", 'r', encoding='utf-8') as file:
+            df = parse_srt(file.read())
+        with open(f"{audio_dir}/src_subs_for_audio.srt", 'r', encoding='utf-8') as src_file:
+            src = parse_srt(src_file.read())
+        texts = df['text']
+        # Add the original text from src_subs_for_audio.srt
+        origins = df['number'].map(dict(zip(src['number'], src['text'])))
+    return pd.DataFrame({
+        'number': df['number'].astype(int),
+        'start_time': df['start'].astype(float),
+        'end_time': df['end'].astype(float),
+        'duration': (df['end'] - df['start']).astype(float),
+        'text': texts.fillna('').astype(str).map(lambda text: clean_task_text(' '.join(text.split()))),
+        'origin': origins.fillna('').astype(str).map(lambda text: ' '.join(text.split())),
+    })
+
+def clean_match_text(text):
+    """clean space and punctuation"""
+    if not text or not isinstance(text, str):
+        return ''
+    return re.sub(r'[^\w\s]|[\s]', '', text)
+
+def load_subtitle_lines(workspace_path: str = "."):
+    """Cleaned translation and source lines of the display subtitles (trans.srt / src.srt), one per subtitle"""
+    output_dir = get_output_dir(workspace_path)
+    lines = []
+    for srt_file in (f"{output_dir}/trans.srt", f"{output_dir}/src.srt"):
+        with open(srt_file, 'r', encoding='utf-8') as f:
+            lines.append([clean_task_text(text) for text in parse_srt(f.read())['text']])
+    return lines[0], lines[1]
+
+def match_subtitle_lines(texts, lines):
+    """
+    Map each task text to the consecutive subtitle lines it was built from, return (line_start, line_end) lists
+
+    Lines are consumed in order. A prefix sum over the cleaned line lengths gives the only
+    line where a task can end, which is then verified with one slice comparison.
+    """
+    cleaned = [clean_match_text(line) for line in lines]
+    joined = ''.join(cleaned)
+    prefix = list(itertools.accumulate((len(line) for line in cleaned), initial=0))
+
+    line_starts, line_ends, last_idx = [], [], 0
+    for idx, text in enumerate(texts):
+        target = clean_match_text(text)
+        goal = prefix[last_idx] + len(target)
+        end = bisect.bisect_left(prefix, goal, lo=last_idx + 1)
+        if end >= len(prefix) or prefix[end] != goal or joined[prefix[last_idx]:goal] != target:
+            rprint(f"[❌ Error] Matching failed at line {idx}:")
+            rprint(f"Target: '{target}'")
+            rprint(f"Current: '{joined[prefix[last_idx]:goal]}'")
+            raise ValueError("Matching failed")
+        line_starts.append(last_idx)
+        line_ends.append(end)
+        last_idx = end
+    return line_starts, line_ends
+
+def merge_short_subtitles(rows, min_duration):
+    """
+    Merge or extend subtitles shorter than `min_duration`, in one pass over the rows
+
+    A short line absorbs the following lines while the next one starts within `min_duration`
+    of it. A short line that cannot absorb its neighbour is extended to `min_duration`,
+    unless it is the last one.
+
+    Args:
+        rows: Subtitle records (start_time, end_time, duration, text, origin) in order
+        min_duration: Minimum subtitle duration in seconds
+    """
+    merged = []
+    j, n = 0, len(rows)
+    while j < n:
+        row = dict(rows[j])
+        j += 1
+        while row['duration'] < min_duration and j < n and rows[j]['start_time'] - row['start_time'] < min_duration:
+            rprint(f"[bold yellow]Merging subtitles {len(merged)+1} and {len(merged)+2}[/bold yellow]")
+            row['text'] += ' ' + rows[j]['text']
+            row['origin'] += ' ' + rows[j]['origin']
+            row['end_time'] = rows[j]['end_time']
+            row['duration'] = row['end_time'] - row['start_time']
+            j += 1
+        if row['duration'] < min_duration:
+            if j < n:  # Not the last audio
+                rprint(f"[bold blue]Extending subtitle {len(merged)+1} duration to {min_duration} seconds[/bold blue]")
+                row['end_time'] = row['start_time'] + min_duration
+                row['duration'] = min_duration
+            else:
+                rprint(f"[bold red]The last subtitle {len(merged)+1} duration is less than {min_duration} seconds, but not extending[/bold red]")
+        merged.append(row)
+    return merged
 
 def process_srt(workspace_path: str = ".", config_path: str = None):
     """Process srt file, generate audio tasks"""
-    audio_dir = get_audio_dir(workspace_path)
-    trans_subs_file = f"{audio_dir}/trans_subs_for_audio.srt"
-    src_subs_file = f"{audio_dir}/src_subs_for_audio.srt"
-    
-    with open(trans_subs_file, 'r', encoding='utf-8') as file:
-        content = file.read()
-    
-    with open(src_subs_file, 'r', encoding='utf-8') as src_file:
-        src_content = src_file.read()
-    
-    subtitles = []
-    src_subtitles = {}
-    
-    for block in src_content.strip().split('\n\n'):
-        lines = [line.strip() for line in block.split('\n') if line.strip()]
-        if len(lines) < 3:
-            continue
-        
-        number = int(lines[0])
-        src_text = ' '.join(lines[2:])
-        src_subtitles[number] = src_text
-    
-    for block in content.strip().split('\n\n'):
-        lines = [line.strip() for line in block.split('\n') if line.strip()]
-        if len(lines) < 3:
-            continue
-        
-        try:
-            number = int(lines[0])
-            start_time, end_time = lines[1].split(' --> ')
-            start_time = datetime.datetime.strptime(start_time, '%H:%M:%S,%f').time()
-            end_time = datetime.datetime.strptime(end_time, '%H:%M:%S,%f').time()
-            duration = time_diff_seconds(start_time, end_time, datetime.date.today())
-            text = ' '.join(lines[2:])
-            # Remove content within parentheses (including English and Chinese parentheses)
-            text = re.sub(r'\([^)]*\)', '', text).strip()
-            text = re.sub(r'（[^）]*）', '', text).strip()
-            # Remove '-' character, can continue to add illegal characters that cause errors
-            text = text.replace('-', '')
-
-            # Add the original text from src_subs_for_audio.srt
-            origin = src_subtitles.get(number, '')
-
-        except ValueError as e:
-            rprint(Panel(f"Unable to parse subtitle block '{block}', error: {str(e)}, skipping this subtitle block.", title="Error", border_style="red"))
-            continue
-        
-        subtitles.append({'number': number, 'start_time': start_time, 'end_time': end_time, 'duration': duration, 'text': text, 'origin': origin})
-    
-    df = pd.DataFrame(subtitles)
-    
-    i = 0
-    MIN_SUB_DUR = load_key("min_subtitle_duration", config_path)
-    while i < len(df):
-        today = datetime.date.today()
-        if df.loc[i, 'duration'] < MIN_SUB_DUR:
-            if i < len(df) - 1 and time_diff_seconds(df.loc[i, 'start_time'],df.loc[i+1, 'start_time'],today) < MIN_SUB_DUR:
-                rprint(f"[bold yellow]Merging subtitles {i+1} and {i+2}[/bold yellow]")
-                df.loc[i, 'text'] += ' ' + df.loc[i+1, 'text']
-                df.loc[i, 'origin'] += ' ' + df.loc[i+1, 'origin']
-                df.loc[i, 'end_time'] = df.loc[i+1, 'end_time']
-                df.loc[i, 'duration'] = time_diff_seconds(df.loc[i, 'start_time'],df.loc[i, 'end_time'],today)
-                df = df.drop(i+1).reset_index(drop=True)
-            else:
-                if i < len(df) - 1:  # Not the last audio
-                    rprint(f"[bold blue]Extending subtitle {i+1} duration to {MIN_SUB_DUR} seconds[/bold blue]")
-                    df.loc[i, 'end_time'] = (datetime.datetime.combine(today, df.loc[i, 'start_time']) + 
-                                            datetime.timedelta(seconds=MIN_SUB_DUR)).time()
-                    df.loc[i, 'duration'] = MIN_SUB_DUR
-                else:
-                    rprint(f"[bold red]The last subtitle {i+1} duration is less than {MIN_SUB_DUR} seconds, but not extending[/bold red]")
-                i += 1
-        else:
-            i += 1
-    
-    df['start_time'] = df['start_time'].apply(lambda x: x.strftime('%H:%M:%S.%f')[:-3])
-    df['end_time'] = df['end_time'].apply(lambda x: x.strftime('%H:%M:%S.%f')[:-3])
+    df = load_audio_subtitles(workspace_path)
+    rows = merge_short_subtitles(df.to_dict('records'), load_key("min_subtitle_duration", config_path))
+    df = pd.DataFrame(rows, columns=df.columns)
+
+    # carry the subtitle lines of each task forward, so _8_2 looks them up instead of searching
+    trans_lines, _ = load_subtitle_lines(workspace_path)
+    df['line_start'], df['line_end'] = match_subtitle_lines(df['text'], trans_lines)
+
+    # start_time / end_time stay in seconds (float), see ai.utils.srt_codec for conversions
 
     ##! No longer perform secondary trim
     # check and trim subtitle length, for twice to ensure the subtitle length is within the limit, 允许tolerance
@@ -1,131 +1,109 @@
-import datetime
-import re
+import numpy as np
 import pandas as pd
-from ai._8_1_audio_task import time_diff_seconds
+from ai._8_1_audio_task import load_subtitle_lines, match_subtitle_lines
 from ai.asr_backend.audio_preprocess import get_audio_duration
-from ai.tts_backend.estimate_duration import init_estimator, estimate_duration
+from ai.tts_backend.estimate_duration import init_estimator, estimate_durations
+from ai.tts_backend.rate_calibration import get_rate_factor
 from ai.utils import *
-from ai.utils.path_constants import get_8_1_audio_task, get_output_dir, get_raw_audio_file
+from ai.utils.path_constants import get_8_1_audio_task, get_raw_audio_file
+from ai.utils.srt_codec import parse_times
 
 MAX_MERGE_COUNT = 5
-ESTIMATOR = None
 
-def calc_if_too_fast(est_dur, tol_dur, duration, tolerance, config_path: str = None):
-    accept = load_key("speed_factor.accept", config_path) # Maximum acceptable speed factor
-    if est_dur / accept > tol_dur:  # Even max speed factor cannot adapt
-        return 2
-    elif est_dur > tol_dur:  # Speed adjustment needed within acceptable range
-        return 1
-    elif est_dur < duration - tolerance:  # Speaking speed too slow
-        return -1
-    else:  # Normal speaking speed
-        return 0
+def calc_if_too_fast(est_dur, tol_dur, duration, tolerance, accept):
+    """
+    Speed flag per line (works on scalars or arrays)
+
+    2: even the maximum acceptable speed factor cannot fit, 1: needs speeding up within
+    the acceptable range, -1: speaking speed too slow, 0: normal.
+    """
+    est_dur, tol_dur = np.asarray(est_dur, dtype=float), np.asarray(tol_dur, dtype=float)
+    return np.select(
+        [est_dur / accept > tol_dur, est_dur > tol_dur, est_dur < np.asarray(duration) - np.asarray(tolerance)],
+        [2, 1, -1],
+        default=0,
+    )
 
-def merge_rows(df, start_idx, merge_count, config_path: str = None):
-    """Merge multiple rows and calculate cumulative values"""
-    merged = {
-        'est_dur': df.iloc[start_idx]['est_dur'],
-        'tol_dur': df.iloc[start_idx]['tol_dur'],
-        'duration': df.iloc[start_idx]['duration']
-    }
+def merge_rows(est_dur, tol_dur, duration, tolerance, cut_off, start_idx, merge_count, accept):
+    """Merge the rows following start_idx until the merged span is fast enough, mark the cut and return the rows consumed"""
+    n = len(cut_off)
+    merged_est, merged_tol, merged_dur = est_dur[start_idx], tol_dur[start_idx], duration[start_idx]
     
-    while merge_count < MAX_MERGE_COUNT and (start_idx + merge_count) < len(df):
-        next_row = df.iloc[start_idx + merge_count]
-        merged['est_dur'] += next_row['est_dur']
-        merged['tol_dur'] += next_row['tol_dur']
-        merged['duration'] += next_row['duration']
+    while merge_count < MAX_MERGE_COUNT and (start_idx + merge_count) < n:
+        next_idx = start_idx + merge_count
+        merged_est += est_dur[next_idx]
+        merged_tol += tol_dur[next_idx]
+        merged_dur += duration[next_idx]
         
-        speed_flag = calc_if_too_fast(
-            merged['est_dur'],
-            merged['tol_dur'],
-            merged['duration'],
-            df.iloc[start_idx + merge_count]['tolerance'],
-            config_path
-        )
+        speed_flag = calc_if_too_fast(merged_est, merged_tol, merged_dur, tolerance[next_idx], accept)
         
         if speed_flag <= 0 or merge_count == 2:
-            df.at[start_idx + merge_count, 'cut_off'] = 1
+            cut_off[next_idx] = 1
             return merge_count + 1
         
         merge_count += 1
     
     # If no suitable merge point is found
-    if merge_count >= MAX_MERGE_COUNT or (start_idx + merge_count) >= len(df):
-        df.at[start_idx + merge_count - 1, 'cut_off'] = 1
+    if merge_count >= MAX_MERGE_COUNT or (start_idx + merge_count) >= n:
+        cut_off[start_idx + merge_count - 1] = 1
     return merge_count
 
 def analyze_subtitle_timing_and_speed(df, workspace_path: str = ".", config_path: str = None):
     rprint("[🔍 Analyzing] Calculating subtitle timing and speed...")
-    global ESTIMATOR
-    if ESTIMATOR is None:
-        ESTIMATOR = init_estimator()
+    # speaking rate learned from earlier jobs with the same voice, 1.0 until calibrated
+    rate_factor = get_rate_factor(workspace_path, config_path)
+    estimator = init_estimator(rate_factor)
     TOLERANCE = load_key("tolerance", config_path)
+    accept = load_key("speed_factor.accept", config_path) # Maximum acceptable speed factor
     whole_dur = get_audio_duration(get_raw_audio_file(workspace_path))
-    df['gap'] = 0.0  # Initialize gap column
-    for i in range(len(df) - 1):
-        current_end = datetime.datetime.strptime(df.loc[i, 'end_time'], '%H:%M:%S.%f').time()
-        next_start = datetime.datetime.strptime(df.loc[i + 1, 'start_time'], '%H:%M:%S.%f').time()
-        df.loc[i, 'gap'] = time_diff_seconds(current_end, next_start, datetime.date.today())
-    
-    # Set the gap for the last line
-    last_end = datetime.datetime.strptime(df.iloc[-1]['end_time'], '%H:%M:%S.%f').time()
-    last_end_seconds = (last_end.hour * 3600 + last_end.minute * 60 + 
-                       last_end.second + last_end.microsecond / 1000000)
-    df.iloc[-1, df.columns.get_loc('gap')] = whole_dur - last_end_seconds
+    # gap to the next line's start, the last line runs to the end of the audio
+    starts, ends = parse_times(df['start_time']), parse_times(df['end_time'])
+    gap = np.append(starts[1:], whole_dur) - ends
+    duration = df['duration'].to_numpy(dtype=float)
+    tolerance = np.where(gap > TOLERANCE, TOLERANCE, gap)
     
-    df['tolerance'] = df['gap'].apply(lambda x: TOLERANCE if x > TOLERANCE else x)
-    df['tol_dur'] = df['duration'] + df['tolerance']
-    df['est_dur'] = df.apply(lambda x: estimate_duration(x['text'], ESTIMATOR), axis=1)
+    df['gap'] = gap
+    df['tolerance'] = tolerance
+    df['tol_dur'] = duration + tolerance
+    df['est_dur'] = estimate_durations(df['text'], estimator)
+    df['rate_factor'] = rate_factor
 
     ## Calculate speed indicators
-    accept = load_key("speed_factor.accept", config_path) # Maximum acceptable speed factor
-    def calc_if_too_fast(row):
-        est_dur = row['est_dur']
-        tol_dur = row['tol_dur']
-        duration = row['duration']
-        tolerance = row['tolerance']
-        
-        if est_dur / accept > tol_dur:  # Even max speed factor cannot adapt
-            return 2
-        elif est_dur > tol_dur:  # Speed adjustment needed within acceptable range
-            return 1
-        elif est_dur < duration - tolerance:  # Speaking speed too slow
-            return -1
-        else:  # Normal speaking speed
-            return 0
-    
-    df['if_too_fast'] = df.apply(calc_if_too_fast, axis=1)
+    df['if_too_fast'] = calc_if_too_fast(df['est_dur'].to_numpy(), df['tol_dur'].to_numpy(), duration, tolerance, accept)
     return df
 
 def process_cutoffs(df, config_path: str = None):
     rprint("[✂️ Processing] Generating cutoff points...")
-    df['cut_off'] = 0  # Initialize cut_off column
-    df.loc[df['gap'] >= load_key("tolerance", config_path), 'cut_off'] = 1  # Set to 1 when gap is greater than TOLERANCE
+    accept = load_key("speed_factor.accept", config_path)
+    est_dur, tol_dur = df['est_dur'].to_numpy(dtype=float), df['tol_dur'].to_numpy(dtype=float)
+    duration, tolerance = df['duration'].to_numpy(dtype=float), df['tolerance'].to_numpy(dtype=float)
+    if_too_fast = df['if_too_fast'].to_numpy()
+    # Set to 1 when gap is greater than TOLERANCE
+    cut_off = (df['gap'].to_numpy(dtype=float) >= load_key("tolerance", config_path)).astype(int)
+    n = len(cut_off)
     idx = 0
-    while idx < len(df):
+    while idx < n:
         # Process marked split points
-        if df.iloc[idx]['cut_off'] == 1:
-            if df.iloc[idx]['if_too_fast'] == 2:
+        if cut_off[idx] == 1:
+            if if_too_fast[idx] == 2:
                 rprint(f"[⚠️ Warning] Line {idx} is too fast and cannot be fixed by speed adjustment")
             idx += 1
             continue
 
         # Process the last line
-        if idx + 1 >= len(df):
-            df.at[idx, 'cut_off'] = 1
+        if idx + 1 >= n:
+            cut_off[idx] = 1
             break
 
-        # Process normal or slow lines
-        if df.iloc[idx]['if_too_fast'] <= 0:
-            if df.iloc[idx + 1]['if_too_fast'] <= 0:
-                df.at[idx, 'cut_off'] = 1
-                idx += 1
-            else:
-                idx += merge_rows(df, idx, 1, config_path)
-        # Process fast lines
+        # Process normal or slow lines followed by a normal or slow line
+        if if_too_fast[idx] <= 0 and if_too_fast[idx + 1] <= 0:
+            cut_off[idx] = 1
+            idx += 1
+        # Process fast lines, or lines followed by a fast one
         else:
-            idx += merge_rows(df, idx, 1, config_path)
+            idx += merge_rows(est_dur, tol_dur, duration, tolerance, cut_off, idx, 1, accept)
     
+    df['cut_off'] = cut_off
     return df
 
 def gen_dub_chunks(workspace_path: str = ".", config_path: str = None):
@@ -146,67 +124,15 @@ def gen_dub_chunks(workspace_path: str = ".", config_path: str = None):
     df = process_cutoffs(df, config_path)
 
     rprint("[📝 Reading] Loading transcript files...")
-    output_dir = get_output_dir(workspace_path)
-    trans_srt = f"{output_dir}/trans.srt"
-    src_srt = f"{output_dir}/src.srt"
-    
-    content = open(trans_srt, "r", encoding="utf-8").read()
-    ori_content = open(src_srt, "r", encoding="utf-8").read()
-    
-    # Process subtitle content
-    content_lines = []
-    ori_content_lines = []
-    
-    # Process translated subtitles
-    for block in content.strip().split('\n\n'):
-        lines = [line.strip() for line in block.split('\n') if line.strip()]
-        if len(lines) >= 3:
-            text = ' '.join(lines[2:])
-            text = re.sub(r'\([^)]*\)|（[^）]*）', '', text).strip().replace('-', '')
-            content_lines.append(text)
-            
-    # Process source subtitles (same structure)
-    for block in ori_content.strip().split('\n\n'):
-        lines = [line.strip() for line in block.split('\n') if line.strip()]
-        if len(lines) >= 3:
-            text = ' '.join(lines[2:])
-            text = re.sub(r'\([^)]*\)|（[^）]*）', '', text).strip().replace('-', '')
-            ori_content_lines.append(text)
-
-    # Match processing
-    df['lines'] = None
-    df['src_lines'] = None
-    last_idx = 0
+    content_lines, ori_content_lines = load_subtitle_lines(workspace_path)
 
-    def clean_text(text):
-        """clean space and punctuation"""
-        if not text or not isinstance(text, str):
-            return ''
-        return re.sub(r'[^\w\s]|[\s]', '', text)
-
-    for idx, row in df.iterrows():
-        target = clean_text(row['text'])
-        matches = []
-        current = ''
-        match_indices = []  # Store indices for matching lines
-        
-        for i in range(last_idx, len(content_lines)):
-            line = content_lines[i]
-            cleaned_line = clean_text(line)
-            current += cleaned_line
-            matches.append(line)  # 存储原始文本
-            match_indices.append(i)
-            
-            if current == target:
-                df.at[idx, 'lines'] = matches
-                df.at[idx, 'src_lines'] = [ori_content_lines[i] for i in match_indices]
-                last_idx = i + 1
-                break
-        else:  # If no match is found
-            rprint(f"[❌ Error] Matching failed at line {idx}:")
-            rprint(f"Target: '{target}'")
-            rprint(f"Current: '{current}'")
-            raise ValueError("Matching failed")
+    # Match processing: task files from _8_1 carry their line range, older ones are matched here
+    if 'line_start' in df.columns and 'line_end' in df.columns:
+        line_starts, line_ends = df['line_start'].astype(int).tolist(), df['line_end'].astype(int).tolist()
+    else:
+        line_starts, line_ends = match_subtitle_lines(df['text'], content_lines)
+    df['lines'] = [content_lines[a:b] for a, b in zip(line_starts, line_ends)]
+    df['src_lines'] = [ori_content_lines[a:b] for a, b in zip(line_starts, line_ends)]
 
     # Save results
     df.to_excel(get_8_1_audio_task(workspace_path), index=False)
@@ -6,16 +6,14 @@ from ai.utils import *
 from ai.utils.path_constants import get_8_1_audio_task, get_audio_refers_dir, get_audio_segs_dir, get_vocal_audio_file
 import pandas as pd
 import soundfile as sf
+from ai.utils.srt_codec import parse_time
 
 console = Console()
 from ai.asr_backend.demucs_vl import demucs_audio
 
-def time_to_samples(time_str, sr):
-    """Unified time conversion function"""
-    h, m, s = time_str.split(':')
-    s, ms = s.split(',') if ',' in s else (s, '0')
-    seconds = int(h) * 3600 + int(m) * 60 + float(s) + float(ms) / 1000
-    return int(seconds * sr)
+def time_to_samples(time_value, sr):
+    """Unified time conversion function (seconds, or srt time strings from older task files)"""
+    return int(parse_time(time_value) * sr)
 
 def extract_audio(audio_data, sr, start_time, end_time, out_file):
     """Simplified audio extraction function"""
@@ -4,9 +4,9 @@ from typing import Dict, List, Tuple
 from pydub import AudioSegment
 from ai.utils import *
 from ai.utils.path_constants import get_audio_dir, get_raw_audio_file, get_2_cleaned_chunks
+from ai.utils.audio_probe import probe_duration
 from pydub import AudioSegment
 from pydub.silence import detect_silence
-from pydub.utils import mediainfo
 from rich import print as rprint
 
 def normalize_audio_volume(audio_path, output_path, target_db = -20.0, format = "wav"):
@@ -33,17 +33,14 @@ def convert_video_to_audio(video_file: str, workspace_path: str = ".", config_pa
         ], check=True, stderr=subprocess.PIPE)
         rprint(f"[green]🎬➡️🎵 Converted <{video_file}> to <{raw_audio_file}> with FFmpeg\n[/green]")
 
-def get_audio_duration(audio_file: str) -> float:
-    """Get the duration of an audio file using ffmpeg."""
-    cmd = ['ffmpeg', '-i', audio_file]
-    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    _, stderr = process.communicate()
-    output = stderr.decode('utf-8', errors='ignore')
-    
+def get_audio_duration(audio_file) -> float:
+    """
+    Get the duration of an audio file or in-memory buffer, 0 if it cannot be read
+
+    Probed in-process (WAV/FLAC headers, soundfile) with ffprobe as the fallback, see ai.utils.audio_probe.
+    """
     try:
-        duration_str = [line for line in output.split('\n') if 'Duration' in line][0]
-        duration_parts = duration_str.split('Duration: ')[1].split(',')[0].split(':')
-        duration = float(duration_parts[0])*3600 + float(duration_parts[1])*60 + float(duration_parts[2])
+        duration = probe_duration(audio_file)
     except Exception as e:
         print(f"[red]❌ Error: Failed to get audio duration: {e}[/red]")
         duration = 0
@@ -53,7 +50,8 @@ def split_audio(audio_file: str, target_len: float = 30*60, win: float = 60) ->
     ## Use pydub to detect silence and split the audio in the interval [target_len-win, target_len+win]
     rprint(f"[blue]🎙️ Starting audio segmentation {audio_file} {target_len} {win}[/blue]")
     audio = AudioSegment.from_file(audio_file)
-    duration = float(mediainfo(audio_file)["duration"])
+    # decoded already, the duration comes from the samples in memory
+    duration = len(audio) / 1000
     if duration <= target_len + win:
         return [(0, duration)]
     segments, pos = [], 0.0
@@ -123,9 +123,39 @@ Note: Start you answer with ```json and end with ```, do not add any other text.
 """.strip()
     return summary_prompt
 
+def get_theme_merge_prompt(themes, config_path: str = None):
+    src_lang = load_key("whisper.detected_language", config_path)
+    themes_text = '\n'.join(f'{i}. {theme}' for i, theme in enumerate(themes, 1))
+    return f"""
+## Role
+You are a video translation expert, specializing in {src_lang} comprehension.
+
+## Task
+The following summaries describe consecutive parts of the same video, in order.
+Merge them into one two-sentence summary of the whole video: first sentence for the main topic, second for the key point.
+
+## INPUT
+<summaries>
+{themes_text}
+</summaries>
+
+## Output in only JSON format and no other text
+{{
+  "theme": "Two-sentence video summary"
+}}
+
+Note: Start you answer with ```json and end with ```, do not add any other text.
+""".strip()
+
 ## ================================================================
 # @ step4_2_translate.py & translate_lines.py
-def generate_shared_prompt(previous_content_prompt, after_content_prompt, summary_prompt, things_to_note_prompt):
+# Prompts are laid out as [instructions][job summary][chunk context][lines]: everything before the
+# chunk context is identical for every chunk of a job, so providers can reuse the cached prefix.
+def generate_job_prompt(summary_prompt):
+    return f'''### Content Summary
+{summary_prompt}'''
+
+def generate_chunk_prompt(previous_content_prompt, after_content_prompt, things_to_note_prompt):
     return f'''### Context Information
 <previous_content>
 {previous_content_prompt}
@@ -135,13 +165,10 @@ def generate_shared_prompt(previous_content_prompt, after_content_prompt, summar
 {after_content_prompt}
 </subsequent_content>
 
-### Content Summary
-{summary_prompt}
-
 ### Points to Note
 {things_to_note_prompt}'''
 
-def get_prompt_faithfulness(lines, shared_prompt, config_path: str = None):
+def get_prompt_faithfulness(lines, job_prompt, chunk_prompt, config_path: str = None):
     target_language = load_key("target_language", config_path)
     # Split lines by \n
     line_splits = lines.split('\n')
@@ -164,14 +191,16 @@ We have a segment of original {src_language} subtitles that need to be directly
 2. Ensure the translation is faithful to the original, accurately conveying the original meaning
 3. Consider the context and professional terminology
 
-{shared_prompt}
-
 <translation_principles>
 1. Faithful to the original: Accurately convey the content and meaning of the original text, without arbitrarily changing, adding, or omitting content.
 2. Accurate terminology: Use professional terms correctly and maintain consistency in terminology.
 3. Understand the context: Fully comprehend and reflect the background and contextual relationships of the text.
 </translation_principles>
 
+{job_prompt}
+
+{chunk_prompt}
+
 ## INPUT
 <subtitles>
 {lines}
@@ -187,7 +216,7 @@ Note: Start you answer with ```json and end with ```, do not add any other text.
     return prompt_faithfulness.strip()
 
 
-def get_prompt_expressiveness(faithfulness_result, lines, shared_prompt, config_path: str = None):
+def get_prompt_expressiveness(faithfulness_result, lines, job_prompt, chunk_prompt, config_path: str = None):
     target_language = load_key("target_language", config_path)
     json_format = {
         key: {
@@ -216,8 +245,6 @@ Your task is to reflect on and improve these direct translations to create more
 4. Do not add comments or explanations in the translation, as the subtitles are for the audience to read
 5. Do not leave empty lines in the free translation, as the subtitles are for the audience to read
 
-{shared_prompt}
-
 <Translation Analysis Steps>
 Please use a two-step thinking process to handle the text line by line:
 
@@ -231,6 +258,10 @@ Please use a two-step thinking process to handle the text line by line:
    - Ensure it's easy for {target_language} audience to understand and accept
    - Adapt the language style to match the theme (e.g., use casual language for tutorials, professional terminology for technical content, formal language for documentaries)
 </Translation Analysis Steps>
+
+{job_prompt}
+
+{chunk_prompt}
    
 ## INPUT
 <subtitles>
@@ -246,6 +277,60 @@ Note: Start you answer with ```json and end with ```, do not add any other text.
 '''
     return prompt_expressiveness.strip()
 
+def get_prompt_combined(lines, job_prompt, chunk_prompt, config_path: str = None):
+    target_language = load_key("target_language", config_path)
+    line_splits = lines.split('\n')
+
+    json_dict = {}
+    for i, line in enumerate(line_splits, 1):
+        json_dict[f"{i}"] = {
+            "origin": line,
+            "direct": f"direct {target_language} translation {i}.",
+            "reflect": "your reflection on direct translation",
+            "free": "your free translation"
+        }
+    json_format = json.dumps(json_dict, indent=2, ensure_ascii=False)
+
+    src_language = load_key("whisper.detected_language", config_path)
+    prompt_combined = f'''
+## Role
+You are a professional Netflix subtitle translator and language consultant, fluent in both {src_language} and {target_language}, as well as their respective cultures.
+Your expertise lies in faithfully understanding the original {src_language} text and producing natural, fluent {target_language} subtitles.
+
+## Task
+We have a segment of original {src_language} subtitles that need to be translated into {target_language}. These subtitles come from a specific context and may contain specific themes and terminology.
+Handle the subtitles line by line in a single pass:
+
+1. Direct translation: translate each line faithfully, accurately conveying the original meaning
+2. Reflection: evaluate the direct translation for fluency, style consistency and conciseness
+3. Free translation: based on your reflection, write a natural {target_language} subtitle for the line
+4. Do not add comments or explanations in the translation, as the subtitles are for the audience to read
+5. Do not leave empty lines in the free translation, as the subtitles are for the audience to read
+
+<translation_principles>
+1. Faithful to the original: Accurately convey the content and meaning of the original text, without arbitrarily changing, adding, or omitting content.
+2. Accurate terminology: Use professional terms correctly and maintain consistency in terminology.
+3. Natural expression: The free translation should conform to {target_language} expression habits and match the theme's language style (e.g., casual for tutorials, professional for technical content, formal for documentaries).
+</translation_principles>
+
+{job_prompt}
+
+{chunk_prompt}
+
+## INPUT
+<subtitles>
+{lines}
+</subtitles>
+
+## Output in only JSON format and no other text
+```json
+{json_format}
+```
+
+Note: Start you answer with ```json and end with ```, do not add any other text.
+'''
+    return prompt_combined.strip()
+
 ## ================================================================
 # @ step5_splitforsub.py
 def get_align_prompt(src_sub, tr_sub, src_part, config_path: str = None):
@@ -333,6 +418,40 @@ Please follow these steps and provide the results in the JSON output:
 }}
 ```
 
+Note: Start you answer with ```json and end with ```, do not add any other text.
+'''.strip()
+    return trim_prompt
+
+def get_subtitle_trim_batch_prompt(items):
+    subtitles = '\n'.join(f'{i}. Subtitle: "{text}" | Duration: {duration} seconds' for i, (text, duration) in enumerate(items, 1))
+    json_format = {str(i): {"analysis": "Brief analysis of the subtitle", "result": "Optimized and shortened subtitle in the original subtitle language"} for i in range(1, len(items) + 1)}
+
+    trim_prompt = f'''
+## Role
+You are a professional subtitle editor, editing and optimizing lengthy subtitles that exceed voiceover time before handing them to voice actors. 
+Your expertise lies in cleverly shortening subtitles slightly while ensuring the original meaning and structure remain unchanged.
+
+## INPUT
+<subtitles>
+{subtitles}
+</subtitles>
+
+## Processing Rules
+Consider a. Reducing filler words without modifying meaningful content. b. Omitting unnecessary modifiers or pronouns, for example:
+    - "Please explain your thought process" can be shortened to "Please explain thought process"
+    - "We need to carefully analyze this complex problem" can be shortened to "We need to analyze this problem"
+Each subtitle is independent: shorten every numbered subtitle on its own, never move words between subtitles.
+
+## Processing Steps
+For each numbered subtitle, follow these steps and provide the results in the JSON output:
+1. Analysis: Briefly analyze the subtitle's structure, key information, and filler words that can be omitted.
+2. Trimming: Based on the rules and analysis, optimize the subtitle by making it more concise according to the processing rules.
+
+## Output in only JSON format and no other text
+```json
+{json.dumps(json_format, indent=4, ensure_ascii=False)}
+```
+
 Note: Start you answer with ```json and end with ```, do not add any other text.
 '''.strip()
     return trim_prompt
@@ -0,0 +1,160 @@
+from typing import Callable, List, Optional, Tuple
+
+# ------------
+# scoring split points in a spacy doc
+# ------------
+
+SENTENCE_END = set('.!?。！？…')
+CLAUSE_PUNCT = set(',;:，；：、—–')
+# clause-level dependencies whose left edge opens a new unit of meaning
+CLAUSE_DEPS = {'advcl', 'relcl', 'ccomp', 'conj', 'parataxis', 'acl', 'csubj'}
+# dependents that must stay next to a head on their right
+TIGHT_DEPS = {'det', 'amod', 'compound', 'poss', 'nummod', 'aux', 'auxpass', 'neg', 'case', 'nmod:poss', 'quantmod', 'predet'}
+BALANCE_WEIGHT = 0.5
+MIN_PART_TOKENS = 2
+
+def boundary_score(doc, b: int) -> Optional[float]:
+    """How natural it is to split before doc[b], in [-1, 1], or None if the split is not allowed"""
+    token, prev = doc[b], doc[b - 1]
+    if token.is_punct or token.text.startswith("'") or token.text.startswith("’"):
+        return None
+
+    score = 0.0
+    if prev.is_punct:
+        if prev.text[-1] in SENTENCE_END:
+            score = 1.0
+        elif prev.text[-1] in CLAUSE_PUNCT:
+            score = 0.9
+        else:
+            score = 0.2
+
+    clause_score = 0.0
+    if token.dep_ in ('mark', 'cc') or token.pos_ in ('SCONJ', 'CCONJ'):
+        clause_score = 0.6
+    head = token.head
+    if head.dep_ in CLAUSE_DEPS and head.left_edge.i == b and head.right_edge.i - b >= 2:
+        clause_score = max(clause_score, 0.7)
+    elif token.dep_ == 'prep' and token.right_edge.i - b >= 2:
+        clause_score = max(clause_score, 0.3)
+    score = max(score, clause_score) + (0.1 if score and clause_score else 0.0)
+
+    # never separate a determiner / auxiliary / modifier from the head that follows it
+    if prev.dep_ in TIGHT_DEPS and prev.head.i >= b:
+        score -= 0.8
+    if token.dep_ in ('prt', 'case') and token.head.i < b:
+        score -= 0.5
+    return max(-1.0, min(1.0, score))
+
+def split_doc(doc, num_parts: int = 2, length_fn: Callable[[str], float] = len) -> Tuple[List[str], float]:
+    """
+    Split a parsed sentence into `num_parts` using punctuation, dependency boundaries and length balance
+
+    Returns (parts, confidence). Parts are exact slices of the original text. Confidence is
+    in [0, 1]: near 1 for balanced splits at punctuation, around 0.5 for balanced clause
+    boundaries, low when the only candidates break phrases or leave parts unbalanced.
+
+    Args:
+        doc: spacy Doc of the sentence
+        num_parts: Number of parts to split into
+        length_fn: Length measure used for balancing (e.g. weighted subtitle length)
+    """
+    text = doc.text
+    n = len(doc)
+    if num_parts < 2 or n < num_parts * MIN_PART_TOKENS:
+        return [text], 0.0
+
+    scores = {b: boundary_score(doc, b) for b in range(MIN_PART_TOKENS, n - MIN_PART_TOKENS + 1)}
+    scores = {b: s for b, s in scores.items() if s is not None}
+    starts = [0] + [doc[b].idx for b in range(1, n)] + [len(text)]
+    ideal = length_fn(text) / num_parts or 1
+
+    def imbalance(a: int, b: int) -> float:
+        return abs(length_fn(text[starts[a]:starts[b]].strip()) / ideal - 1)
+
+    # best[k][b]: best objective for k parts covering doc[:b], with the last boundary at b
+    best = [{0: (0.0, None, 1.0, 0.0)}] + [{} for _ in range(num_parts - 1)]
+    for k in range(1, num_parts):
+        for b, score in scores.items():
+            for a, (objective, _, min_score, max_imbalance) in best[k - 1].items():
+                if b - a < MIN_PART_TOKENS:
+                    continue
+                part_imbalance = imbalance(a, b)
+                candidate = (objective + score - BALANCE_WEIGHT * part_imbalance, a, min(min_score, score), max(max_imbalance, part_imbalance))
+                if b not in best[k] or candidate[0] > best[k][b][0]:
+                    best[k][b] = candidate
+
+    final = None
+    for b, (objective, _, min_score, max_imbalance) in best[num_parts - 1].items():
+        if n - b < MIN_PART_TOKENS:
+            continue
+        last_imbalance = imbalance(b, n)
+        total = objective - BALANCE_WEIGHT * last_imbalance
+        if final is None or total > final[0]:
+            final = (total, b, min_score, max(max_imbalance, last_imbalance))
+    if final is None:
+        return [text], 0.0
+
+    _, b, min_score, max_imbalance = final
+    boundaries = [b]
+    for k in range(num_parts - 1, 1, -1):
+        b = best[k][b][1]
+        boundaries.append(b)
+    boundaries = [0] + boundaries[::-1] + [n]
+    parts = [text[starts[a]:starts[b]].strip() for a, b in zip(boundaries, boundaries[1:])]
+    confidence = max(0.0, min(1.0, min_score - BALANCE_WEIGHT * max_imbalance))
+    return parts, confidence
+
+# ------------
+# proportional split of the aligned translation
+# ------------
+
+TARGET_PUNCT = SENTENCE_END | CLAUSE_PUNCT
+
+def split_by_ratio(text: str, ratios: List[float], joiner: str = " ") -> Tuple[List[str], float]:
+    """
+    Split a translation at the positions proportional to the source parts
+
+    Each cut snaps to the nearest punctuation, then whitespace (or any character for
+    languages written without spaces) within a window around the proportional point.
+    Confidence is high only when every cut lands on punctuation close to that point,
+    since word order often differs between languages.
+
+    Args:
+        text: Translated line
+        ratios: Relative length of each source part
+        joiner: Word joiner of the target language
+    """
+    text = str(text).strip()
+    total_ratio = sum(ratios)
+    if len(ratios) < 2 or not text or not total_ratio:
+        return [text], 0.0
+    length = len(text)
+    window = max(3, int(length * 0.25))
+
+    cuts, confidences, cumulative, prev_cut = [], [], 0.0, 0
+    for ratio in ratios[:-1]:
+        cumulative += ratio
+        target = round(length * cumulative / total_ratio)
+        best = None
+        for j in range(max(prev_cut + 1, target - window), min(length - 1, target + window) + 1):
+            if text[j - 1] in TARGET_PUNCT and text[j] not in TARGET_PUNCT:
+                kind = 1.0
+            elif text[j].isspace() and not text[j - 1].isspace():
+                kind = 0.5
+            elif not joiner:
+                kind = 0.2
+            else:
+                continue
+            candidate = kind - abs(j - target) / length
+            if best is None or candidate > best[0]:
+                best = (candidate, j)
+        if best is None:
+            return [text], 0.0
+        confidences.append(best[0])
+        cuts.append(best[1])
+        prev_cut = best[1]
+
+    parts = [text[a:b].strip() for a, b in zip([0] + cuts, cuts + [length])]
+    if any(not part for part in parts):
+        return [text], 0.0
+    return parts, max(0.0, min(1.0, min(confidences)))
@@ -1,4 +1,4 @@
-from ai.prompts import generate_shared_prompt, get_prompt_faithfulness, get_prompt_expressiveness
+from ai.prompts import generate_job_prompt, generate_chunk_prompt, get_prompt_faithfulness, get_prompt_expressiveness, get_prompt_combined
 from rich.panel import Panel
 from rich.console import Console
 from rich.table import Table
@@ -32,34 +32,37 @@ def translate_lines(lines, previous_content_prompt, after_cotent_prompt, things_
         workspace_path: Path to workspace directory
         config_path: Path to config file (optional)
     """
-    shared_prompt = generate_shared_prompt(previous_content_prompt, after_cotent_prompt, summary_prompt, things_to_note_prompt)
+    # job-constant prompt first, per-chunk context last, so consecutive chunks share a cacheable prefix
+    job_prompt = generate_job_prompt(summary_prompt)
+    chunk_prompt = generate_chunk_prompt(previous_content_prompt, after_cotent_prompt, things_to_note_prompt)
 
     # Retry translation if the length of the original text and the translated text are not the same, or if the specified key is missing
-    def retry_translation(prompt, length, step_name):
-        def valid_faith(response_data):
-            return valid_translate_result(response_data, [str(i) for i in range(1, length+1)], ['direct'])
-        def valid_express(response_data):
-            return valid_translate_result(response_data, [str(i) for i in range(1, length+1)], ['free'])
+    def retry_translation(prompt, length, step_name, required_sub_keys):
+        def valid_result(response_data):
+            return valid_translate_result(response_data, [str(i) for i in range(1, length+1)], required_sub_keys)
         for retry in range(3):
-            if step_name == 'faithfulness':
-                result = ask_gpt(prompt+retry* " ", resp_type='json', valid_def=valid_faith, workspace_path=workspace_path, config_path=config_path, log_title=f'translate_{step_name}')
-            elif step_name == 'expressiveness':
-                result = ask_gpt(prompt+retry* " ", resp_type='json', valid_def=valid_express, workspace_path=workspace_path, config_path=config_path, log_title=f'translate_{step_name}')
+            result = ask_gpt(prompt+retry* " ", resp_type='json', valid_def=valid_result, workspace_path=workspace_path, config_path=config_path, log_title=f'translate_{step_name}')
             if len(lines.split('\n')) == len(result):
                 return result
             if retry != 2:
                 console.print(f'[yellow]⚠️ {step_name.capitalize()} translation of block {index} failed, Retry...[/yellow]')
-        raise ValueError(f'[red]❌ {step_name.capitalize()} translation of block {index} failed after 3 retries. Please check `output/gpt_log/error.json` for more details.[/red]')
+        raise ValueError(f'[red]❌ {step_name.capitalize()} translation of block {index} failed after 3 retries. Please check `output/gpt_log/error.jsonl` for more details.[/red]')
 
-    ## Step 1: Faithful to the Original Text
-    prompt1 = get_prompt_faithfulness(lines, shared_prompt, config_path)
-    faith_result = retry_translation(prompt1, len(lines.split('\n')), 'faithfulness')
+    reflect_translate = load_key('reflect_translate', config_path)
+    single_pass = reflect_translate and load_key('translate_mode', config_path) == 'single_pass'
+
+    ## Step 1: Faithful to the Original Text (single_pass also returns the free translation)
+    if single_pass:
+        prompt1 = get_prompt_combined(lines, job_prompt, chunk_prompt, config_path)
+        faith_result = retry_translation(prompt1, len(lines.split('\n')), 'combined', ['direct', 'free'])
+    else:
+        prompt1 = get_prompt_faithfulness(lines, job_prompt, chunk_prompt, config_path)
+        faith_result = retry_translation(prompt1, len(lines.split('\n')), 'faithfulness', ['direct'])
 
     for i in faith_result:
         faith_result[i]["direct"] = faith_result[i]["direct"].replace('\n', ' ')
 
     # If reflect_translate is False or not set, use faithful translation directly
-    reflect_translate = load_key('reflect_translate', config_path)
     if not reflect_translate:
         # If reflect_translate is False or not set, use faithful translation directly
         translate_result = "\n".join([faith_result[i]["direct"].strip() for i in faith_result])
@@ -76,8 +79,11 @@ def translate_lines(lines, previous_content_prompt, after_cotent_prompt, things_
         return translate_result, lines
 
     ## Step 2: Express Smoothly  
-    prompt2 = get_prompt_expressiveness(faith_result, lines, shared_prompt, config_path)
-    express_result = retry_translation(prompt2, len(lines.split('\n')), 'expressiveness')
+    if single_pass:
+        express_result = faith_result
+    else:
+        prompt2 = get_prompt_expressiveness(faith_result, lines, job_prompt, chunk_prompt, config_path)
+        express_result = retry_translation(prompt2, len(lines.split('\n')), 'expressiveness', ['free'])
 
     table = Table(title="Translation Results", show_header=False, box=box.ROUNDED)
     table.add_column("Translations", style="bold")
@@ -93,7 +99,7 @@ def translate_lines(lines, previous_content_prompt, after_cotent_prompt, things_
     translate_result = "\n".join([express_result[i]["free"].replace('\n', ' ').strip() for i in express_result])
 
     if len(lines.split('\n')) != len(translate_result.split('\n')):
-        console.print(Panel(f'[red]❌ Translation of block {index} failed, Length Mismatch, Please check `output/gpt_log/translate_expressiveness.json`[/red]'))
+        console.print(Panel(f'[red]❌ Translation of block {index} failed, Length Mismatch, Please check `translate_expressiveness` entries in `output/gpt_log/cache.db`[/red]'))
         raise ValueError(f'Origin ···{lines}···,\nbut got ···{translate_result}···')
 
     return translate_result, lines
@@ -1,49 +1,50 @@
-import http.client
-import json
 import os
-import requests
+import threading
 from pydub import AudioSegment
 from ai.asr_backend.audio_preprocess import normalize_audio_volume
+from ai.tts_backend.tts_client import get_tts_client
+from ai.utils.llm_client import SingleFlight
 from ai.utils import *
 from ai.utils.path_constants import *
 
-UPLOADED_REFER_URL = None
+# uploaded reference audio url per workspace, lines of the same job wait for one upload, other jobs don't
+_REFER_URLS = {}
+_REFER_URLS_LOCK = threading.Lock()
+_REFER_UPLOADS = SingleFlight()
 
 def upload_file_to_302(file_path, config_path: str = None, workspace_path: str = "."):
     API_KEY = load_key("f5tts.302_api", config_path, workspace_path)
+    client = get_tts_client("302", API_KEY, workspace_path, config_path)
     url = "https://api.302.ai/302/upload-file"
     
-    files = [('file', (os.path.basename(file_path), open(file_path, 'rb'), 'application/octet-stream'))]
+    # read once so a retried upload sends the whole file again
+    with open(file_path, 'rb') as f:
+        files = [('file', (os.path.basename(file_path), f.read(), 'application/octet-stream'))]
     headers = {'Authorization': f'Bearer {API_KEY}'}
     
-    response = requests.request("POST", url, headers=headers, data={}, files=files)
-    
-    if response.status_code == 200:
-        response_data = response.json()
-        if response_data.get('code') == 200:
-            return response_data.get('data')
+    try:
+        response_data = client.post(url, headers=headers, files=files).json()
+    except Exception as e:
+        rprint(f"[red]Failed to upload reference audio: {e}")
         return None
+    if response_data.get('code') == 200:
+        return response_data.get('data')
     return None
 
 def _f5_tts(text: str, refer_url: str, save_path: str, config_path: str = None, workspace_path: str = ".") -> bool:
     API_KEY = load_key("f5tts.302_api", config_path, workspace_path)
-    conn = http.client.HTTPSConnection("api.302.ai")
-    payload = json.dumps({"gen_text": text, "ref_audio_url": refer_url, "model_type": "F5-TTS"})
+    client = get_tts_client("302", API_KEY, workspace_path, config_path)
+    payload = {"gen_text": text, "ref_audio_url": refer_url, "model_type": "F5-TTS"}
     headers = {'Authorization': f'Bearer {API_KEY}', 'Content-Type': 'application/json'}
 
-    conn.request("POST", "/302/submit/f5-tts", payload, headers)
-    res = conn.getresponse()
-    data = json.loads(res.read().decode("utf-8"))
+    data = client.post("https://api.302.ai/302/submit/f5-tts", headers=headers, json=payload).json()
     
     if "audio_url" in data and "url" in data["audio_url"]:
         # Download audio file
-        audio_url = data["audio_url"]["url"]
-        audio_conn = http.client.HTTPSConnection("file.302.ai")
-        audio_conn.request("GET", audio_url.replace("https://file.302.ai", ""))
-        audio_res = audio_conn.getresponse()
+        audio_res = client.get(data["audio_url"]["url"], rate_limited=False)
         
         with open(save_path, "wb") as f: 
-            f.write(audio_res.read())
+            f.write(audio_res.content)
         print(f"Audio file saved to {save_path}")
         return True
     
@@ -117,18 +118,40 @@ def _get_ref_audio(task_df, workspace_path: str = ".", min_duration=8, max_durat
     
     return combined_audio
 
+def _upload_refer_audio(refer_id: str, task_df, workspace_path: str = ".", config_path: str = None) -> str:
+    refer_path = _get_ref_audio(task_df, workspace_path)
+    if not refer_path:
+        raise Exception("No reference audio could be built for F5-TTS")
+    normalized_refer_path = normalize_audio_volume(refer_path, f"{get_audio_refers_dir(workspace_path)}/refer_normalized.wav")
+    refer_url = upload_file_to_302(normalized_refer_path, config_path, workspace_path)
+    if not refer_url:
+        # not cached, the next line tries the upload again
+        raise Exception("Failed to upload reference audio for F5-TTS")
+    with _REFER_URLS_LOCK:
+        _REFER_URLS[refer_id] = refer_url
+    rprint(f"[green]✅ Reference audio uploaded, URL cached for reuse")
+    return refer_url
+
+def get_refer_url(task_df, workspace_path: str = ".", config_path: str = None) -> str:
+    """Reference audio url of the workspace, merged and uploaded on first use"""
+    refer_id = os.path.abspath(workspace_path)
+    with _REFER_URLS_LOCK:
+        refer_url = _REFER_URLS.get(refer_id)
+    if refer_url:
+        return refer_url
+    refer_url, _ = _REFER_UPLOADS.do(refer_id, lambda: _upload_refer_audio(refer_id, task_df, workspace_path, config_path))
+    return refer_url
+
+def release_refer_url(workspace_path: str) -> None:
+    """Forget the workspace's reference audio url once the job is finished"""
+    with _REFER_URLS_LOCK:
+        _REFER_URLS.pop(os.path.abspath(workspace_path), None)
+
 def f5_tts_for_onevoice(text: str, save_as: str, number: int, task_df, workspace_path: str = ".", config_path: str = None):
-    global UPLOADED_REFER_URL
-    
-    # Only process the reference audio if we haven't uploaded it yet
-    if UPLOADED_REFER_URL is None:
-        refer_path = _get_ref_audio(task_df, workspace_path)
-        normalized_refer_path = normalize_audio_volume(refer_path, f"{get_audio_refers_dir(workspace_path)}/refer_normalized.wav")
-        UPLOADED_REFER_URL = upload_file_to_302(normalized_refer_path, config_path, workspace_path)
-        rprint(f"[green]✅ Reference audio uploaded, URL cached for reuse")
+    refer_url = get_refer_url(task_df, workspace_path, config_path)
     
     try:
-        success = _f5_tts(text=text, refer_url=UPLOADED_REFER_URL, save_path=save_as, config_path=config_path, workspace_path=workspace_path)
+        success = _f5_tts(text=text, refer_url=refer_url, save_path=save_as, config_path=config_path, workspace_path=workspace_path)
         return success
     except Exception as e:
         print(f"Error in f5_tts_for_onevoice: {str(e)}")
@@ -7,7 +7,7 @@ def custom_tts(text, save_as, workspace_path: str = ".", config_path: str = None
     
     Args:
         text: Text to be converted to speech
-        save_as: Output filename
+        save_as: Output file path
         workspace_path: Path to workspace directory
         config_path: Path to config file
         
@@ -19,7 +19,7 @@ def custom_tts(text, save_as, workspace_path: str = ".", config_path: str = None
     """
     try:
         # Ensure save directory exists
-        audio_path = f"{workspace_path}/output/audio/segs/{save_as}"
+        audio_path = save_as
         speech_file_path = Path(audio_path)
         speech_file_path.parent.mkdir(parents=True, exist_ok=True)
         
@@ -1,22 +1,71 @@
+import re
+import threading
+from functools import lru_cache
+from typing import Iterable, List, Optional
 import syllables
 from pypinyin import pinyin, Style
-from g2p_en import G2p
-from typing import Optional
-import re
+
+# ------------
+# precompiled patterns and shared caches
+# ------------
+
+LANG_PATTERNS = {
+    'zh': re.compile(r'[\u4e00-\u9fff]'), 'ja': re.compile(r'[\u3040-\u309f\u30a0-\u30ff]'),
+    'fr': re.compile(r'[àâçéèêëîïôùûüÿœæ]'), 'es': re.compile(r'[áéíóúñ¿¡]'), 'en': re.compile(r'[a-zA-Z]+'),
+    'ko': re.compile(r'[\uac00-\ud7af\u1100-\u11ff]')}
+SPACE_PATTERN = re.compile(r'\s+')
+PUNCT_PATTERN = re.compile(r'[，；：,;、]+|[。！？.!?]+')
+SEGMENT_PATTERN = re.compile(r'(\s+|[，；：,;、]+|[。！？.!?]+)')
+NON_ZH_PATTERN = re.compile(r'[^\u4e00-\u9fff]')
+JA_YOON_PATTERN = re.compile(r'[きぎしじちぢにひびぴみり][ょゅゃ]')
+JA_SKIP_PATTERN = re.compile(r'[っー]')
+JA_MORA_PATTERN = re.compile(r'[\u3040-\u309f\u30a0-\u30ff\u4e00-\u9fff]')
+KO_SYLLABLE_PATTERN = re.compile(r'[\uac00-\ud7af]')
+FR_SILENT_E_PATTERN = re.compile(r'e\b')
+VOWEL_PATTERNS = {'fr': re.compile('[aeiouyàâéèêëîïôùûüÿœæ]+'), 'es': re.compile('[aeiouáéíóúü]+')}
+WORD_CACHE_SIZE = 65536
+
+_G2P = None
+_G2P_LOCK = threading.Lock()
+
+def get_g2p():
+    """English G2p model, loaded on first use since it is only the fallback of `syllables.estimate`"""
+    global _G2P
+    if _G2P is None:
+        with _G2P_LOCK:
+            if _G2P is None:
+                from g2p_en import G2p
+                _G2P = G2p()
+    return _G2P
+
+@lru_cache(maxsize=WORD_CACHE_SIZE)
+def english_word_syllables(word: str) -> int:
+    try:
+        return syllables.estimate(word)
+    except Exception:
+        phones = get_g2p()(word)
+        return max(1, len([p for p in phones if any(c in p for c in 'aeiou')]))
+
+# ------------
+# estimator
+# ------------
 
 class AdvancedSyllableEstimator:
-    def __init__(self):
-        self.g2p_en = G2p()
+    def __init__(self, rate_factor: float = 1.0):
+        # calibrated real / estimated duration ratio of the job's TTS voice
+        self.rate_factor = rate_factor
         self.duration_params = {'en': 0.225, 'zh': 0.21, 'ja': 0.21, 'fr': 0.22, 'es': 0.22, 'ko': 0.21, 'default': 0.22}
-        self.lang_patterns = {
-            'zh': r'[\u4e00-\u9fff]', 'ja': r'[\u3040-\u309f\u30a0-\u30ff]',
-            'fr': r'[àâçéèêëîïôùûüÿœæ]', 'es': r'[áéíóúñ¿¡]', 'en': r'[a-zA-Z]+', 'ko': r'[\uac00-\ud7af\u1100-\u11ff]'}
+        self.lang_patterns = LANG_PATTERNS
         self.lang_joiners = {'zh': '', 'ja': '', 'en': ' ', 'fr': ' ', 'es': ' ', 'ko': ' '}
         self.punctuation = {
             'mid': r'[，；：,;、]+', 'end': r'[。！？.!?]+', 'space': r'\s+',
             'pause': {'space': 0.15, 'default': 0.1}
         }
 
+    @property
+    def g2p_en(self):
+        return get_g2p()
+
     def estimate_duration(self, text: str, lang: Optional[str] = None) -> float:
         syllable_count = self.count_syllables(text, lang)
         return syllable_count * self.duration_params.get(lang or 'default')
@@ -25,40 +74,28 @@ class AdvancedSyllableEstimator:
         if not text.strip(): return 0
         lang = lang or self._detect_language(text)
         
-        vowels_map = {
-            'fr': 'aeiouyàâéèêëîïôùûüÿœæ',
-            'es': 'aeiouáéíóúü'
-        }
-        
         if lang == 'en':
             return self._count_english_syllables(text)
         elif lang == 'zh':
-            text = re.sub(r'[^\u4e00-\u9fff]', '', text)
+            text = NON_ZH_PATTERN.sub('', text)
             return len(pinyin(text, style=Style.NORMAL))
         elif lang == 'ja':
-            text = re.sub(r'[きぎしじちぢにひびぴみり][ょゅゃ]', 'X', text)
-            text = re.sub(r'[っー]', '', text)
-            return len(re.findall(r'[\u3040-\u309f\u30a0-\u30ff\u4e00-\u9fff]', text))
+            text = JA_YOON_PATTERN.sub('X', text)
+            text = JA_SKIP_PATTERN.sub('', text)
+            return len(JA_MORA_PATTERN.findall(text))
         elif lang in ('fr', 'es'):
-            text = re.sub(r'e\b', '', text.lower()) if lang == 'fr' else text.lower()
-            return max(1, len(re.findall(f'[{vowels_map[lang]}]+', text)))
+            text = FR_SILENT_E_PATTERN.sub('', text.lower()) if lang == 'fr' else text.lower()
+            return max(1, len(VOWEL_PATTERNS[lang].findall(text)))
         elif lang == 'ko':
-            return len(re.findall(r'[\uac00-\ud7af]', text))
+            return len(KO_SYLLABLE_PATTERN.findall(text))
         return len(text.split())
 
     def _count_english_syllables(self, text: str) -> int:
-        total = 0
-        for word in text.strip().split():
-            try:
-                total += syllables.estimate(word)
-            except:
-                phones = self.g2p_en(word)
-                total += max(1, len([p for p in phones if any(c in p for c in 'aeiou')]))
-        return max(1, total)
+        return max(1, sum(english_word_syllables(word) for word in text.strip().split()))
 
     def _detect_language(self, text: str) -> str:
         for lang, pattern in self.lang_patterns.items():
-            if re.search(pattern, text): return lang
+            if pattern.search(text): return lang
         return 'en'
 
     def process_mixed_text(self, text: str) -> dict:
@@ -72,19 +109,19 @@ class AdvancedSyllableEstimator:
             }
             
         result = {'language_breakdown': {}, 'total_syllables': 0, 'punctuation': [], 'spaces': []}
-        segments = re.split(f"({self.punctuation['space']}|{self.punctuation['mid']}|{self.punctuation['end']})", text)
+        segments = SEGMENT_PATTERN.split(text)
         total_duration = 0
         
         for i, segment in enumerate(segments):
             if not segment: continue
             
-            if re.match(self.punctuation['space'], segment):
+            if SPACE_PATTERN.match(segment):
                 prev_lang = self._detect_language(segments[i-1]) if i > 0 else None
                 next_lang = self._detect_language(segments[i+1]) if i < len(segments)-1 else None
                 if prev_lang and next_lang and (self.lang_joiners[prev_lang] == '' or self.lang_joiners[next_lang] == ''):
                     result['spaces'].append(segment)
                     total_duration += self.punctuation['pause']['space']
-            elif re.match(f"{self.punctuation['mid']}|{self.punctuation['end']}", segment):
+            elif PUNCT_PATTERN.match(segment):
                 result['punctuation'].append(segment)
                 total_duration += self.punctuation['pause']['default']
             else:
@@ -99,18 +136,35 @@ class AdvancedSyllableEstimator:
                     result['total_syllables'] += syllables
                     total_duration += syllables * self.duration_params.get(lang, self.duration_params['default'])
         
-        result['estimated_duration'] = total_duration
+        result['estimated_duration'] = total_duration * self.rate_factor
         
         return result
+
+    def estimate_durations(self, texts: Iterable[str]) -> List[float]:
+        """Estimated duration of each text, repeated texts are estimated once"""
+        durations = {}
+        results = []
+        for text in texts:
+            if not text or not isinstance(text, str):
+                results.append(0)
+                continue
+            if text not in durations:
+                durations[text] = self.process_mixed_text(text)['estimated_duration']
+            results.append(durations[text])
+        return results
     
-def init_estimator():
-    return AdvancedSyllableEstimator()
+def init_estimator(rate_factor: float = 1.0):
+    return AdvancedSyllableEstimator(rate_factor)
 
 def estimate_duration(text: str, estimator: AdvancedSyllableEstimator):
     if not text or not isinstance(text, str):
         return 0
     return estimator.process_mixed_text(text)['estimated_duration']
 
+def estimate_durations(texts: Iterable[str], estimator: AdvancedSyllableEstimator) -> List[float]:
+    """Batch variant of `estimate_duration`, e.g. for a DataFrame column"""
+    return estimator.estimate_durations(texts)
+
 # 使用示例
 if __name__ == "__main__":
     estimator = init_estimator()
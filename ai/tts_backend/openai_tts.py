@@ -1,49 +1,43 @@
-import requests
-import json
-import os
+from ai.tts_backend.tts_client import get_tts_client
 from ai.utils import load_key
 
+OPENAI_TTS_URL = "https://api.openai.com/v1/audio/speech"
+
 def openai_tts(text, save_as, workspace_path: str = ".", config_path: str = None):
     """
     Generate TTS audio using OpenAI TTS API
-    
+
     Args:
         text: Text to synthesize
-        save_as: Output filename
+        save_as: Output file path
         workspace_path: Path to workspace directory
         config_path: Path to config file
     """
     try:
         API_KEY = load_key("openai_tts.api_key", config_path, workspace_path)
         voice = load_key("openai_tts.voice", config_path, workspace_path)
-        
-        url = "https://api.openai.com/v1/audio/speech"
-        
+        model = load_key("openai_tts.model", config_path, workspace_path)
+        client = get_tts_client("openai", API_KEY, workspace_path, config_path)
+
         headers = {
             "Authorization": f"Bearer {API_KEY}",
             "Content-Type": "application/json"
         }
-        
+
         data = {
-            "model": "tts-1",
+            "model": model,
             "input": text,
             "voice": voice,
-            "response_format": "mp3",
+            # segments are handled as wav downstream (pydub from_wav, ffmpeg atempo)
+            "response_format": "wav",
             "speed": 1.0
         }
-        
-        response = requests.post(url, headers=headers, json=data)
-        
-        if response.status_code == 200:
-            # Save audio file
-            audio_path = f"{workspace_path}/output/audio/segs/{save_as}"
-            with open(audio_path, 'wb') as f:
-                f.write(response.content)
-            return True
-        else:
-            print(f"OpenAI TTS API error: {response.status_code} - {response.text}")
-            return False
-            
+
+        response = client.post(OPENAI_TTS_URL, headers=headers, json=data)
+        with open(save_as, 'wb') as f:
+            f.write(response.content)
+        return True
+
     except Exception as e:
         print(f"OpenAI TTS error: {str(e)}")
         return False
@@ -51,4 +45,4 @@ def openai_tts(text, save_as, workspace_path: str = ".", config_path: str = None
 if __name__ == "__main__":
     # Test function
     result = openai_tts("Hello world", "test.wav")
-    print(f"OpenAI TTS test result: {result}")
\ No newline at end of file
+    print(f"OpenAI TTS test result: {result}")
@@ -0,0 +1,136 @@
+import os
+import time
+import sqlite3
+import threading
+from typing import Optional, Tuple
+from ai.utils.config_utils import load_key
+
+# ------------
+# per-voice speaking rate calibration
+# ------------
+
+# config key holding the voice of each tts method
+VOICE_KEYS = {
+    'openai_tts': 'openai_tts.voice',
+    'sf_fish_tts': 'sf_fish_tts.voice',
+    'azure_tts': 'azure_tts.voice',
+    'fish_tts': 'fish_tts.character',
+    'edge_tts': 'edge_tts.voice',
+}
+# a single job may not move the rate further than this
+MIN_OBSERVED_RATIO, MAX_OBSERVED_RATIO = 0.5, 2.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS speaking_rate (
+    tts_method TEXT NOT NULL,
+    voice TEXT NOT NULL,
+    lang TEXT NOT NULL,
+    ratio REAL NOT NULL,
+    jobs INTEGER NOT NULL,
+    lines INTEGER NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (tts_method, voice, lang)
+)
+"""
+
+class RateCalibration:
+    """
+    Ratio of real TTS duration to the syllable estimate, per (tts method, voice, language).
+
+    Each finished job contributes its observed ratio through an exponential moving average,
+    so the estimate follows voice or model changes without being thrown off by one job.
+    """
+
+    def __init__(self, db_path: str, alpha: float = 0.3):
+        self.db_path = db_path
+        self.alpha = alpha
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, voice_key: Tuple[str, str, str]) -> Optional[float]:
+        row = self._connect().execute(
+            "SELECT ratio FROM speaking_rate WHERE tts_method = ? AND voice = ? AND lang = ?", voice_key
+        ).fetchone()
+        return row[0] if row else None
+
+    def update(self, voice_key: Tuple[str, str, str], observed_ratio: float, lines: int) -> float:
+        """Blend a job's observed ratio into the stored one, return the new ratio"""
+        observed_ratio = min(MAX_OBSERVED_RATIO, max(MIN_OBSERVED_RATIO, observed_ratio))
+        # blend inside the upsert so concurrent jobs on other workers don't overwrite each other
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO speaking_rate (tts_method, voice, lang, ratio, jobs, lines, updated_at) VALUES (?, ?, ?, ?, 1, ?, ?) "
+                "ON CONFLICT (tts_method, voice, lang) DO UPDATE SET ratio = (1 - ?) * ratio + ? * excluded.ratio, "
+                "jobs = jobs + 1, lines = lines + excluded.lines, updated_at = excluded.updated_at",
+                (*voice_key, observed_ratio, lines, time.time(), self.alpha, self.alpha),
+            )
+            ratio = self.get(voice_key)
+        return ratio
+
+_CALIBRATIONS = {}
+_CALIBRATIONS_LOCK = threading.Lock()
+
+def get_rate_calibration(workspace_path: str = ".", config_path: str = None) -> Optional[RateCalibration]:
+    """
+    Get the shared speaking rate calibration, or None when disabled
+
+    Args:
+        workspace_path: Path to workspace directory
+        config_path: Path to config file (optional)
+    """
+    calibration_set = load_key("tts_rate_calibration", config_path, workspace_path)
+    if not calibration_set["enabled"]:
+        return None
+    calibration_id = (os.path.abspath(calibration_set["path"]), calibration_set["alpha"])
+    with _CALIBRATIONS_LOCK:
+        if calibration_id not in _CALIBRATIONS:
+            _CALIBRATIONS[calibration_id] = RateCalibration(calibration_set["path"], calibration_set["alpha"])
+        return _CALIBRATIONS[calibration_id]
+
+def get_voice_key(workspace_path: str = ".", config_path: str = None) -> Tuple[str, str, str]:
+    """(tts method, voice, target language) of the job"""
+    tts_method = load_key("tts_method", config_path, workspace_path)
+    voice_key = VOICE_KEYS.get(tts_method)
+    # cloning methods (f5tts, gpt_sovits, custom) follow the reference speaker, calibrated per method
+    voice = str(load_key(voice_key, config_path, workspace_path)) if voice_key else ''
+    return tts_method, voice, load_key("target_language", config_path, workspace_path)
+
+def get_rate_factor(workspace_path: str = ".", config_path: str = None) -> float:
+    """Multiplier for estimated durations of the job's voice, 1.0 when not calibrated yet"""
+    calibration = get_rate_calibration(workspace_path, config_path)
+    if calibration is None:
+        return 1.0
+    return calibration.get(get_voice_key(workspace_path, config_path)) or 1.0
+
+def record_speaking_rate(tasks_df, workspace_path: str = ".", config_path: str = None) -> Optional[float]:
+    """
+    Learn the voice's rate from a job's generated audio (real_dur against est_dur)
+
+    est_dur was computed with the calibrated factor stored in `rate_factor`, which is divided
+    out so the stored ratio always refers to the raw syllable estimate.
+
+    Args:
+        tasks_df: Audio tasks with est_dur, real_dur and rate_factor columns
+        workspace_path: Path to workspace directory
+        config_path: Path to config file (optional)
+    """
+    calibration = get_rate_calibration(workspace_path, config_path)
+    if calibration is None or 'est_dur' not in tasks_df or 'real_dur' not in tasks_df:
+        return None
+    factor = tasks_df['rate_factor'] if 'rate_factor' in tasks_df else 1.0
+    raw_est = tasks_df['est_dur'] / factor
+    valid = (raw_est > 0) & (tasks_df['real_dur'] > 0)
+    if valid.sum() < load_key("tts_rate_calibration.min_lines", config_path, workspace_path):
+        return None
+    observed_ratio = float(tasks_df.loc[valid, 'real_dur'].sum() / raw_est[valid].sum())
+    return calibration.update(get_voice_key(workspace_path, config_path), observed_ratio, int(valid.sum()))
@@ -0,0 +1,229 @@
+import os
+import time
+import uuid
+import shutil
+import sqlite3
+import hashlib
+import threading
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from rich import print as rprint
+from ai.utils.config_utils import load_key
+from ai.tts_backend.rate_calibration import get_voice_key
+
+# use try-except to run with the local tier only when boto3 is not installed
+try:
+    import boto3
+except ImportError:
+    boto3 = None
+
+# use try-except to skip metrics when prometheus_client is not installed
+try:
+    from prometheus_client import Counter
+except ImportError:
+    Counter = None
+
+if Counter is not None:
+    TTS_CACHE_LOOKUPS = Counter("onevoice_tts_cache_lookups_total", "TTS cache lookups by tts method and result (local, s3, miss)", ["tts_method", "result"])
+    TTS_CACHE_EVICTIONS = Counter("onevoice_tts_cache_evictions_total", "Audio files evicted from the local TTS cache")
+
+# ------------
+# cache key
+# ------------
+
+def normalize_tts_text(text: str) -> str:
+    """Text as the voice reads it: NFKC, single spaces, no surrounding whitespace"""
+    return ' '.join(unicodedata.normalize('NFKC', str(text)).split())
+
+def make_tts_key(text: str, tts_method: str, voice: str, model: str = "", speed: float = 1.0) -> str:
+    """Hash of (normalized text, tts method, voice, model, speed) addressing the synthesized audio"""
+    raw = '\x1f'.join([normalize_tts_text(text), tts_method, str(voice), str(model), f"{float(speed):.3f}"])
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+# backends synthesize at normal speed, tempo is adjusted afterwards in _10
+SYNTHESIS_SPEED = 1.0
+
+def get_tts_cache_key(text: str, workspace_path: str = ".", config_path: str = None) -> Optional[str]:
+    """Cache key of a line for the job's voice, None for cloned voices that depend on the job's reference audio"""
+    tts_method, voice, _ = get_voice_key(workspace_path, config_path)
+    if not voice:
+        return None
+    try:
+        model = load_key(f"{tts_method}.model", config_path, workspace_path)
+    except KeyError:
+        model = ""
+    return make_tts_key(text, tts_method, voice, model, SYNTHESIS_SPEED)
+
+# ------------
+# content-addressed audio cache (local files + sqlite LRU index, optional s3 tier)
+# ------------
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS audio (
+    key TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    tts_method TEXT,
+    created_at REAL NOT NULL,
+    last_access REAL NOT NULL
+)
+"""
+
+class TTSCache:
+    """
+    Synthesized audio shared by every job, addressed by `make_tts_key`.
+
+    The local tier keeps files under `root` with an SQLite index of sizes and access
+    times; once the tier grows past `max_bytes` the least recently used files are evicted.
+    With a bucket configured, new audio is also uploaded to S3 in the background and
+    local misses are looked up there, so workers share one another's audio. The S3 tier
+    is not trimmed here, use a bucket lifecycle rule on the prefix.
+    """
+
+    def __init__(self, root: str, max_bytes: int, s3_bucket: str = None, s3_prefix: str = "tts-cache/"):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.s3_prefix = s3_prefix
+        self.s3 = boto3.client('s3') if s3_bucket and boto3 is not None else None
+        self.s3_bucket = s3_bucket if self.s3 is not None else None
+        self._uploader = ThreadPoolExecutor(max_workers=2) if self.s3 is not None else None
+        self._local = threading.local()
+        self._evict_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.stats = {"local_hits": 0, "s3_hits": 0, "misses": 0, "puts": 0, "evictions": 0}
+        os.makedirs(root, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(_SCHEMA)
+            conn.execute("CREATE INDEX IF NOT EXISTS audio_last_access ON audio (last_access)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(os.path.join(self.root, "index.db"), timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], f"{key}.wav")
+
+    def _count(self, key: str, tts_method: str, result: str) -> None:
+        with self._stats_lock:
+            self.stats[key] += 1
+        if Counter is not None:
+            TTS_CACHE_LOOKUPS.labels(tts_method=tts_method, result=result).inc()
+
+    def _store(self, key: str, src: str, tts_method: str) -> None:
+        """Copy src into the local tier (atomically) and index it"""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        shutil.copyfile(src, tmp)
+        os.replace(tmp, path)
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO audio (key, size, tts_method, created_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, os.path.getsize(path), tts_method, now, now),
+            )
+
+    def get(self, key: str, dest: str, tts_method: str = "") -> bool:
+        """Copy the cached audio for key to dest, return False on miss"""
+        path = self._path(key)
+        if os.path.exists(path):
+            try:
+                shutil.copyfile(path, dest)
+            except FileNotFoundError:
+                # evicted between the check and the copy
+                pass
+            else:
+                with self._connect() as conn:
+                    conn.execute("UPDATE audio SET last_access = ? WHERE key = ?", (time.time(), key))
+                self._count("local_hits", tts_method, "local")
+                return True
+        if self.s3 is not None:
+            tmp = f"{dest}.{uuid.uuid4().hex}.tmp"
+            try:
+                self.s3.download_file(self.s3_bucket, f"{self.s3_prefix}{key}.wav", tmp)
+            except Exception:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+            else:
+                os.replace(tmp, dest)
+                self._store(key, dest, tts_method)
+                self._evict()
+                self._count("s3_hits", tts_method, "s3")
+                return True
+        self._count("misses", tts_method, "miss")
+        return False
+
+    def put(self, key: str, src: str, tts_method: str = "") -> None:
+        """Add freshly synthesized audio to the local tier (and S3 in the background)"""
+        self._store(key, src, tts_method)
+        with self._stats_lock:
+            self.stats["puts"] += 1
+        if self._uploader is not None:
+            self._uploader.submit(self._upload, key)
+        self._evict()
+
+    def _upload(self, key: str) -> None:
+        try:
+            self.s3.upload_file(self._path(key), self.s3_bucket, f"{self.s3_prefix}{key}.wav")
+        except FileNotFoundError:
+            # evicted before the upload ran
+            pass
+        except Exception as e:
+            rprint(f"[yellow]⚠️ TTS cache upload to S3 failed: {e}[/yellow]")
+
+    def _evict(self) -> None:
+        """Remove least recently used files until the local tier fits in max_bytes"""
+        if not self.max_bytes:
+            return
+        with self._evict_lock:
+            conn = self._connect()
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM audio").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            evicted = []
+            for key, size in conn.execute("SELECT key, size FROM audio ORDER BY last_access"):
+                if total <= self.max_bytes:
+                    break
+                evicted.append(key)
+                total -= size
+            with conn:
+                conn.executemany("DELETE FROM audio WHERE key = ?", [(key,) for key in evicted])
+            for key in evicted:
+                try:
+                    os.remove(self._path(key))
+                except FileNotFoundError:
+                    pass
+        with self._stats_lock:
+            self.stats["evictions"] += len(evicted)
+        if Counter is not None:
+            TTS_CACHE_EVICTIONS.inc(len(evicted))
+
+_CACHES = {}
+_CACHES_LOCK = threading.Lock()
+
+def get_tts_cache(workspace_path: str = ".", config_path: str = None) -> Optional[TTSCache]:
+    """
+    Get the shared TTS audio cache, or None when disabled
+
+    Args:
+        workspace_path: Path to workspace directory
+        config_path: Path to config file (optional)
+    """
+    cache_set = load_key("tts_cache", config_path, workspace_path)
+    if not cache_set["enabled"]:
+        return None
+    cache_id = (os.path.abspath(cache_set["path"]), cache_set["s3_bucket"] or None)
+    with _CACHES_LOCK:
+        if cache_id not in _CACHES:
+            _CACHES[cache_id] = TTSCache(
+                cache_set["path"],
+                int(cache_set["max_size_mb"] * 1024 * 1024),
+                cache_set["s3_bucket"] or None,
+                cache_set["s3_prefix"],
+            )
+        return _CACHES[cache_id]
@@ -0,0 +1,176 @@
+import time
+import random
+import weakref
+import asyncio
+import threading
+import httpx
+from rich import print as rprint
+from ai.utils.config_utils import load_key
+from ai.utils.rate_limiter import RateLimiter
+
+# ------------
+# process-wide pooled tts client
+# ------------
+
+# provider whose limits and connection pool each tts method uses
+TTS_PROVIDERS = {
+    'openai_tts': 'openai',
+    'fish_tts': '302',
+    'f5tts': '302',
+}
+RETRY_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+class TTSClient:
+    """
+    HTTP client for one TTS provider, shared by every job running in the worker process.
+
+    Keep-alive connection pools are reused for all calls, a single RateLimiter gates
+    requests per minute and a semaphore caps the requests in flight, so the provider's
+    limits hold no matter how many jobs synthesize at once. Throttled, failed or timed out
+    requests are retried with backoff; a 429 pauses every caller through the limiter.
+    """
+
+    def __init__(self, name: str, rpm: float = 0, concurrency: int = 4, timeout: float = 60, max_retries: int = 3):
+        self.name = name
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.limiter = RateLimiter(rpm)
+        self._slots = threading.BoundedSemaphore(concurrency)
+        # synthesis and the follow-up download may both hold a connection
+        self._limits = httpx.Limits(max_connections=concurrency * 2, max_keepalive_connections=concurrency * 2)
+        self.client = httpx.Client(limits=self._limits, timeout=timeout, follow_redirects=True)
+        self._async_clients = weakref.WeakKeyDictionary()
+        self._stats_lock = threading.Lock()
+        self.stats = {"requests": 0, "retries": 0, "rate_limited": 0, "failed": 0}
+
+    def _get_async_client(self) -> httpx.AsyncClient:
+        # httpx async pools are bound to the event loop that created them
+        loop = asyncio.get_running_loop()
+        if loop not in self._async_clients:
+            self._async_clients[loop] = httpx.AsyncClient(limits=self._limits, timeout=self.timeout, follow_redirects=True)
+        return self._async_clients[loop]
+
+    def _count(self, key: str) -> None:
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def _retry_wait(self, response, error, attempt: int) -> float:
+        """Seconds to wait before retrying, None when the outcome is final"""
+        if attempt == self.max_retries:
+            return None
+        if error is not None:
+            return 2 ** attempt + random.random()
+        if response.status_code == 429:
+            self._count("rate_limited")
+            return self.limiter.backoff(response.headers, attempt)
+        if response.status_code in RETRY_STATUS:
+            return 2 ** attempt + random.random()
+        return None
+
+    def _finish(self, response, error):
+        if error is not None:
+            self._count("failed")
+            raise error
+        if response.is_error:
+            self._count("failed")
+        response.raise_for_status()
+        return response
+
+    def request(self, method: str, url: str, rate_limited: bool = True, **kwargs) -> httpx.Response:
+        """
+        Send a request with retries, raise httpx.HTTPError once retries are exhausted
+
+        Args:
+            method: HTTP method
+            url: Request URL
+            rate_limited: False for requests that do not count against the provider's rpm (e.g. downloads)
+            **kwargs: Passed to httpx.Client.request
+        """
+        for attempt in range(self.max_retries + 1):
+            if rate_limited:
+                self.limiter.acquire()
+            response, error = None, None
+            with self._slots:
+                self._count("requests")
+                try:
+                    response = self.client.request(method, url, **kwargs)
+                    self.limiter.observe(response.headers)
+                except httpx.TransportError as e:
+                    error = e
+            wait = self._retry_wait(response, error, attempt)
+            if wait is None:
+                return self._finish(response, error)
+            self._count("retries")
+            rprint(f"[yellow]{self.name} TTS request failed ({error or response.status_code}), retrying in {wait:.1f}s ({attempt + 1}/{self.max_retries})[/yellow]")
+            time.sleep(wait)
+
+    async def arequest(self, method: str, url: str, rate_limited: bool = True, **kwargs) -> httpx.Response:
+        """Async variant of `request` for use from the orchestrator's event loop"""
+        client = self._get_async_client()
+        for attempt in range(self.max_retries + 1):
+            if rate_limited:
+                await self.limiter.acquire_async()
+            # slots are shared with threads, poll so a cancelled task never holds one
+            while not self._slots.acquire(blocking=False):
+                await asyncio.sleep(0.05)
+            response, error = None, None
+            try:
+                self._count("requests")
+                response = await client.request(method, url, **kwargs)
+                self.limiter.observe(response.headers)
+            except httpx.TransportError as e:
+                error = e
+            finally:
+                self._slots.release()
+            wait = self._retry_wait(response, error, attempt)
+            if wait is None:
+                return self._finish(response, error)
+            self._count("retries")
+            rprint(f"[yellow]{self.name} TTS request failed ({error or response.status_code}), retrying in {wait:.1f}s ({attempt + 1}/{self.max_retries})[/yellow]")
+            await asyncio.sleep(wait)
+
+    def post(self, url: str, **kwargs) -> httpx.Response:
+        return self.request("POST", url, **kwargs)
+
+    def get(self, url: str, **kwargs) -> httpx.Response:
+        return self.request("GET", url, **kwargs)
+
+    async def apost(self, url: str, **kwargs) -> httpx.Response:
+        return await self.arequest("POST", url, **kwargs)
+
+    async def aget(self, url: str, **kwargs) -> httpx.Response:
+        return await self.arequest("GET", url, **kwargs)
+
+_CLIENTS = {}
+_CLIENTS_LOCK = threading.Lock()
+
+def get_tts_client(provider: str, api_key: str = "", workspace_path: str = ".", config_path: str = None) -> TTSClient:
+    """
+    Get the shared TTS client for a provider and API key
+
+    Args:
+        provider: Provider name under tts_client.providers (e.g. 'openai', '302')
+        api_key: API key the limits apply to
+        workspace_path: Path to workspace directory
+        config_path: Path to config file (optional)
+    """
+    client_id = (provider, api_key)
+    with _CLIENTS_LOCK:
+        if client_id not in _CLIENTS:
+            provider_set = load_key(f"tts_client.providers.{provider}", config_path, workspace_path)
+            _CLIENTS[client_id] = TTSClient(
+                provider,
+                rpm=provider_set["rpm"],
+                concurrency=provider_set["concurrency"],
+                timeout=load_key("tts_client.timeout", config_path, workspace_path),
+                max_retries=load_key("tts_client.max_retries", config_path, workspace_path),
+            )
+        return _CLIENTS[client_id]
+
+def get_tts_concurrency(tts_method: str, workspace_path: str = ".", config_path: str = None) -> int:
+    """Lines a job should synthesize at once: the provider's concurrency, or max_workers for other methods"""
+    provider = TTS_PROVIDERS.get(tts_method)
+    if provider is None:
+        return load_key("max_workers", config_path, workspace_path)
+    return load_key(f"tts_client.providers.{provider}.concurrency", config_path, workspace_path)
@@ -1,5 +1,6 @@
 import os
 import re
+from typing import Optional
 from pydub import AudioSegment
 
 from ai.asr_backend.audio_preprocess import get_audio_duration
@@ -8,6 +9,8 @@ from ai.tts_backend.fish_tts import fish_tts
 from ai.tts_backend.custom_tts import custom_tts
 from ai.prompts import get_correct_text_prompt
 from ai.tts_backend._302_f5tts import f5_tts_for_onevoice
+from ai.tts_backend.tts_cache import get_tts_cache, get_tts_cache_key
+from ai.utils.llm_client import SingleFlight
 from ai.utils import *
 
 def clean_text_for_tts(text):
@@ -17,31 +20,13 @@ def clean_text_for_tts(text):
         text = text.replace(char, '')
     return text.strip()
 
-def tts_main(text, save_as, number, task_df, workspace_path: str = ".", config_path: str = None):
+_INFLIGHT = SingleFlight()
+
+def _synthesize(text, save_as, number, task_df, workspace_path: str = ".", config_path: str = None) -> Optional[str]:
     """
-    TTS 메인 함수
-    
-    Args:
-        text: Text to convert to speech
-        save_as: Output file path
-        number: Task number
-        task_df: Task dataframe
-        workspace_path: Path to workspace directory
-        config_path: Path to config file (optional)
+    Run the configured backend with retries, return the text actually spoken (GPT-corrected
+    on the last attempt) or None when it fell back to silence
     """
-    text = clean_text_for_tts(text)
-    # Check if text is empty or single character, single character voiceovers are prone to bugs
-    cleaned_text = re.sub(r'[^\w\s]', '', text).strip()
-    if not cleaned_text or len(cleaned_text) <= 1:
-        silence = AudioSegment.silent(duration=100)  # 100ms = 0.1s
-        silence.export(save_as, format="wav")
-        rprint(f"Created silent audio for empty/single-char text: {save_as}")
-        return
-    
-    # Skip if file exists
-    if os.path.exists(save_as):
-        return
-    
     print(f"Generating <{text}...>")
     tts_method = load_key("tts_method", config_path)
     
@@ -64,7 +49,7 @@ def tts_main(text, save_as, number, task_df, workspace_path: str = ".", config_p
             # Check generated audio duration
             duration = get_audio_duration(save_as)
             if duration > 0:
-                break
+                return text
             else:
                 if os.path.exists(save_as):
                     os.remove(save_as)
@@ -73,9 +58,55 @@ def tts_main(text, save_as, number, task_df, workspace_path: str = ".", config_p
                     # Create silent audio file
                     silence = AudioSegment.silent(duration=100)  # 100ms silence
                     silence.export(save_as, format="wav")
-                    return
+                    return None
                 print(f"Attempt {attempt + 1} failed, retrying...")
         except Exception as e:
             if attempt == max_retries - 1:
                 raise Exception(f"Failed to generate audio after {max_retries} attempts: {str(e)}")
-            print(f"Attempt {attempt + 1} failed, retrying...")
\ No newline at end of file
+            print(f"Attempt {attempt + 1} failed, retrying...")
+
+def tts_main(text, save_as, number, task_df, workspace_path: str = ".", config_path: str = None):
+    """
+    TTS 메인 함수
+    
+    Args:
+        text: Text to convert to speech
+        save_as: Output file path
+        number: Task number
+        task_df: Task dataframe
+        workspace_path: Path to workspace directory
+        config_path: Path to config file (optional)
+    """
+    text = clean_text_for_tts(text)
+    # Check if text is empty or single character, single character voiceovers are prone to bugs
+    cleaned_text = re.sub(r'[^\w\s]', '', text).strip()
+    if not cleaned_text or len(cleaned_text) <= 1:
+        silence = AudioSegment.silent(duration=100)  # 100ms = 0.1s
+        silence.export(save_as, format="wav")
+        rprint(f"Created silent audio for empty/single-char text: {save_as}")
+        return
+    
+    # Skip if file exists
+    if os.path.exists(save_as):
+        return
+    
+    # Reuse audio synthesized earlier for the same text and voice, in any job
+    cache = get_tts_cache(workspace_path, config_path)
+    cache_key = get_tts_cache_key(text, workspace_path, config_path) if cache is not None else None
+    if cache_key is None:
+        _synthesize(text, save_as, number, task_df, workspace_path, config_path)
+        return
+    
+    tts_method = load_key("tts_method", config_path)
+    if cache.get(cache_key, save_as, tts_method):
+        return
+    
+    def synthesize_and_store():
+        # audio of GPT-corrected text does not belong under the original text's key
+        if _synthesize(text, save_as, number, task_df, workspace_path, config_path) == text:
+            cache.put(cache_key, save_as, tts_method)
+    
+    # the same line requested concurrently (repeated phrases) is synthesized once, the others copy it
+    _, shared = _INFLIGHT.do(cache_key, synthesize_and_store)
+    if shared and not cache.get(cache_key, save_as, tts_method):
+        _synthesize(text, save_as, number, task_df, workspace_path, config_path)
@@ -1,41 +1,52 @@
-import os
-import json
-from threading import Lock
+import asyncio
 import json_repair
-from openai import OpenAI
 from ai.utils.config_utils import load_key
 from rich import print as rprint
 from ai.utils.decorator import except_handler
+from ai.utils.gpt_cache import get_gpt_cache, make_cache_key, log_gpt_error
+from ai.utils.llm_client import get_llm_client
+from ai.utils.llm_batch import defer_to_batch, take_batch_result
+from ai.utils.llm_telemetry import LLMCall
 
 # ------------
-# cache gpt response
+# shared request / response handling
 # ------------
 
-LOCK = Lock()
-
-def _save_cache(model, prompt, resp_content, resp_type, resp, workspace_path: str = ".", message=None, log_title="default"):
-    with LOCK:
-        logs = []
-        gpt_log_folder = f"{workspace_path}/output/gpt_log"
-        file = os.path.join(gpt_log_folder, f"{log_title}.json")
-        os.makedirs(os.path.dirname(file), exist_ok=True)
-        if os.path.exists(file):
-            with open(file, 'r', encoding='utf-8') as f:
-                logs = json.load(f)
-        logs.append({"model": model, "prompt": prompt, "resp_content": resp_content, "resp_type": resp_type, "resp": resp, "message": message})
-        with open(file, 'w', encoding='utf-8') as f:
-            json.dump(logs, f, ensure_ascii=False, indent=4)
-
-def _load_cache(prompt, resp_type, workspace_path: str = ".", log_title="default"):
-    with LOCK:
-        gpt_log_folder = f"{workspace_path}/output/gpt_log"
-        file = os.path.join(gpt_log_folder, f"{log_title}.json")
-        if os.path.exists(file):
-            with open(file, 'r', encoding='utf-8') as f:
-                for item in json.load(f):
-                    if item["prompt"] == prompt and item["resp_type"] == resp_type:
-                        return item["resp"]
-        return False
+def _build_request(prompt, resp_type, workspace_path: str = ".", config_path: str = None):
+    if not load_key("api.key", config_path, workspace_path):
+        raise ValueError("API key is not set")
+    model = load_key("api.model", config_path, workspace_path)
+    response_format = {"type": "json_object"} if resp_type == "json" and load_key("api.llm_support_json", config_path, workspace_path) else None
+    params = dict(
+        model=model,
+        messages=[{"role": "user", "content": prompt}],
+        response_format=response_format,
+        timeout=900,
+        service_tier="flex",
+    )
+    return model, params
+
+def _parse_response(model, prompt, resp_content, resp_type, valid_def, workspace_path, log_title):
+    if resp_type == "json":
+        resp = json_repair.loads(resp_content)
+    else:
+        resp = resp_content
+
+    # check if the response format is valid
+    if valid_def:
+        valid_resp = valid_def(resp)
+        if valid_resp['status'] != 'success':
+            log_gpt_error(model, prompt, resp_content, resp_type, resp, valid_resp['message'], workspace_path, log_title)
+            raise ValueError(f"❎ API response error: {valid_resp['message']}")
+    return resp
+
+def _batch_usage(batch_result: dict) -> dict:
+    usage = batch_result.get("usage") or {}
+    return {
+        "prompt_tokens": usage.get("prompt_tokens", 0),
+        "completion_tokens": usage.get("completion_tokens", 0),
+        "cached_tokens": (usage.get("prompt_tokens_details") or {}).get("cached_tokens", 0),
+    }
 
 # ------------
 # ask gpt once
@@ -45,7 +56,7 @@ def _load_cache(prompt, resp_type, workspace_path: str = ".", log_title="default
 def ask_gpt(prompt, resp_type=None, valid_def=None, workspace_path: str = ".", config_path: str = None, log_title="default"):
     """
     GPT API 호출
-    
+
     Args:
         prompt: Input prompt
         resp_type: Response type (json, text, etc.)
@@ -54,49 +65,75 @@ def ask_gpt(prompt, resp_type=None, valid_def=None, workspace_path: str = ".", c
         config_path: Path to config file (optional)
         log_title: Log title for caching
     """
-    if not load_key("api.key", config_path):
-        raise ValueError("API key is not set")
-    # check cache
-    cached = _load_cache(prompt, resp_type, workspace_path, log_title)
-    if cached:
-        rprint("use cache response")
-        return cached
+    model, params = _build_request(prompt, resp_type, workspace_path, config_path)
 
-    model = load_key("api.model", config_path)
-    client = OpenAI(api_key=load_key("api.key", config_path))
-    response_format = {"type": "json_object"} if resp_type == "json" and load_key("api.llm_support_json", config_path) else None
+    with LLMCall(workspace_path, log_title, model) as call:
+        # check cache
+        cache = get_gpt_cache(workspace_path, config_path)
+        cache_key = make_cache_key(model, prompt, resp_type)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            rprint("use cache response")
+            call.source = "cache"
+            return cached
 
-    messages = [{"role": "user", "content": prompt}]
+        # deferred batch mode: answer from a finished batch, or queue the request for the next one
+        batch_result = take_batch_result(workspace_path, cache_key)
+        if batch_result is None:
+            defer_to_batch(workspace_path, cache_key, params, {"model": model, "resp_type": resp_type, "log_title": log_title})
+            result = get_llm_client(workspace_path, config_path).chat(**params)
+            if result.shared:
+                # usage is recorded once, by the identical request that actually ran
+                call.source = "coalesced"
+            else:
+                call.set_usage(result.prompt_tokens, result.completion_tokens, result.cached_tokens, result.rate_limit_retries)
+            resp_content = result.content
+        else:
+            call.source = "batch"
+            call.set_usage(**_batch_usage(batch_result))
+            resp_content = batch_result["content"]
+        resp = _parse_response(model, prompt, resp_content, resp_type, valid_def, workspace_path, log_title)
 
-    params = dict(
-        model=model,
-        messages=messages,
-        response_format=response_format,
-        timeout=900,
-        service_tier="flex",
-    )
-    resp_raw = client.chat.completions.create(**params)
+        cache.put(cache_key, model, prompt, resp_type, resp_content, resp, log_title)
+        return resp
 
-    # process and return full result
-    resp_content = resp_raw.choices[0].message.content
-    if resp_type == "json":
-        resp = json_repair.loads(resp_content)
-    else:
-        resp = resp_content
-    
-    # check if the response format is valid
-    if valid_def:
-        valid_resp = valid_def(resp)
-        if valid_resp['status'] != 'success':
-            _save_cache(model, prompt, resp_content, resp_type, resp, workspace_path, log_title="error", message=valid_resp['message'])
-            raise ValueError(f"❎ API response error: {valid_resp['message']}")
+@except_handler("GPT request failed", retry=5)
+async def ask_gpt_async(prompt, resp_type=None, valid_def=None, workspace_path: str = ".", config_path: str = None, log_title="default"):
+    """Async variant of `ask_gpt`, sharing its cache, connection pool and rate limiter"""
+    model, params = await asyncio.to_thread(_build_request, prompt, resp_type, workspace_path, config_path)
 
-    _save_cache(model, prompt, resp_content, resp_type, resp, workspace_path, log_title=log_title)
-    return resp
+    with LLMCall(workspace_path, log_title, model) as call:
+        cache = await asyncio.to_thread(get_gpt_cache, workspace_path, config_path)
+        cache_key = make_cache_key(model, prompt, resp_type)
+        cached = await asyncio.to_thread(cache.get, cache_key)
+        if cached is not None:
+            rprint("use cache response")
+            call.source = "cache"
+            return cached
+
+        batch_result = take_batch_result(workspace_path, cache_key)
+        if batch_result is None:
+            defer_to_batch(workspace_path, cache_key, params, {"model": model, "resp_type": resp_type, "log_title": log_title})
+            client = await asyncio.to_thread(get_llm_client, workspace_path, config_path)
+            result = await client.achat(**params)
+            if result.shared:
+                # usage is recorded once, by the identical request that actually ran
+                call.source = "coalesced"
+            else:
+                call.set_usage(result.prompt_tokens, result.completion_tokens, result.cached_tokens, result.rate_limit_retries)
+            resp_content = result.content
+        else:
+            call.source = "batch"
+            call.set_usage(**_batch_usage(batch_result))
+            resp_content = batch_result["content"]
+        resp = _parse_response(model, prompt, resp_content, resp_type, valid_def, workspace_path, log_title)
+
+        await asyncio.to_thread(cache.put, cache_key, model, prompt, resp_type, resp_content, resp, log_title)
+        return resp
 
 
 if __name__ == '__main__':
     from rich import print as rprint
-    
+
     result = ask_gpt("""test respond ```json\n{\"code\": 200, \"message\": \"success\"}\n```""", resp_type="json")
     rprint(f"Test json output result: {result}")
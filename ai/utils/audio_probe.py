@@ -0,0 +1,95 @@
+import io
+import os
+import subprocess
+from typing import Optional, Union
+
+# use try-except to fall back to header parsing and ffprobe when soundfile is not installed
+try:
+    import soundfile
+except ImportError:
+    soundfile = None
+
+# ------------
+# in-process audio duration probing
+# ------------
+
+# bytes read from a file for header parsing, enough for fmt plus the usual LIST/bext chunks
+HEADER_SIZE = 64 * 1024
+_UNKNOWN_SIZE = 0xFFFFFFFF
+
+def _le(data: bytes, start: int, size: int) -> int:
+    return int.from_bytes(data[start:start + size], 'little')
+
+def wav_duration(header: bytes, total_size: int) -> Optional[float]:
+    """
+    Duration of a RIFF/RF64 WAVE file from its header, None if it cannot be read
+
+    The data chunk length is taken from the header, or from the file size when the writer
+    left it unset (streamed responses write 0 or 0xFFFFFFFF).
+    """
+    if header[:4] not in (b'RIFF', b'RF64') or header[8:12] != b'WAVE':
+        return None
+    pos, byte_rate, data_size64 = 12, None, None
+    while pos + 8 <= len(header):
+        chunk_id, size = header[pos:pos + 4], _le(header, pos + 4, 4)
+        if chunk_id == b'ds64':
+            data_size64 = _le(header, pos + 16, 8)
+        elif chunk_id == b'fmt ':
+            byte_rate = _le(header, pos + 16, 4)
+        elif chunk_id == b'data':
+            if not byte_rate:
+                return None
+            available = total_size - pos - 8
+            if size == _UNKNOWN_SIZE and data_size64 is not None:
+                size = data_size64
+            if size in (0, _UNKNOWN_SIZE) or size > available:
+                size = available
+            return max(size, 0) / byte_rate
+        pos += 8 + size + (size & 1)
+    return None
+
+def flac_duration(header: bytes) -> Optional[float]:
+    """Duration of a FLAC file from its STREAMINFO block, None if unknown"""
+    if header[:4] != b'fLaC' or len(header) < 26 or header[4] & 0x7F != 0:
+        return None
+    packed = int.from_bytes(header[18:26], 'big')
+    sample_rate, total_samples = packed >> 44, packed & ((1 << 36) - 1)
+    if not sample_rate or not total_samples:
+        return None
+    return total_samples / sample_rate
+
+def _ffprobe_duration(source: Union[str, bytes]) -> float:
+    cmd = ['ffprobe', '-v', 'error', '-show_entries', 'format=duration', '-of', 'default=noprint_wrappers=1:nokey=1']
+    is_path = isinstance(source, str)
+    result = subprocess.run(cmd + ['-i', source if is_path else 'pipe:0'], input=None if is_path else source,
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
+    return float(result.stdout.decode('utf-8').strip())
+
+def probe_duration(source: Union[str, bytes]) -> float:
+    """
+    Audio duration in seconds of a file path or an in-memory buffer (e.g. a TTS response body)
+
+    WAV and FLAC headers are parsed directly, other formats go through soundfile when it is
+    installed, ffprobe is only spawned when neither can read the audio. Raises on failure.
+    """
+    if isinstance(source, str):
+        with open(source, 'rb') as f:
+            header = f.read(HEADER_SIZE)
+        total_size = os.path.getsize(source)
+    else:
+        source = bytes(source)
+        header, total_size = source[:HEADER_SIZE], len(source)
+
+    duration = wav_duration(header, total_size)
+    if duration is None:
+        duration = flac_duration(header)
+    if duration is None and soundfile is not None:
+        try:
+            info = soundfile.info(source if isinstance(source, str) else io.BytesIO(source))
+            if info.samplerate and info.frames > 0:
+                duration = info.frames / info.samplerate
+        except Exception:
+            duration = None
+    if duration is None:
+        duration = _ffprobe_duration(source)
+    return duration
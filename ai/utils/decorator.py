@@ -1,3 +1,4 @@
+import asyncio
 import functools
 import time
 from rich import print as rprint
@@ -17,6 +18,23 @@ def except_handler(error_msg, retry=0, delay=1, default_return=None):
         default_return: Default value to return on final failure
     """
     def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                last_exception = None
+                for i in range(retry + 1):
+                    try:
+                        return await func(*args, **kwargs)
+                    except Exception as e:
+                        last_exception = e
+                        rprint(f"[red]{error_msg}: {e}, retry: {i+1}/{retry}[/red]")
+                        if i == retry:
+                            if default_return is not None:
+                                return default_return
+                            raise last_exception
+                        await asyncio.sleep(delay * (2**i))
+            return async_wrapper
+
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
             last_exception = None
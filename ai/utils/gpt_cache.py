@@ -0,0 +1,151 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Any, Optional
+from ai.utils.config_utils import load_key
+
+# ------------
+# indexed gpt response cache (sqlite, WAL mode)
+# ------------
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    model TEXT,
+    resp_type TEXT,
+    log_title TEXT,
+    prompt TEXT,
+    resp_content TEXT,
+    resp TEXT,
+    created_at REAL NOT NULL
+)
+"""
+
+def make_cache_key(model, prompt, resp_type) -> str:
+    """Hash of (model, prompt, resp_type) used as the cache primary key"""
+    raw = json.dumps([model, prompt, resp_type], ensure_ascii=False)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+class GPTCache:
+    """
+    Response cache backed by a single SQLite file in WAL mode.
+
+    Lookups are a primary-key read, writes are a single upsert, so threads and
+    processes (jobs on the same worker) can share one file without rewriting it.
+    """
+
+    def __init__(self, db_path: str, ttl: float = 0):
+        self.db_path = db_path
+        self.ttl = ttl or 0
+        self._local = threading.local()
+        # every thread's connection, so close() can release them all
+        self._conns = []
+        self._conns_lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # each connection is still used by one thread only, close() may run on another
+            conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._conns_lock:
+                self._conns.append(conn)
+        return conn
+
+    def close(self) -> None:
+        """Close the connections of all threads"""
+        with self._conns_lock:
+            conns, self._conns = self._conns, []
+            self._local = threading.local()
+        for conn in conns:
+            conn.close()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached response for key, or None on miss / expiry"""
+        row = self._connect().execute(
+            "SELECT resp, created_at FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        resp, created_at = row
+        if self.ttl and time.time() - created_at > self.ttl:
+            return None
+        return json.loads(resp)
+
+    def put(self, key: str, model, prompt, resp_type, resp_content, resp, log_title="default") -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(key, model, resp_type, log_title, prompt, resp_content, resp, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, model, resp_type, log_title, prompt, resp_content,
+                 json.dumps(resp, ensure_ascii=False), time.time()),
+            )
+
+    def purge_expired(self) -> int:
+        """Delete expired entries, return the number of removed rows"""
+        if not self.ttl:
+            return 0
+        with self._connect() as conn:
+            cur = conn.execute("DELETE FROM responses WHERE created_at < ?", (time.time() - self.ttl,))
+            return cur.rowcount
+
+_CACHES = {}
+_CACHES_LOCK = threading.Lock()
+
+def get_gpt_cache(workspace_path: str = ".", config_path: str = None) -> GPTCache:
+    """
+    Get the response cache for a job
+
+    Args:
+        workspace_path: Path to workspace directory
+        config_path: Path to config file (optional)
+    """
+    if load_key("gpt_cache.shared", config_path, workspace_path):
+        db_path = load_key("gpt_cache.shared_path", config_path, workspace_path)
+    else:
+        db_path = f"{workspace_path}/output/gpt_log/cache.db"
+    ttl = load_key("gpt_cache.ttl", config_path, workspace_path)
+    cache_id = (os.path.abspath(db_path), ttl)
+    with _CACHES_LOCK:
+        if cache_id not in _CACHES:
+            _CACHES[cache_id] = GPTCache(db_path, ttl)
+        return _CACHES[cache_id]
+
+def release_gpt_cache(workspace_path: str) -> None:
+    """
+    Evict and close the caches stored inside a workspace, called when the workspace is removed
+
+    Args:
+        workspace_path: Path to workspace directory
+    """
+    prefix = os.path.join(os.path.abspath(workspace_path), '')
+    with _CACHES_LOCK:
+        caches = [_CACHES.pop(cache_id) for cache_id in list(_CACHES) if cache_id[0].startswith(prefix)]
+    for cache in caches:
+        cache.close()
+
+# ------------
+# append-only error log
+# ------------
+
+_ERROR_LOCK = threading.Lock()
+
+def log_gpt_error(model, prompt, resp_content, resp_type, resp, message, workspace_path: str = ".", log_title="default"):
+    """Append a rejected response to output/gpt_log/error.jsonl"""
+    file = f"{workspace_path}/output/gpt_log/error.jsonl"
+    record = {"time": time.time(), "log_title": log_title, "model": model, "prompt": prompt,
+              "resp_content": resp_content, "resp_type": resp_type, "resp": resp, "message": message}
+    line = json.dumps(record, ensure_ascii=False, default=str)
+    with _ERROR_LOCK:
+        os.makedirs(os.path.dirname(file), exist_ok=True)
+        with open(file, 'a', encoding='utf-8') as f:
+            f.write(line + '\n')
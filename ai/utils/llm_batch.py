@@ -0,0 +1,238 @@
+import io
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from typing import Optional
+from rich import print as rprint
+from ai.utils.config_utils import load_key
+from ai.utils.llm_client import get_llm_client
+
+# ------------
+# deferred batch execution of a pipeline stage
+# ------------
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+PENDING_STATUSES = {"validating", "in_progress", "finalizing"}
+# request options the Batch API does not take
+_SYNC_ONLY_PARAMS = {"timeout", "service_tier"}
+
+class DeferredToBatch(BaseException):
+    """
+    Raised by ask_gpt on a cache miss while a stage is being collected for batch submission.
+
+    Derives from BaseException so stage code that catches Exception (retry decorators,
+    fallbacks) lets it through and the stage stops at the first missing response.
+    """
+
+class BatchPending(Exception):
+    """The stage is waiting for a submitted batch, retry after `poll_after` seconds"""
+
+    def __init__(self, batch_id: str, poll_after: float):
+        super().__init__(f"Waiting for LLM batch {batch_id}")
+        self.batch_id = batch_id
+        self.poll_after = poll_after
+
+class BatchCollector:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = {}
+
+    def add(self, custom_id: str, params: dict, meta: dict) -> None:
+        body = {k: v for k, v in params.items() if k not in _SYNC_ONLY_PARAMS and v is not None}
+        with self._lock:
+            self.requests.setdefault(custom_id, {"body": body, **meta})
+
+_COLLECTORS = {}
+_RESULTS = {}
+_REGISTRY_LOCK = threading.Lock()
+
+def _workspace_id(workspace_path: str) -> str:
+    return os.path.abspath(workspace_path)
+
+def _state_file(workspace_path: str) -> str:
+    return f"{workspace_path}/output/gpt_log/batch.json"
+
+def _results_file(workspace_path: str) -> str:
+    return f"{workspace_path}/output/gpt_log/batch_results.json"
+
+def _rounds_file(workspace_path: str) -> str:
+    return f"{workspace_path}/output/gpt_log/batch_rounds.json"
+
+@contextmanager
+def collecting(workspace_path: str):
+    """Collect the LLM requests of a stage instead of sending them"""
+    collector = BatchCollector()
+    with _REGISTRY_LOCK:
+        _COLLECTORS[_workspace_id(workspace_path)] = collector
+    try:
+        yield collector
+    finally:
+        with _REGISTRY_LOCK:
+            _COLLECTORS.pop(_workspace_id(workspace_path), None)
+
+def defer_to_batch(workspace_path: str, custom_id: str, params: dict, meta: dict) -> None:
+    """Record the request and raise DeferredToBatch when the workspace is collecting, no-op otherwise"""
+    collector = _COLLECTORS.get(_workspace_id(workspace_path))
+    if collector is None:
+        return
+    collector.add(custom_id, params, meta)
+    raise DeferredToBatch(custom_id)
+
+def take_batch_result(workspace_path: str, custom_id: str) -> Optional[dict]:
+    """
+    Response fetched by a finished batch ({"content", "usage"}), consumed on read so an
+    invalid answer is requested again
+    """
+    workspace_id = _workspace_id(workspace_path)
+    with _REGISTRY_LOCK:
+        if workspace_id not in _RESULTS:
+            results_file = _results_file(workspace_path)
+            if not os.path.exists(results_file):
+                return None
+            with open(results_file, 'r', encoding='utf-8') as f:
+                _RESULTS[workspace_id] = json.load(f)
+        return _RESULTS[workspace_id].pop(custom_id, None)
+
+def release_batch_results(workspace_path: str) -> None:
+    """Drop the workspace's loaded batch results and collector, called when the workspace is removed"""
+    workspace_id = _workspace_id(workspace_path)
+    with _REGISTRY_LOCK:
+        _RESULTS.pop(workspace_id, None)
+        _COLLECTORS.pop(workspace_id, None)
+
+def submit_batch(collector: BatchCollector, step_name: str, workspace_path: str = ".", config_path: str = None) -> str:
+    """Upload the collected requests as one batch and remember it in the workspace"""
+    lines = [
+        json.dumps({"custom_id": custom_id, "method": "POST", "url": BATCH_ENDPOINT, "body": request["body"]}, ensure_ascii=False)
+        for custom_id, request in collector.requests.items()
+    ]
+    client = get_llm_client(workspace_path, config_path).client
+    input_file = client.files.create(file=(f"{step_name}.jsonl", io.BytesIO('\n'.join(lines).encode('utf-8'))), purpose="batch")
+    batch = client.batches.create(input_file_id=input_file.id, endpoint=BATCH_ENDPOINT, completion_window="24h")
+
+    state = {
+        "batch_id": batch.id,
+        "step": step_name,
+        "submitted_at": time.time(),
+        "requests": {custom_id: {k: v for k, v in request.items() if k != "body"} for custom_id, request in collector.requests.items()},
+    }
+    os.makedirs(os.path.dirname(_state_file(workspace_path)), exist_ok=True)
+    with open(_state_file(workspace_path), 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False)
+    rprint(f"[cyan]📦 Submitted {len(lines)} {step_name} requests as LLM batch {batch.id}[/cyan]")
+    return batch.id
+
+def poll_batch(workspace_path: str = ".", config_path: str = None) -> Optional[str]:
+    """
+    Check the workspace's submitted batch, download its results once finished
+
+    Returns the batch status, or None when no batch is outstanding. Finished batches
+    (completed, failed, expired, cancelled) are cleared from the workspace.
+    """
+    state_file = _state_file(workspace_path)
+    if not os.path.exists(state_file):
+        return None
+    with open(state_file, 'r', encoding='utf-8') as f:
+        state = json.load(f)
+
+    client = get_llm_client(workspace_path, config_path).client
+    batch = client.batches.retrieve(state["batch_id"])
+    if batch.status in PENDING_STATUSES:
+        return batch.status
+
+    results = {}
+    if batch.status == "completed" and batch.output_file_id:
+        for line in client.files.content(batch.output_file_id).text.splitlines():
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            response = item.get("response") or {}
+            if response.get("status_code") == 200:
+                body = response["body"]
+                results[item["custom_id"]] = {"content": body["choices"][0]["message"]["content"], "usage": body.get("usage") or {}}
+        rprint(f"[green]📦 LLM batch {batch.id} finished: {len(results)} / {len(state['requests'])} responses[/green]")
+    else:
+        rprint(f"[yellow]📦 LLM batch {batch.id} ended with status {batch.status}, running the step synchronously[/yellow]")
+
+    with _REGISTRY_LOCK:
+        with open(_results_file(workspace_path), 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False)
+        _RESULTS[_workspace_id(workspace_path)] = results
+    os.remove(state_file)
+    return batch.status
+
+def run_batched(function, call_kwargs: dict, step_name: str, workspace_path: str = ".", config_path: str = None):
+    """
+    Run a stage in deferred batch mode
+
+    Cache misses are collected instead of sent; if any occur the stage stops, the requests
+    are submitted as one batch and BatchPending is raised. Calling again once the batch has
+    finished replays the stage with the batch results, collecting the next dependent round.
+
+    Args:
+        function: Stage function
+        call_kwargs: Keyword arguments for the stage function
+        step_name: Pipeline step name, used for logs
+        workspace_path: Path to workspace directory
+        config_path: Path to config file (optional)
+    """
+    batch_set = load_key("llm_batch", config_path, workspace_path)
+    status = poll_batch(workspace_path, config_path)
+    if status in PENDING_STATUSES:
+        raise BatchPending(_read_batch_id(workspace_path), batch_set["poll_interval"])
+    # failed / expired batches, and stages that keep missing after max_rounds, finish synchronously
+    rounds = _count_round(step_name, workspace_path)
+    if (status is not None and status != "completed") or rounds > batch_set["max_rounds"]:
+        return function(**call_kwargs)
+
+    with collecting(workspace_path) as collector:
+        try:
+            return function(**call_kwargs)
+        except DeferredToBatch:
+            pass
+    batch_id = submit_batch(collector, step_name, workspace_path, config_path)
+    raise BatchPending(batch_id, batch_set["poll_interval"])
+
+def _count_round(step_name: str, workspace_path: str) -> int:
+    rounds_file = _rounds_file(workspace_path)
+    rounds = {}
+    if os.path.exists(rounds_file):
+        with open(rounds_file, 'r', encoding='utf-8') as f:
+            rounds = json.load(f)
+    rounds[step_name] = rounds.get(step_name, 0) + 1
+    os.makedirs(os.path.dirname(rounds_file), exist_ok=True)
+    with open(rounds_file, 'w', encoding='utf-8') as f:
+        json.dump(rounds, f)
+    return rounds[step_name]
+
+def export_batch_state(workspace_path: str) -> dict:
+    """
+    Outstanding batch and round counts of the workspace, stored with the job so another
+    worker can resume the stage without submitting the batch again
+    """
+    saved = {"state": None, "rounds": {}}
+    if os.path.exists(_state_file(workspace_path)):
+        with open(_state_file(workspace_path), 'r', encoding='utf-8') as f:
+            saved["state"] = json.load(f)
+    if os.path.exists(_rounds_file(workspace_path)):
+        with open(_rounds_file(workspace_path), 'r', encoding='utf-8') as f:
+            saved["rounds"] = json.load(f)
+    return saved
+
+def restore_batch_state(workspace_path: str, saved: Optional[dict]) -> None:
+    """Write a state from `export_batch_state` back into a (recreated) workspace, keeping files already there"""
+    if not saved:
+        return
+    os.makedirs(os.path.dirname(_state_file(workspace_path)), exist_ok=True)
+    if saved.get("state") and not os.path.exists(_state_file(workspace_path)):
+        with open(_state_file(workspace_path), 'w', encoding='utf-8') as f:
+            json.dump(saved["state"], f, ensure_ascii=False)
+    if saved.get("rounds") and not os.path.exists(_rounds_file(workspace_path)):
+        with open(_rounds_file(workspace_path), 'w', encoding='utf-8') as f:
+            json.dump(saved["rounds"], f)
+
+def _read_batch_id(workspace_path: str) -> str:
+    with open(_state_file(workspace_path), 'r', encoding='utf-8') as f:
+        return json.load(f)["batch_id"]
@@ -0,0 +1,252 @@
+import json
+import hashlib
+import weakref
+import asyncio
+import threading
+from dataclasses import dataclass, replace
+from functools import lru_cache
+import httpx
+from openai import OpenAI, AsyncOpenAI, RateLimitError
+from rich import print as rprint
+from ai.utils.config_utils import load_key
+from ai.utils.rate_limiter import RateLimiter
+
+# use try-except to fall back to estimates when tiktoken is not installed
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# ------------
+# process-wide pooled llm client
+# ------------
+
+RATE_LIMIT_RETRY = 5
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 utf-8 bytes per token) used to reserve TPM capacity before a request"""
+    return len(str(text).encode('utf-8')) // 4 + 1
+
+@lru_cache(maxsize=None)
+def _get_encoding(model: str):
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+def count_tokens(text: str, model: str = None) -> int:
+    """Token count with the model's tokenizer, or `estimate_tokens` when tiktoken is unavailable"""
+    if tiktoken is None:
+        return estimate_tokens(text)
+    return len(_get_encoding(model or "").encode(str(text), disallowed_special=()))
+
+# ------------
+# in-flight request coalescing
+# ------------
+
+class _Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+    def outcome(self):
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+class SingleFlight:
+    """
+    Collapse concurrent calls with the same key into one execution.
+
+    The first caller runs the function; callers arriving while it is in flight wait
+    for it and receive the same result (or exception). Works for threads and coroutines.
+    `do`/`ado` return (result, shared) where shared is True for callers that waited.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def _join(self, key):
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                return call, False
+            call = self._calls[key] = _Call()
+            return call, True
+
+    def _finish(self, key, call):
+        with self._lock:
+            self._calls.pop(key, None)
+        call.event.set()
+
+    def do(self, key, fn):
+        call, leader = self._join(key)
+        if not leader:
+            call.event.wait()
+            return call.outcome(), True
+        try:
+            call.result = fn()
+            return call.result, False
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            self._finish(key, call)
+
+    async def ado(self, key, coro_fn):
+        call, leader = self._join(key)
+        if not leader:
+            await asyncio.to_thread(call.event.wait)
+            return call.outcome(), True
+        try:
+            call.result = await coro_fn()
+            return call.result, False
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            self._finish(key, call)
+
+def request_key(params: dict) -> str:
+    """Identity of a chat request, ignoring transport-only options"""
+    identity = {k: v for k, v in params.items() if k != "timeout"}
+    return hashlib.sha256(json.dumps(identity, sort_keys=True, ensure_ascii=False, default=str).encode('utf-8')).hexdigest()
+
+@dataclass
+class LLMResult:
+    content: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    # prompt tokens served from the provider's prefix cache
+    cached_tokens: int = 0
+    # 429 responses retried before this result
+    rate_limit_retries: int = 0
+    # received from an identical in-flight request, its usage is already counted by that request
+    shared: bool = False
+
+class LLMClient:
+    """
+    OpenAI-compatible chat client shared by every job running in the worker process.
+
+    One keep-alive connection pool is reused for all calls, and a single RateLimiter
+    gates requests and tokens per minute for every thread and job using the same key.
+    Identical requests already in flight are coalesced into one upstream call.
+    """
+
+    def __init__(self, api_key: str, base_url: str = None, rpm: float = 0, tpm: float = 0, max_connections: int = 20):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.max_connections = max_connections
+        self.limiter = RateLimiter(rpm, tpm)
+        http_client = httpx.Client(limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections))
+        # retries are handled here so that 429 backoff is shared through the limiter
+        self.client = OpenAI(api_key=api_key, base_url=base_url, http_client=http_client, max_retries=0)
+        self._async_clients = weakref.WeakKeyDictionary()
+        self._inflight = SingleFlight()
+        self._stats_lock = threading.Lock()
+        self.stats = {"requests": 0, "coalesced": 0, "rate_limited": 0, "prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0}
+
+    def _get_async_client(self) -> AsyncOpenAI:
+        # httpx async pools are bound to the event loop that created them
+        loop = asyncio.get_running_loop()
+        if loop not in self._async_clients:
+            http_client = httpx.AsyncClient(limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections))
+            self._async_clients[loop] = AsyncOpenAI(api_key=self.api_key, base_url=self.base_url, http_client=http_client, max_retries=0)
+        return self._async_clients[loop]
+
+    def _settle(self, completion, estimate: int, attempt: int = 0) -> LLMResult:
+        usage = getattr(completion, "usage", None)
+        prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+        completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+        cached_tokens = getattr(getattr(usage, "prompt_tokens_details", None), "cached_tokens", 0) or 0
+        if usage is not None:
+            self.limiter.adjust_tokens(prompt_tokens + completion_tokens - estimate)
+        with self._stats_lock:
+            self.stats["requests"] += 1
+            self.stats["prompt_tokens"] += prompt_tokens
+            self.stats["completion_tokens"] += completion_tokens
+            self.stats["cached_tokens"] += cached_tokens
+        return LLMResult(completion.choices[0].message.content, prompt_tokens, completion_tokens, cached_tokens, attempt)
+
+    def _on_rate_limited(self, e: RateLimitError, estimate: int, attempt: int) -> None:
+        self.limiter.adjust_tokens(-estimate)
+        with self._stats_lock:
+            self.stats["rate_limited"] += 1
+        if attempt == RATE_LIMIT_RETRY:
+            raise e
+        wait = self.limiter.backoff(getattr(e.response, "headers", None), attempt)
+        rprint(f"[yellow]LLM rate limited, pausing all requests for {wait:.1f}s ({attempt + 1}/{RATE_LIMIT_RETRY})[/yellow]")
+
+    def _coalesced(self, result: LLMResult, shared: bool) -> LLMResult:
+        if not shared:
+            return result
+        with self._stats_lock:
+            self.stats["coalesced"] += 1
+        return replace(result, shared=True)
+
+    def chat(self, messages: list, **params) -> LLMResult:
+        """Rate-limited chat completion, `params` are passed to chat.completions.create"""
+        key = request_key(dict(params, messages=messages))
+        result, shared = self._inflight.do(key, lambda: self._chat(messages, **params))
+        return self._coalesced(result, shared)
+
+    async def achat(self, messages: list, **params) -> LLMResult:
+        """Async variant of `chat` for use from the orchestrator's event loop"""
+        key = request_key(dict(params, messages=messages))
+        result, shared = await self._inflight.ado(key, lambda: self._achat(messages, **params))
+        return self._coalesced(result, shared)
+
+    def _chat(self, messages: list, **params) -> LLMResult:
+        estimate = sum(estimate_tokens(m["content"]) for m in messages)
+        for attempt in range(RATE_LIMIT_RETRY + 1):
+            self.limiter.acquire(estimate)
+            try:
+                raw = self.client.chat.completions.with_raw_response.create(messages=messages, **params)
+            except RateLimitError as e:
+                self._on_rate_limited(e, estimate, attempt)
+                continue
+            self.limiter.observe(raw.headers)
+            return self._settle(raw.parse(), estimate, attempt)
+
+    async def _achat(self, messages: list, **params) -> LLMResult:
+        client = self._get_async_client()
+        estimate = sum(estimate_tokens(m["content"]) for m in messages)
+        for attempt in range(RATE_LIMIT_RETRY + 1):
+            await self.limiter.acquire_async(estimate)
+            try:
+                raw = await client.chat.completions.with_raw_response.create(messages=messages, **params)
+            except RateLimitError as e:
+                self._on_rate_limited(e, estimate, attempt)
+                continue
+            self.limiter.observe(raw.headers)
+            return self._settle(raw.parse(), estimate, attempt)
+
+_CLIENTS = {}
+_CLIENTS_LOCK = threading.Lock()
+
+def get_llm_client(workspace_path: str = ".", config_path: str = None) -> LLMClient:
+    """
+    Get the shared LLM client for the configured API key and endpoint
+
+    Args:
+        workspace_path: Path to workspace directory
+        config_path: Path to config file (optional)
+    """
+    api_key = load_key("api.key", config_path, workspace_path)
+    try:
+        base_url = load_key("api.base_url", config_path, workspace_path) or None
+    except KeyError:
+        base_url = None
+    client_id = (api_key, base_url)
+    with _CLIENTS_LOCK:
+        if client_id not in _CLIENTS:
+            _CLIENTS[client_id] = LLMClient(
+                api_key,
+                base_url,
+                rpm=load_key("api.rpm", config_path, workspace_path),
+                tpm=load_key("api.tpm", config_path, workspace_path),
+                max_connections=load_key("api.max_connections", config_path, workspace_path),
+            )
+        return _CLIENTS[client_id]
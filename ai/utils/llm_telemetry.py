@@ -0,0 +1,145 @@
+import os
+import json
+import time
+import threading
+from typing import Dict, List, Tuple
+
+# use try-except to skip metrics when prometheus_client is not installed
+try:
+    from prometheus_client import Counter, Histogram
+except ImportError:
+    Counter = Histogram = None
+
+# ------------
+# per-call llm telemetry
+# ------------
+
+if Counter is not None:
+    LLM_CALLS = Counter("onevoice_llm_calls_total", "LLM calls by stage, response source and outcome", ["log_title", "source", "outcome"])
+    LLM_TOKENS = Counter("onevoice_llm_tokens_total", "LLM tokens by stage and kind", ["log_title", "kind"])
+    LLM_LATENCY = Histogram(
+        "onevoice_llm_latency_seconds", "LLM call latency by stage", ["log_title"],
+        buckets=(0.5, 1, 2, 5, 10, 20, 40, 80, 160, 320),
+    )
+else:
+    LLM_CALLS = LLM_TOKENS = LLM_LATENCY = None
+
+_TELEMETRY_LOCK = threading.Lock()
+
+def _telemetry_file(workspace_path: str) -> str:
+    return f"{workspace_path}/output/gpt_log/telemetry.jsonl"
+
+class LLMCall:
+    """
+    Records one ask_gpt attempt on exit: source (cache, batch, api, coalesced), outcome, latency and usage.
+
+    Attempts that raise count as outcome "error" (validation failures included), so retries
+    made by except_handler show up as extra failed attempts of the same log_title.
+    Requests deferred to a batch (BaseException) are not recorded. Coalesced calls waited
+    for an identical request in flight and carry no usage of their own.
+    """
+
+    def __init__(self, workspace_path: str, log_title: str, model: str):
+        self.workspace_path = workspace_path
+        self.log_title = log_title
+        self.model = model
+        self.source = "api"
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cached_tokens = 0
+        self.retries = 0
+
+    def set_usage(self, prompt_tokens: int = 0, completion_tokens: int = 0, cached_tokens: int = 0, retries: int = 0) -> None:
+        self.prompt_tokens, self.completion_tokens, self.cached_tokens, self.retries = prompt_tokens, completion_tokens, cached_tokens, retries
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None and not issubclass(exc_type, Exception):
+            return False
+        record = {
+            "time": time.time(),
+            "log_title": self.log_title,
+            "model": self.model,
+            "source": self.source,
+            "outcome": "ok" if exc_type is None else "error",
+            "latency": round(time.perf_counter() - self.started, 4),
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cached_tokens": self.cached_tokens,
+            "retries": self.retries,
+        }
+        _append(self.workspace_path, record)
+        _observe(record)
+        return False
+
+def _append(workspace_path: str, record: dict) -> None:
+    file = _telemetry_file(workspace_path)
+    line = json.dumps(record, ensure_ascii=False)
+    with _TELEMETRY_LOCK:
+        os.makedirs(os.path.dirname(file), exist_ok=True)
+        with open(file, 'a', encoding='utf-8') as f:
+            f.write(line + '\n')
+
+def _observe(record: dict) -> None:
+    if LLM_CALLS is None:
+        return
+    LLM_CALLS.labels(record["log_title"], record["source"], record["outcome"]).inc()
+    if record["source"] == "cache":
+        return
+    for kind in ("prompt_tokens", "completion_tokens", "cached_tokens"):
+        if record[kind]:
+            LLM_TOKENS.labels(record["log_title"], kind).inc(record[kind])
+    if record["source"] == "api":
+        LLM_LATENCY.labels(record["log_title"]).observe(record["latency"])
+
+# ------------
+# per-step aggregation
+# ------------
+
+def telemetry_offset(workspace_path: str) -> int:
+    """Current end of the workspace telemetry log, to read only the records of a step afterwards"""
+    file = _telemetry_file(workspace_path)
+    return os.path.getsize(file) if os.path.exists(file) else 0
+
+def read_telemetry(workspace_path: str, offset: int = 0) -> Tuple[List[dict], int]:
+    """Records appended since `offset`, and the new offset"""
+    file = _telemetry_file(workspace_path)
+    if not os.path.exists(file):
+        return [], offset
+    with _TELEMETRY_LOCK:
+        with open(file, 'r', encoding='utf-8') as f:
+            f.seek(offset)
+            lines = f.readlines()
+            end = f.tell()
+    return [json.loads(line) for line in lines if line.strip()], end
+
+def summarize_telemetry(records: List[dict]) -> Dict[str, dict]:
+    """
+    Aggregate telemetry records per log_title, plus a "total" entry
+
+    Each entry has calls, cache_hits, batch_hits, coalesced, errors (failed attempts, i.e. retries by
+    the caller), rate_limit_retries, token counts, and latency_sum / latency_max of API calls.
+    """
+    summary = {}
+    for record in records:
+        for title in (record["log_title"], "total"):
+            entry = summary.setdefault(title, {
+                "calls": 0, "cache_hits": 0, "batch_hits": 0, "coalesced": 0, "errors": 0, "rate_limit_retries": 0,
+                "prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0,
+                "latency_sum": 0.0, "latency_max": 0.0,
+            })
+            entry["calls"] += 1
+            entry["cache_hits"] += record["source"] == "cache"
+            entry["batch_hits"] += record["source"] == "batch"
+            entry["coalesced"] += record["source"] == "coalesced"
+            entry["errors"] += record["outcome"] != "ok"
+            entry["rate_limit_retries"] += record["retries"]
+            for kind in ("prompt_tokens", "completion_tokens", "cached_tokens"):
+                entry[kind] += record[kind]
+            if record["source"] == "api":
+                entry["latency_sum"] = round(entry["latency_sum"] + record["latency"], 4)
+                entry["latency_max"] = max(entry["latency_max"], record["latency"])
+    return summary
@@ -17,12 +17,18 @@ def get_4_1_terminology(workspace_path: str = ".") -> str:
 def get_4_2_translation(workspace_path: str = ".") -> str:
     return f"{workspace_path}/output/log/translation_results.xlsx"
 
+def get_4_2_translation_raw(workspace_path: str = ".") -> str:
+    return f"{workspace_path}/output/log/translation_raw.xlsx"
+
 def get_5_split_sub(workspace_path: str = ".") -> str:
     return f"{workspace_path}/output/log/translation_results_for_subtitles.xlsx"
 
 def get_5_remerged(workspace_path: str = ".") -> str:
     return f"{workspace_path}/output/log/translation_results_remerged.xlsx"
 
+def get_6_audio_timeline(workspace_path: str = ".") -> str:
+    return f"{workspace_path}/output/audio/subs_for_audio_timeline.xlsx"
+
 def get_8_1_audio_task(workspace_path: str = ".") -> str:
     return f"{workspace_path}/output/audio/tts_tasks.xlsx"
 
@@ -64,8 +70,10 @@ __all__ = [
     "get_3_2_split_by_meaning",
     "get_4_1_terminology",
     "get_4_2_translation",
+    "get_4_2_translation_raw",
     "get_5_split_sub",
     "get_5_remerged",
+    "get_6_audio_timeline",
     "get_8_1_audio_task",
     "get_output_dir",
     "get_audio_dir",
@@ -0,0 +1,126 @@
+import re
+import time
+import asyncio
+import threading
+
+# ------------
+# token bucket
+# ------------
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at `rate_per_minute`"""
+
+    def __init__(self, rate_per_minute: float, capacity: float = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float) -> float:
+        """Take `amount` tokens now and return how many seconds the caller must wait before using them"""
+        amount = min(amount, self.capacity)
+        with self.lock:
+            self._refill(time.monotonic())
+            self.tokens -= amount
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def refund(self, amount: float) -> None:
+        with self.lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+# ------------
+# requests + tokens per minute limiter
+# ------------
+
+_DURATION_PART = re.compile(r'(\d+(?:\.\d+)?)(ms|h|m|s)')
+_DURATION_UNITS = {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600}
+
+def parse_reset_duration(value) -> float:
+    """Parse rate-limit reset values such as '1s', '6m0s', '20ms' or plain seconds"""
+    if value is None:
+        return 0.0
+    value = str(value).strip()
+    try:
+        return float(value)
+    except ValueError:
+        return sum(float(n) * _DURATION_UNITS[unit] for n, unit in _DURATION_PART.findall(value))
+
+class RateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute limiter shared by every thread (and job) in the process.
+
+    Callers reserve capacity before a request, settle the token estimate once the real
+    usage is known, and feed response headers back so a 429 or an exhausted quota pauses
+    all callers instead of each one backing off on its own.
+    """
+
+    def __init__(self, rpm: float = 0, tpm: float = 0):
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _reserve(self, tokens: int) -> float:
+        wait = 0.0
+        if self.requests:
+            wait = max(wait, self.requests.reserve(1))
+        if self.tokens and tokens:
+            wait = max(wait, self.tokens.reserve(tokens))
+        with self._lock:
+            wait = max(wait, self._paused_until - time.monotonic())
+        return wait
+
+    def acquire(self, tokens: int = 0) -> None:
+        wait = self._reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens: int = 0) -> None:
+        wait = self._reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def adjust_tokens(self, delta: int) -> None:
+        """Settle a reservation: positive delta consumes more tokens, negative refunds"""
+        if not self.tokens or not delta:
+            return
+        if delta > 0:
+            self.tokens.reserve(delta)
+        else:
+            self.tokens.refund(-delta)
+
+    def pause(self, seconds: float) -> None:
+        """Block every caller for `seconds`"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def observe(self, headers) -> None:
+        """Pause until reset when the provider reports an exhausted request or token quota"""
+        if headers is None:
+            return
+        for kind in ('requests', 'tokens'):
+            remaining = headers.get(f'x-ratelimit-remaining-{kind}')
+            if remaining is not None and str(remaining).strip() in ('0', '0.0'):
+                self.pause(parse_reset_duration(headers.get(f'x-ratelimit-reset-{kind}')))
+
+    def backoff(self, headers, attempt: int) -> float:
+        """Pause after a 429, honouring retry-after headers, and return the pause length"""
+        wait = None
+        if headers is not None:
+            if headers.get('retry-after-ms'):
+                wait = float(headers.get('retry-after-ms')) / 1000
+            elif headers.get('retry-after'):
+                wait = parse_reset_duration(headers.get('retry-after'))
+            else:
+                wait = max(parse_reset_duration(headers.get('x-ratelimit-reset-requests')),
+                           parse_reset_duration(headers.get('x-ratelimit-reset-tokens'))) or None
+        if wait is None:
+            wait = 2 ** attempt
+        self.pause(wait)
+        return wait
@@ -0,0 +1,84 @@
+import re
+import numpy as np
+import pandas as pd
+
+# ------------
+# srt time codec
+# ------------
+
+# HH:MM:SS,mmm (srt) or HH:MM:SS.mmm (task files written before times were stored as seconds)
+_TIME_PATTERN = r'^\s*(\d+):(\d{1,2}):(\d{1,2})(?:[,.](\d{1,3}))?\s*$'
+
+def to_milliseconds(seconds) -> np.ndarray:
+    """Float seconds to integer milliseconds, rounded once so formatting never drifts"""
+    return np.rint(np.asarray(seconds, dtype=float) * 1000).astype(np.int64)
+
+def format_times(seconds, separator: str = ',') -> np.ndarray:
+    """Vectorized float seconds -> 'HH:MM:SS,mmm'"""
+    ms = np.maximum(to_milliseconds(seconds), 0)
+    hours, ms = np.divmod(ms, 3_600_000)
+    minutes, ms = np.divmod(ms, 60_000)
+    secs, ms = np.divmod(ms, 1000)
+    return np.array([f"{h:02d}:{m:02d}:{s:02d}{separator}{x:03d}" for h, m, s, x in zip(hours.tolist(), minutes.tolist(), secs.tolist(), ms.tolist())], dtype=object)
+
+def format_time(seconds: float, separator: str = ',') -> str:
+    return format_times([seconds], separator)[0]
+
+def parse_times(values) -> np.ndarray:
+    """
+    Vectorized srt times -> float seconds
+
+    Numbers are taken as seconds already, strings may use ',' or '.' before the milliseconds.
+    Raises ValueError on anything else.
+    """
+    series = pd.Series(values, dtype=object)
+    numeric = pd.to_numeric(series, errors='coerce')
+    is_text = numeric.isna() & series.notna()
+    if not is_text.any():
+        return numeric.to_numpy(dtype=float)
+
+    parts = series[is_text].astype(str).str.extract(_TIME_PATTERN)
+    if parts[[0, 1, 2]].isna().any(axis=None):
+        bad = series[is_text][parts[0].isna()].iloc[0]
+        raise ValueError(f"Invalid srt time: {bad!r}")
+    ms = parts[3].fillna('0').str.ljust(3, '0').astype(np.int64)
+    seconds = parts[0].astype(np.int64) * 3600 + parts[1].astype(np.int64) * 60 + parts[2].astype(np.int64) + ms / 1000
+    numeric[is_text] = seconds
+    return numeric.to_numpy(dtype=float)
+
+def parse_time(value) -> float:
+    return float(parse_times([value])[0])
+
+# ------------
+# srt documents
+# ------------
+
+def parse_srt(content: str) -> pd.DataFrame:
+    """
+    Parse srt content into a DataFrame with number, start, end (seconds) and text
+
+    Blocks with fewer than three lines are skipped. Multi-line text is joined with spaces.
+    """
+    numbers, times, texts = [], [], []
+    for block in re.split(r'\n\s*\n', content.strip()):
+        lines = [line.strip() for line in block.split('\n') if line.strip()]
+        if len(lines) < 3 or ' --> ' not in lines[1]:
+            continue
+        numbers.append(int(lines[0]))
+        times.append(lines[1].split(' --> '))
+        texts.append(' '.join(lines[2:]))
+    times = np.array(times, dtype=object).reshape(-1, 2)
+    return pd.DataFrame({
+        'number': numbers,
+        'start': parse_times(times[:, 0]),
+        'end': parse_times(times[:, 1]),
+        'text': texts,
+    })
+
+def format_srt(starts, ends, texts) -> str:
+    """Render srt content, `texts` items may be multi-line"""
+    start_strs, end_strs = format_times(starts), format_times(ends)
+    return '\n\n'.join(
+        f"{i}\n{start} --> {end}\n{text}"
+        for i, (start, end, text) in enumerate(zip(start_strs, end_strs, texts), 1)
+    )
@@ -0,0 +1,107 @@
+import os
+import json
+import threading
+from collections import OrderedDict, deque
+from typing import List, Optional
+
+# ------------
+# aho-corasick terminology index
+# ------------
+
+class TermIndex:
+    """
+    Multi-pattern matcher over terminology `src` strings, case-folded.
+
+    Builds an Aho–Corasick automaton once, so finding every term that occurs in a
+    text is a single pass over the text regardless of glossary size.
+    """
+
+    def __init__(self, terms: List[dict]):
+        self.terms = terms
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        for term_idx, term in enumerate(terms):
+            pattern = str(term.get('src', '')).lower()
+            if pattern:
+                self._add(pattern, term_idx)
+        self._build()
+
+    def _add(self, pattern: str, term_idx: int) -> None:
+        node = 0
+        for char in pattern:
+            nxt = self._goto[node].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][char] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append(term_idx)
+
+    def _build(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, nxt in self._goto[node].items():
+                queue.append(nxt)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(char, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find(self, text: str) -> List[int]:
+        """Indices of terms whose `src` occurs in text, in terminology order"""
+        found = set()
+        node = 0
+        goto, fail, out = self._goto, self._fail, self._out
+        for char in str(text).lower():
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if out[node]:
+                found.update(out[node])
+        return sorted(found)
+
+    def format_prompt(self, text: str) -> Optional[str]:
+        """Numbered "src": "tgt", meaning: note lines for terms found in text, or None"""
+        matched = self.find(text)
+        if not matched:
+            return None
+        return '\n'.join(
+            f'{i+1}. "{self.terms[i]["src"]}": "{self.terms[i]["tgt"]}",'
+            f' meaning: {self.terms[i]["note"]}'
+            for i in matched
+        )
+
+_INDEXES = OrderedDict()
+_INDEXES_LOCK = threading.Lock()
+TERM_INDEX_CACHE_SIZE = 8
+
+def load_term_index(terminology_file: str) -> Optional[TermIndex]:
+    """
+    Load terminology.json into a TermIndex, reused until the file changes
+
+    Args:
+        terminology_file: Path to terminology.json
+    """
+    if not os.path.exists(terminology_file):
+        return None
+    stat = os.stat(terminology_file)
+    index_id = os.path.abspath(terminology_file)
+    version = (stat.st_mtime_ns, stat.st_size)
+    with _INDEXES_LOCK:
+        cached = _INDEXES.get(index_id)
+        if cached and cached[0] == version:
+            _INDEXES.move_to_end(index_id)
+            return cached[1]
+        with open(terminology_file, 'r', encoding='utf-8') as file:
+            terms = json.load(file).get('terms', [])
+        index = TermIndex(terms)
+        _INDEXES[index_id] = (version, index)
+        _INDEXES.move_to_end(index_id)
+        while len(_INDEXES) > TERM_INDEX_CACHE_SIZE:
+            _INDEXES.popitem(last=False)
+        return index
@@ -0,0 +1,205 @@
+import os
+import re
+import time
+import random
+import sqlite3
+import hashlib
+import threading
+from difflib import SequenceMatcher
+from typing import List, Optional, Tuple
+from ai.utils.config_utils import load_key
+
+# ------------
+# minhash signatures for fuzzy lookup
+# ------------
+
+NUM_PERM = 32
+BANDS = 8
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 3
+_PRIME = (1 << 61) - 1
+_rng = random.Random(20240801)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+_SENTENCE_END = re.compile(r'[^\w\s]+$')
+
+def sentence_end(text: str) -> str:
+    """Trailing punctuation of a line ('?' in "Really?"), '' if none"""
+    match = _SENTENCE_END.search(str(text).strip())
+    return match.group() if match else ''
+
+def normalize_line(text: str) -> str:
+    """Lowercase, drop inner punctuation and collapse whitespace, keeping sentence-final punctuation"""
+    text = str(text).lower().strip()
+    body = re.sub(r'[^\w\s]', '', text)
+    body = re.sub(r'\s+', ' ', body).strip()
+    return body + sentence_end(text) if body else ''
+
+def get_terms_id(workspace_path: str = ".") -> str:
+    """Hash of the job's custom terms file, '' without one, so lines translated under other glossaries don't match"""
+    from ai.utils.workspace_utils import get_workspace_custom_terms_path
+    terms_path = get_workspace_custom_terms_path(workspace_path)
+    if not os.path.exists(terms_path):
+        return ''
+    with open(terms_path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:16]
+
+def _shingles(text: str) -> set:
+    if len(text) <= SHINGLE_SIZE:
+        return {text}
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+def minhash(text: str) -> List[int]:
+    hashes = [int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=8).digest(), 'little') for s in _shingles(text)]
+    return [min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMUTATIONS]
+
+def band_keys(text: str) -> List[str]:
+    """LSH band keys: lines sharing any band are fuzzy-match candidates"""
+    signature = minhash(text)
+    keys = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS:(band + 1) * ROWS]
+        digest = hashlib.blake2b(repr(rows).encode('utf-8'), digest_size=8).hexdigest()
+        keys.append(f"{band}:{digest}")
+    return keys
+
+# ------------
+# translation memory store
+# ------------
+
+_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS memory (
+        src_lang TEXT NOT NULL,
+        tgt_lang TEXT NOT NULL,
+        terms_id TEXT NOT NULL,
+        norm_src TEXT NOT NULL,
+        src TEXT,
+        tgt TEXT,
+        updated_at REAL NOT NULL,
+        PRIMARY KEY (src_lang, tgt_lang, terms_id, norm_src)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS memory_bands (
+        src_lang TEXT NOT NULL,
+        tgt_lang TEXT NOT NULL,
+        terms_id TEXT NOT NULL,
+        band TEXT NOT NULL,
+        norm_src TEXT NOT NULL,
+        PRIMARY KEY (src_lang, tgt_lang, terms_id, band, norm_src)
+    )
+    """,
+]
+
+class TranslationMemory:
+    """
+    Cross-job translation memory keyed by (source language, target language, custom terms, normalized line).
+
+    Exact hits are a primary-key read. Fuzzy hits come from a MinHash LSH band index,
+    verified with SequenceMatcher against `fuzzy_threshold`.
+    """
+
+    def __init__(self, db_path: str, fuzzy_threshold: float = 1.0):
+        self.db_path = db_path
+        self.fuzzy_threshold = fuzzy_threshold
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        with self._connect() as conn:
+            for statement in _SCHEMA:
+                conn.execute(statement)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _lookup_fuzzy(self, conn, src_lang: str, tgt_lang: str, terms_id: str, norm: str) -> Optional[str]:
+        keys = band_keys(norm)
+        placeholders = ','.join('?' * len(keys))
+        candidates = conn.execute(
+            f"SELECT DISTINCT m.norm_src, m.tgt FROM memory_bands b JOIN memory m "
+            f"ON m.src_lang = b.src_lang AND m.tgt_lang = b.tgt_lang AND m.terms_id = b.terms_id AND m.norm_src = b.norm_src "
+            f"WHERE b.src_lang = ? AND b.tgt_lang = ? AND b.terms_id = ? AND b.band IN ({placeholders})",
+            (src_lang, tgt_lang, terms_id, *keys),
+        ).fetchall()
+        best, best_score = None, self.fuzzy_threshold
+        for cand_norm, tgt in candidates:
+            # a question never reuses the translation of a statement
+            if sentence_end(cand_norm) != sentence_end(norm):
+                continue
+            score = SequenceMatcher(None, norm, cand_norm).ratio()
+            if score >= best_score:
+                best, best_score = tgt, score
+        return best
+
+    def lookup(self, src_lang: str, tgt_lang: str, lines: List[str], terms_id: str = '') -> List[Optional[str]]:
+        """Translation for each line, or None where the memory has no exact or fuzzy hit"""
+        conn = self._connect()
+        results = []
+        for line in lines:
+            norm = normalize_line(line)
+            if not norm:
+                results.append(None)
+                continue
+            row = conn.execute(
+                "SELECT tgt FROM memory WHERE src_lang = ? AND tgt_lang = ? AND terms_id = ? AND norm_src = ?",
+                (src_lang, tgt_lang, terms_id, norm),
+            ).fetchone()
+            if row is not None:
+                results.append(row[0])
+            elif self.fuzzy_threshold < 1:
+                results.append(self._lookup_fuzzy(conn, src_lang, tgt_lang, terms_id, norm))
+            else:
+                results.append(None)
+        return results
+
+    def add(self, src_lang: str, tgt_lang: str, pairs: List[Tuple[str, str]], terms_id: str = '') -> int:
+        """Store (source line, translation) pairs, return the number stored"""
+        now = time.time()
+        stored = 0
+        with self._connect() as conn:
+            for src, tgt in pairs:
+                norm = normalize_line(src)
+                if not norm or not str(tgt).strip():
+                    continue
+                conn.execute(
+                    "INSERT OR REPLACE INTO memory (src_lang, tgt_lang, terms_id, norm_src, src, tgt, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (src_lang, tgt_lang, terms_id, norm, src, tgt, now),
+                )
+                conn.executemany(
+                    "INSERT OR IGNORE INTO memory_bands (src_lang, tgt_lang, terms_id, band, norm_src) VALUES (?, ?, ?, ?, ?)",
+                    [(src_lang, tgt_lang, terms_id, key, norm) for key in band_keys(norm)],
+                )
+                stored += 1
+        return stored
+
+_MEMORIES = {}
+_MEMORIES_LOCK = threading.Lock()
+
+def get_translation_memory(workspace_path: str = ".", config_path: str = None) -> Optional[TranslationMemory]:
+    """
+    Get the shared translation memory, or None when disabled
+
+    Args:
+        workspace_path: Path to workspace directory
+        config_path: Path to config file (optional)
+    """
+    tm_set = load_key("translation_memory", config_path, workspace_path)
+    if not tm_set["enabled"]:
+        return None
+    memory_id = (os.path.abspath(tm_set["path"]), tm_set["fuzzy_threshold"])
+    with _MEMORIES_LOCK:
+        if memory_id not in _MEMORIES:
+            _MEMORIES[memory_id] = TranslationMemory(tm_set["path"], tm_set["fuzzy_threshold"])
+        return _MEMORIES[memory_id]
+
+def get_language_pair(workspace_path: str = ".", config_path: str = None) -> Tuple[str, str]:
+    """(source language, target language) of the job"""
+    whisper_language = load_key("whisper.language", config_path, workspace_path)
+    src_lang = load_key("whisper.detected_language", config_path, workspace_path) if whisper_language == 'auto' else whisper_language
+    return src_lang, load_key("target_language", config_path, workspace_path)
@@ -47,6 +47,7 @@ class Settings(BaseSettings):
     SQS_QUEUE_URL: Optional[str] = Field(default=None, description="기본 SQS 큐 URL")
     SQS_WAIT_TIME_SECONDS: int = Field(default=20, description="SQS 롱폴링 대기 시간(초)")
     SQS_VISIBILITY_TIMEOUT: int = Field(default=900, description="SQS 메시지 가시성 타임아웃(초)")
+    WORKER_METRICS_PORT: int = Field(default=0, description="SQS 워커의 Prometheus 메트릭 포트 (0이면 비활성)")
     
     # 이메일/알림 설정 (SES/SNS)
     SES_ENABLED: bool = Field(default=True, description="Amazon SES 사용 여부")
@@ -111,7 +111,7 @@ class JobStep(BaseModel):
         String(20), 
         nullable=False, 
         default="pending"
-    )  # pending, processing, completed, failed, skipped
+    )  # pending, processing, waiting(LLM 배치 대기), completed, failed, skipped
     
     # 진행률
     progress: Mapped[float] = mapped_column(Float, default=0.0, nullable=False)  # 0.0 ~ 100.0
@@ -27,7 +27,7 @@ class QueueConsumer:
         message_type = message.get("MessageAttributes", {}).get("messageType", {}).get("StringValue")
         job_id = message.get("MessageAttributes", {}).get("jobId", {}).get("StringValue") or body.get("jobId")
 
-        if message_type == "DUBBING_JOB" and job_id:
+        if message_type in ("DUBBING_JOB", "DUBBING_RESUME") and job_id:
             # idempotency guard
             from app.core.database import get_async_session
             async with get_async_session() as db:
@@ -37,7 +37,11 @@ class QueueConsumer:
                 if job.status in ["completed", "failed", "cancelled"]:
                     return
 
-            await DubbingService.execute_dubbing_pipeline(job_id)
+            if message_type == "DUBBING_RESUME":
+                # LLM 배치 대기 중이던 단계부터 재개
+                await DubbingService.resume_dubbing_pipeline(job_id, batch_resume=True)
+            else:
+                await DubbingService.execute_dubbing_pipeline(job_id)
 
     async def run_once(self) -> Optional[Dict[str, Any]]:
         if not self.queue_url:
@@ -1,6 +1,6 @@
 from typing import Dict
 
-from app.queue.message_models import DubbingJobMessage
+from app.queue.message_models import DubbingJobMessage, DubbingResumeMessage
 from app.queue.sqs_client import sqs_client
 
 
@@ -9,4 +9,9 @@ async def enqueue_dubbing_job(job_id: str, user_id: str, video_id: str) -> None:
     sqs_client.send_message(payload=message.model_dump(), message_type=message.messageType, attributes={"jobId": job_id, "userId": user_id, "videoId": video_id})
 
 
+async def enqueue_dubbing_resume(job_id: str, user_id: str, video_id: str, delay_seconds: int = 0) -> None:
+    message = DubbingResumeMessage(jobId=job_id, userId=user_id, videoId=video_id)
+    sqs_client.send_message(payload=message.model_dump(), message_type=message.messageType, attributes={"jobId": job_id, "userId": user_id, "videoId": video_id}, delay_seconds=delay_seconds)
+
+
 
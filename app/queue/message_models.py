@@ -12,4 +12,12 @@ class DubbingJobMessage(BaseModel):
     requestedAt: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
 
 
+class DubbingResumeMessage(BaseModel):
+    messageType: str = Field(default="DUBBING_RESUME")
+    jobId: str
+    userId: str
+    videoId: str
+    requestedAt: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
+
+
 
@@ -19,7 +19,7 @@ class SQSClient:
         self.client = boto3.client("sqs", **session_kwargs, **client_kwargs)
         self.queue_url: Optional[str] = settings.SQS_QUEUE_URL
 
-    def send_message(self, payload: Dict[str, Any], message_type: str, attributes: Optional[Dict[str, Any]] = None) -> None:
+    def send_message(self, payload: Dict[str, Any], message_type: str, attributes: Optional[Dict[str, Any]] = None, delay_seconds: int = 0) -> None:
         if not self.queue_url:
             raise RuntimeError("SQS_QUEUE_URL is not configured")
 
@@ -37,6 +37,8 @@ class SQSClient:
             QueueUrl=self.queue_url,
             MessageBody=json.dumps(payload),
             MessageAttributes=message_attributes,
+            # SQS allows at most 15 minutes of delivery delay
+            DelaySeconds=max(0, min(int(delay_seconds), 900)),
         )
 
 
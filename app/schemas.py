@@ -322,6 +322,15 @@ class DubRequest(BaseModel):
     target_language: StrictStr
     voice_id: StrictStr
     preserve_background_music: Optional[StrictBool] = True
+    translate_mode: Optional[StrictStr] = None
+
+    @field_validator('translate_mode')
+    def translate_mode_validate_enum(cls, value):
+        if value is None:
+            return value
+        if value not in ('two_pass', 'single_pass',):
+            raise ValueError("must be one of enum values ('two_pass', 'single_pass')")
+        return value
 
 class DubResponse(BaseModel):
     """더빙 응답"""
@@ -376,8 +385,8 @@ class JobStep(BaseModel):
     def step_status_validate_enum(cls, value):
         if value is None:
             return value
-        if value not in ('pending', 'processing', 'completed', 'failed', 'skipped',):
-            raise ValueError("must be one of enum values ('pending', 'processing', 'completed', 'failed', 'skipped')")
+        if value not in ('pending', 'processing', 'waiting', 'completed', 'failed', 'skipped',):
+            raise ValueError("must be one of enum values ('pending', 'processing', 'waiting', 'completed', 'failed', 'skipped')")
         return value
 
 
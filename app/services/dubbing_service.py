@@ -20,10 +20,14 @@ from app.services.storage_service import storage_service
 from app.services.notification_service import NotificationService
 from app.config import get_settings
 from app.schemas import DubRequest, DubResponse
+from ai.utils.llm_batch import BatchPending, run_batched, export_batch_state, restore_batch_state
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
 
+# 로컬 모드에서 LLM 배치 완료를 기다리는 재개 태스크
+_RESUME_TASKS = set()
+
 
 class DubbingService:
     """AI 더빙 파이프라인 오케스트레이션 서비스
@@ -147,6 +151,11 @@ class DubbingService:
         }
     ]
 
+    # job_config 키 → 작업공간 config.yaml 키
+    JOB_CONFIG_OVERRIDES = {
+        "translate_mode": "translate_mode",
+    }
+
     @staticmethod
     async def start_dubbing_job(
         db: AsyncSession,
@@ -178,6 +187,8 @@ class DubbingService:
             "preserve_background_music": dub_request.preserve_background_music,
             "tts_method": "openai_tts",
         }
+        if dub_request.translate_mode:
+            job_config["translate_mode"] = dub_request.translate_mode
 
         try:
             # Job 생성
@@ -253,6 +264,7 @@ class DubbingService:
                 
                 # 4. 설정 파일 복사 (파일 I/O)
                 await DubbingService._copy_config_files(workspace)
+                await DubbingService._apply_job_config(job, workspace)
                 logger.info("Config files copied")
                 
                 # 5. 작업 단계 생성 (진행률 추적)
@@ -268,14 +280,20 @@ class DubbingService:
                 await DubbingService._finalize_dubbing(db, job, workspace)
                 logger.info("Dubbing pipeline completed successfully")
                 
+            except BatchPending as e:
+                # LLM 배치 대기: 워커를 점유하지 않고 재개 예약
+                await DubbingService._schedule_resume(job, e.poll_after)
             except Exception as e:
                 logger.error(f"Dubbing pipeline failed for job {job_id}: {str(e)}")
                 await DubbingService._handle_pipeline_error(db, job_id, str(e))
                 raise
 
     @staticmethod
-    async def resume_dubbing_pipeline(job_id: str) -> None:
-        """더빙 파이프라인 재개 (오케스트레이션)"""
+    async def resume_dubbing_pipeline(job_id: str, batch_resume: bool = False) -> None:
+        """더빙 파이프라인 재개 (오케스트레이션)
+
+        batch_resume: LLM 배치 대기 후 예약된 재개 (SQS/로컬 공통), 그 사이 종료된 작업은 재개하지 않음
+        """
         from sqlalchemy.ext.asyncio import AsyncSession
         from app.core.database import get_async_session
         
@@ -285,6 +303,10 @@ class DubbingService:
                 job = await JobService.get_job(db, job_id)
                 if not job:
                     raise HTTPException(status_code=404, detail="Job not found")
+                # idempotency: 배치 대기 중 취소/실패/완료된 작업은 되살리지 않음
+                if batch_resume and job.status in ["completed", "failed", "cancelled"]:
+                    logger.info(f"Skip batch resume for terminal job {job_id} with status {job.status}")
+                    return
                 
                 logger.info(f"Resuming dubbing pipeline for job {job_id}")
 
@@ -301,14 +323,16 @@ class DubbingService:
                     await db.rollback()
                     logger.warning(f"Failed to reset job state for resume: {str(_e)}")
                 
-                # 2. 작업공간 경로 확인
+                # 2. 작업공간 경로 확인 (SQS 재개 메시지는 다른 워커가 받을 수 있음)
                 workspace = f"workspaces/{job_id}"
-                if not os.path.exists(workspace):
+                workspace_recreated = not os.path.exists(workspace)
+                if workspace_recreated:
                     logger.info(f"Workspace not found for job {job_id}. Recreating workspace and redownloading source video.")
                     workspace = await DubbingService._setup_workspace(job)
                     # 소스 비디오 재다운로드 및 설정 파일 복사
                     await DubbingService._download_source_video(job, workspace)
                     await DubbingService._copy_config_files(workspace)
+                    await DubbingService._apply_job_config(job, workspace)
                 
                 # 3. 실패한 단계부터 재개
                 from sqlalchemy import select
@@ -319,8 +343,14 @@ class DubbingService:
                 )
                 steps = result.scalars().all()
                 
-                # 실패한 단계 찾기 및 상태 정리
-                failed_steps = [step for step in steps if step.status == "failed"]
+                # 대기 중인 LLM 배치는 작업 행에 저장된 상태로 복원 (같은 배치를 다시 제출하지 않도록)
+                for step in steps:
+                    if step.status == "waiting" and step.extra_metadata:
+                        await asyncio.to_thread(restore_batch_state, workspace, step.extra_metadata.get("llm_batch"))
+
+                # 실패(또는 LLM 배치 대기) 단계 찾기 및 상태 정리
+                waiting_steps = {step.step_name for step in steps if step.status == "waiting"}
+                failed_steps = [step for step in steps if step.status in ("failed", "waiting")]
                 if failed_steps:
                     # 실패 단계 상태 초기화
                     for s in failed_steps:
@@ -332,16 +362,26 @@ class DubbingService:
                     await db.commit()
 
                 # 재실행 대상 결정: 실패 단계가 없으면 전체 재실행
+                completed_steps = {step.step_name for step in steps if step.status == "completed"}
+                rerun_completed = False
                 if not failed_steps:
                     logger.info(f"No failed steps found. Rerunning full pipeline for job {job_id}.")
                     steps_to_run = DubbingService.DUBBING_STEPS
-                else:
+                elif not waiting_steps:
                     # 실패한 개별 단계만 재실행 (정책상 필요한 경우 전체 재실행으로 변경 가능)
                     steps_to_run = []
                     for failed_step in failed_steps:
                         cfg = next((s for s in DubbingService.DUBBING_STEPS if s["name"] == failed_step.step_name), None)
                         if cfg:
                             steps_to_run.append(cfg)
+                elif workspace_recreated:
+                    # LLM 배치 대기 작업: 완료 단계의 출력은 이전 워커의 작업공간에만 있으므로 다시 생성
+                    logger.info(f"Workspace was recreated. Rerunning completed steps for job {job_id}.")
+                    steps_to_run = DubbingService.DUBBING_STEPS
+                    rerun_completed = True
+                else:
+                    # LLM 배치 대기 작업: 대기 단계와 그 이후 미완료 단계를 순서대로 재실행
+                    steps_to_run = [cfg for cfg in DubbingService.DUBBING_STEPS if cfg["name"] not in completed_steps]
 
                 # 진행률 일관성 정리: 현재 단계 기준으로 재계산
                 try:
@@ -361,13 +401,18 @@ class DubbingService:
                     except Exception as _e:
                         logger.warning(f"Failed to check cancel state before step {step_config['name']}: {str(_e)}")
 
-                    await DubbingService._execute_step(db, job_id, step_config, workspace)
+                    # 다시 만드는 완료 단계는 동기 실행 (새 배치를 기다리면 재개가 반복됨)
+                    allow_batch = not (rerun_completed and step_config["name"] in completed_steps)
+                    await DubbingService._execute_step(db, job_id, step_config, workspace, allow_batch)
                     logger.info(f"Resumed step: {step_config['name']}")
                 
                 # 4. 최종 처리
                 await DubbingService._finalize_dubbing(db, job, workspace)
                 logger.info("Dubbing pipeline resumed successfully")
                 
+            except BatchPending as e:
+                # LLM 배치 대기: 워커를 점유하지 않고 재개 예약
+                await DubbingService._schedule_resume(job, e.poll_after)
             except Exception as e:
                 logger.error(f"Resume dubbing pipeline failed for job {job_id}: {str(e)}")
                 await DubbingService._handle_pipeline_error(db, job_id, str(e))
@@ -447,6 +492,24 @@ class DubbingService:
             logger.error(f"Failed to copy config files: {str(e)}")
             raise Exception(f"설정 파일 복사 실패: {str(e)}")
 
+    @staticmethod
+    async def _apply_job_config(job: Job, workspace: str) -> None:
+        """작업별 설정을 작업공간 config.yaml에 반영 (파일 I/O)"""
+        from ai.utils.config_utils import load_key, update_key
+        from ai.utils.workspace_utils import get_workspace_config_path
+
+        config_path = get_workspace_config_path(workspace)
+        job_config = job.job_config or {}
+        for job_key, config_key in DubbingService.JOB_CONFIG_OVERRIDES.items():
+            if job_config.get(job_key) is not None:
+                update_key(config_key, job_config[job_key], config_path)
+                logger.info(f"Job config applied: {config_key}={job_config[job_key]}")
+
+        # LLM 배치 모드는 전역 설정이 켜져 있을 때 우선순위가 낮은 작업에만 적용
+        if load_key("llm_batch.enabled", config_path) and job.priority < load_key("llm_batch.min_priority", config_path):
+            update_key("llm_batch.enabled", False, config_path)
+            logger.info(f"Job config applied: llm_batch.enabled=False (priority {job.priority})")
+
     @staticmethod
     async def _create_job_steps(db: AsyncSession, job_id: str) -> None:
         """작업 단계 생성 (진행률 추적)"""
@@ -466,9 +529,11 @@ class DubbingService:
         await db.commit()
 
     @staticmethod
-    async def _execute_step(db: AsyncSession, job_id: str, step_config: Dict[str, Any], workspace: str) -> None:
-        """개별 파이프라인 단계 실행 (오케스트레이션)"""
+    async def _execute_step(db: AsyncSession, job_id: str, step_config: Dict[str, Any], workspace: str, allow_batch: bool = True) -> None:
+        """개별 파이프라인 단계 실행 (오케스트레이션, allow_batch=False면 LLM 배치 모드를 쓰지 않음)"""
         step_name = step_config["name"]
+        from ai.utils.llm_telemetry import telemetry_offset
+        telemetry_start = await asyncio.to_thread(telemetry_offset, workspace)
         
         try:
             logger.info(f"Starting step: {step_name}")
@@ -479,11 +544,12 @@ class DubbingService:
             )
             
             # AI 모듈 실행 (오케스트레이션)
-            await DubbingService._run_ai_module(step_config, workspace)
+            await DubbingService._run_ai_module(step_config, workspace, allow_batch)
             
-            # 단계 완료 (진행률 추적)
+            # 단계 완료 (진행률 추적, LLM 사용량 기록, 배치 상태 정리)
             await JobService.update_step_status(
-                db, job_id, step_name, "completed", 100.0
+                db, job_id, step_name, "completed", 100.0,
+                extra_metadata={**(await DubbingService._llm_step_metadata(workspace, telemetry_start) or {}), "llm_batch": None}
             )
             
             # 전체 진행률 업데이트 (진행률 추적)
@@ -491,13 +557,26 @@ class DubbingService:
             
             logger.info(f"Step completed: {step_name}")
             
+        except BatchPending as e:
+            # LLM 배치 제출됨: 단계는 대기 상태로 두고 상위에서 재개 예약
+            # 배치 상태는 작업 행에 저장: 재개 메시지를 다른 워커가 받아도 같은 배치를 이어서 확인
+            logger.info(f"Step waiting for LLM batch: {step_name} ({e.batch_id})")
+            await JobService.update_step_status(
+                db, job_id, step_name, "waiting", 0.0,
+                extra_metadata={
+                    **(await DubbingService._llm_step_metadata(workspace, telemetry_start) or {}),
+                    "llm_batch": await asyncio.to_thread(export_batch_state, workspace),
+                }
+            )
+            raise
         except Exception as e:
             logger.error(f"Step failed: {step_name} - {str(e)}")
             
             # 단계 실패 (에러 처리)
             await JobService.update_step_status(
                 db, job_id, step_name, "failed", 0.0,
-                error_message=str(e)
+                error_message=str(e),
+                extra_metadata=await DubbingService._llm_step_metadata(workspace, telemetry_start)
             )
             
             # 알림 발송 (알림)
@@ -506,7 +585,27 @@ class DubbingService:
             raise Exception(f"{step_name} 단계 실패: {str(e)}")
 
     @staticmethod
-    async def _run_ai_module(step_config: Dict[str, Any], workspace: str) -> None:
+    async def _llm_step_metadata(workspace: str, offset: int) -> Optional[Dict[str, Any]]:
+        """단계 실행 중 기록된 LLM 텔레메트리를 log_title별로 집계 (호출이 없으면 None)"""
+        from ai.utils.llm_telemetry import read_telemetry, summarize_telemetry
+
+        try:
+            records, _ = await asyncio.to_thread(read_telemetry, workspace, offset)
+        except Exception as e:
+            logger.warning(f"Failed to read LLM telemetry: {e}")
+            return None
+        if not records:
+            return None
+        summary = summarize_telemetry(records)
+        total = summary["total"]
+        logger.info(
+            f"LLM usage: {total['calls']} calls ({total['cache_hits']} cached, {total['errors']} failed), "
+            f"{total['prompt_tokens']}+{total['completion_tokens']} tokens, {total['latency_sum']:.1f}s"
+        )
+        return {"llm": summary}
+
+    @staticmethod
+    async def _run_ai_module(step_config: Dict[str, Any], workspace: str, allow_batch: bool = True) -> None:
         """AI 모듈 실행 (오케스트레이션)"""
         try:
             # 동적 모듈 import
@@ -540,13 +639,44 @@ class DubbingService:
                 
                 if asyncio.iscoroutinefunction(function):
                     await function(**call_kwargs)
+                elif allow_batch and DubbingService._is_batch_step(step_config["name"], config_path):
+                    # 저우선순위 작업: LLM 요청을 모아 배치로 제출 (BatchPending 발생 시 단계 대기)
+                    await asyncio.to_thread(run_batched, function, call_kwargs, step_config["name"], workspace, config_path)
                 else:
                     await asyncio.to_thread(function, **call_kwargs)
                 
+        except BatchPending:
+            raise
         except Exception as e:
             logger.error(f"AI module execution failed: {step_config['module']}.{step_config['function']} - {str(e)}")
             raise Exception(f"AI 모듈 실행 실패 ({step_config['module']}.{step_config['function']}): {str(e)}")
 
+    @staticmethod
+    def _is_batch_step(step_name: str, config_path: str) -> bool:
+        """작업공간 설정 기준 LLM 배치 모드 대상 단계 여부"""
+        from ai.utils.config_utils import load_key
+
+        batch_set = load_key("llm_batch", config_path)
+        return bool(batch_set["enabled"]) and step_name in batch_set["steps"]
+
+    @staticmethod
+    async def _schedule_resume(job: Job, delay: float) -> None:
+        """LLM 배치 완료 후 재개 예약 (SQS 지연 메시지 또는 로컬 지연 태스크)"""
+        logger.info(f"Job {job.id} waiting for LLM batch, resuming in {delay:.0f}s")
+        if settings.USE_SQS_TASK_QUEUE:
+            from app.queue.dispatcher import enqueue_dubbing_resume
+            await enqueue_dubbing_resume(job.id, job.user_id, job.video_id, int(delay))
+        else:
+            # 대기 중인 태스크가 GC되지 않도록 참조 유지
+            task = asyncio.create_task(DubbingService._resume_after(job.id, delay))
+            _RESUME_TASKS.add(task)
+            task.add_done_callback(_RESUME_TASKS.discard)
+
+    @staticmethod
+    async def _resume_after(job_id: str, delay: float) -> None:
+        await asyncio.sleep(delay)
+        await DubbingService.resume_dubbing_pipeline(job_id, batch_resume=True)
+
     @staticmethod
     async def _update_overall_progress(db: AsyncSession, job_id: str) -> None:
         """전체 진행률 업데이트를 JobService의 가중치 기반 로직으로 위임"""
@@ -575,7 +705,10 @@ class DubbingService:
             # 4. 완료 알림 발송 (알림)
             await DubbingService._send_completion_notification(job.id)
             
-            # 5. 작업공간 정리 (인프라)
+            # 5. 번역 메모리 갱신 (다음 작업에서 재사용)
+            await DubbingService._update_translation_memory(workspace)
+            
+            # 6. 작업공간 정리 (인프라)
             await DubbingService._cleanup_workspace(workspace)
             
             logger.info("Dubbing finalized successfully")
@@ -584,6 +717,18 @@ class DubbingService:
             logger.error(f"Failed to finalize dubbing: {str(e)}")
             raise Exception(f"더빙 완료 처리 실패: {str(e)}")
 
+    @staticmethod
+    async def _update_translation_memory(workspace: str) -> None:
+        """완료된 작업의 번역 결과를 번역 메모리에 저장 (실패해도 작업은 완료 처리)"""
+        from ai._4_2_translate import save_to_translation_memory
+        from ai.utils.workspace_utils import get_workspace_config_path
+
+        try:
+            stored = await asyncio.to_thread(save_to_translation_memory, workspace, get_workspace_config_path(workspace))
+            logger.info(f"Translation memory updated: {stored} lines")
+        except Exception as e:
+            logger.warning(f"Failed to update translation memory: {str(e)}")
+
     @staticmethod
     async def _upload_result_files(db: AsyncSession, job: Job, workspace: str) -> Dict[str, str]:
         """결과 파일 업로드 (결과물 업로드)"""
@@ -700,7 +845,17 @@ class DubbingService:
 
     @staticmethod
     async def _cleanup_workspace(workspace: str) -> None:
-        """작업공간 정리 (인프라)"""
+        """작업공간 정리 (인프라, 작업공간별로 캐시된 리소스도 해제)"""
+        try:
+            from ai.tts_backend._302_f5tts import release_refer_url
+            from ai.utils.gpt_cache import release_gpt_cache
+            from ai.utils.llm_batch import release_batch_results
+            release_refer_url(workspace)
+            # 워커 스레드가 삭제될 cache.db 파일 핸들을 계속 잡고 있지 않도록 닫음
+            release_gpt_cache(workspace)
+            release_batch_results(workspace)
+        except Exception as e:
+            logger.warning(f"Failed to release workspace resources: {str(e)}")
         try:
             if os.path.exists(workspace):
                 shutil.rmtree(workspace)
@@ -331,9 +331,10 @@ class JobService:
         status: str,
         progress: float = 0.0,
         output_data: Optional[Dict[str, Any]] = None,
-        error_message: Optional[str] = None
+        error_message: Optional[str] = None,
+        extra_metadata: Optional[Dict[str, Any]] = None
     ) -> bool:
-        """작업 단계 상태 업데이트"""
+        """작업 단계 상태 업데이트 (extra_metadata는 기존 값에 병합)"""
         result = await db.execute(
             select(JobStep).where(
                 and_(
@@ -361,6 +362,9 @@ class JobService:
             
         if error_message:
             step.error_message = error_message
+
+        if extra_metadata:
+            step.extra_metadata = {**(step.extra_metadata or {}), **extra_metadata}
             
         step.updated_at = datetime.now(timezone.utc)
         
@@ -5,9 +5,15 @@ from typing import Dict, Any, Optional
 from datetime import datetime
 
 from fastapi import APIRouter, HTTPException, status
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 import psutil
 
+# prometheus_client가 없으면 메트릭 엔드포인트 비활성화
+try:
+    from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
+except ImportError:
+    generate_latest = None
+
 router = APIRouter(prefix="/health", tags=["Health Check"])
 
 
@@ -79,6 +85,19 @@ async def detailed_health_check() -> Dict[str, Any]:
     )
 
 
+@router.get("/metrics", summary="Prometheus 메트릭")
+async def metrics() -> Response:
+    """
+    Prometheus 메트릭 (LLM 호출/토큰/지연시간 등)
+
+    API 프로세스의 메트릭만 포함하므로 로컬 모드에서만 파이프라인 메트릭이 보임.
+    SQS 모드에서는 작업이 worker/runner.py에서 실행되므로 WORKER_METRICS_PORT로 워커를 직접 수집해야 함.
+    """
+    if generate_latest is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="prometheus_client is not installed")
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
 async def _check_database() -> Dict[str, Any]:
     """데이터베이스 연결 상태 확인"""
     try:
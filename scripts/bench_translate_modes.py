@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+번역 모드 벤치마크 스크립트 (two_pass vs single_pass)
+
+사용법:
+    python scripts/bench_translate_modes.py workspaces/<job_id> --chunks 5
+
+작업공간의 split_by_meaning.txt / terminology.json / config.yaml을 사용하여
+각 모드로 같은 청크를 번역하고 청크당 지연 시간과 토큰 사용량을 비교합니다.
+각 모드는 빈 응답 캐시를 가진 임시 작업공간에서 실행됩니다.
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# 프로젝트 루트를 Python path에 추가
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from ai._4_1_summarize import search_things_to_note_in_prompt
+from ai._4_2_translate import split_chunks_by_tokens, get_previous_content, get_after_content
+from ai.translate_lines import translate_lines
+from ai.utils.config_utils import update_key
+from ai.utils.llm_client import get_llm_client
+from ai.utils.path_constants import get_3_2_split_by_meaning, get_4_1_terminology
+from ai.utils.workspace_utils import get_workspace_config_path
+
+
+def prepare_workspace(source_workspace: str, mode: str) -> str:
+    """모드별 임시 작업공간 생성 (응답 캐시 비어있음)"""
+    workspace = tempfile.mkdtemp(prefix=f"bench_{mode}_")
+    os.makedirs(f"{workspace}/output/log", exist_ok=True)
+    shutil.copy2(get_3_2_split_by_meaning(source_workspace), get_3_2_split_by_meaning(workspace))
+    shutil.copy2(get_4_1_terminology(source_workspace), get_4_1_terminology(workspace))
+    config_path = get_workspace_config_path(workspace)
+    shutil.copy2(get_workspace_config_path(source_workspace), config_path)
+    update_key("reflect_translate", True, config_path)
+    update_key("translate_mode", mode, config_path)
+    update_key("gpt_cache.shared", False, config_path)
+    return workspace
+
+
+def run_mode(source_workspace: str, mode: str, num_chunks: int) -> dict:
+    """한 모드로 청크를 순차 번역하고 지연 시간/토큰을 측정"""
+    workspace = prepare_workspace(source_workspace, mode)
+    config_path = get_workspace_config_path(workspace)
+    try:
+        chunks = split_chunks_by_tokens(workspace, config_path)[:num_chunks]
+        with open(get_4_1_terminology(workspace), 'r', encoding='utf-8') as f:
+            theme_prompt = json.load(f).get('theme')
+
+        client = get_llm_client(workspace, config_path)
+        before = dict(client.stats)
+        latencies = []
+        for i, chunk in enumerate(chunks):
+            start = time.perf_counter()
+            translate_lines(
+                chunk,
+                get_previous_content(chunks, i),
+                get_after_content(chunks, i),
+                search_things_to_note_in_prompt(chunk, workspace),
+                theme_prompt,
+                i,
+                workspace,
+                config_path,
+            )
+            latencies.append(time.perf_counter() - start)
+        after = dict(client.stats)
+        return {
+            "mode": mode,
+            "chunks": len(chunks),
+            "requests": after["requests"] - before["requests"],
+            "prompt_tokens": after["prompt_tokens"] - before["prompt_tokens"],
+            "completion_tokens": after["completion_tokens"] - before["completion_tokens"],
+            "cached_tokens": after["cached_tokens"] - before["cached_tokens"],
+            "total_latency": sum(latencies),
+            "mean_latency": sum(latencies) / len(latencies) if latencies else 0.0,
+        }
+    finally:
+        shutil.rmtree(workspace, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark two_pass vs single_pass translation")
+    parser.add_argument("workspace", help="작업공간 경로 (split_by_meaning.txt, terminology.json 필요)")
+    parser.add_argument("--chunks", type=int, default=5, help="벤치마크할 청크 수")
+    args = parser.parse_args()
+
+    results = [run_mode(args.workspace, mode, args.chunks) for mode in ("two_pass", "single_pass")]
+
+    print(f"\n{'mode':<12} {'chunks':>6} {'requests':>8} {'prompt_tok':>10} {'compl_tok':>10} {'cached_tok':>10} {'total_s':>8} {'mean_s':>7}")
+    for r in results:
+        print(f"{r['mode']:<12} {r['chunks']:>6} {r['requests']:>8} {r['prompt_tokens']:>10} "
+              f"{r['completion_tokens']:>10} {r['cached_tokens']:>10} {r['total_latency']:>8.2f} {r['mean_latency']:>7.2f}")
+
+    base, single = results
+    if base["total_latency"] and (base["prompt_tokens"] + base["completion_tokens"]):
+        latency_gain = 1 - single["total_latency"] / base["total_latency"]
+        token_gain = 1 - (single["prompt_tokens"] + single["completion_tokens"]) / (base["prompt_tokens"] + base["completion_tokens"])
+        print(f"\nsingle_pass vs two_pass: latency {latency_gain:+.1%} saved, tokens {token_gain:+.1%} saved")
+
+
+if __name__ == "__main__":
+    main()
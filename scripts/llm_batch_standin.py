@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+LLM 배치 모드 테스트용 로컬 Batch API 대역 서버
+
+사용법:
+    python scripts/llm_batch_standin.py --port 8765 --delay 30
+    # config.yaml: api.base_url: 'http://localhost:8765/v1', llm_batch.poll_interval: 10
+
+OpenAI Batch API의 필요한 부분만 구현합니다:
+    POST /v1/files, GET /v1/files/{id}/content, POST /v1/batches, GET /v1/batches/{id}
+배치는 --delay 초 후 각 요청을 업스트림 chat completions로 순차 전달하여 완료됩니다.
+POST /v1/chat/completions 는 업스트림으로 그대로 전달되므로 동기 호출도 같은 base_url을 사용할 수 있습니다.
+"""
+import argparse
+import email
+import email.policy
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FILES = {}
+BATCHES = {}
+LOCK = threading.Lock()
+
+
+def new_id(prefix: str) -> str:
+    return f"{prefix}_{uuid.uuid4().hex[:24]}"
+
+
+def forward_chat(upstream: str, authorization: str, body: bytes):
+    """업스트림 chat completions 호출, (status, response bytes) 반환"""
+    request = urllib.request.Request(
+        f"{upstream.rstrip('/')}/chat/completions",
+        data=body,
+        headers={"Content-Type": "application/json", "Authorization": authorization},
+        method="POST",
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=900) as response:
+            return response.status, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read()
+
+
+def run_batch(batch_id: str, upstream: str, authorization: str, delay: float) -> None:
+    """지연 후 배치의 각 요청을 처리하고 출력 파일 생성"""
+    time.sleep(delay)
+    with LOCK:
+        batch = BATCHES[batch_id]
+        batch["status"] = "in_progress"
+        batch["in_progress_at"] = int(time.time())
+        lines = FILES[batch["input_file_id"]]["content"].decode("utf-8").splitlines()
+
+    output, completed, failed = [], 0, 0
+    for line in lines:
+        if not line.strip():
+            continue
+        item = json.loads(line)
+        status, body = forward_chat(upstream, authorization, json.dumps(item["body"]).encode("utf-8"))
+        try:
+            body_json = json.loads(body)
+        except ValueError:
+            body_json = {"error": body.decode("utf-8", errors="replace")}
+        completed, failed = (completed + 1, failed) if status == 200 else (completed, failed + 1)
+        output.append(json.dumps({
+            "id": new_id("batch_req"),
+            "custom_id": item["custom_id"],
+            "response": {"status_code": status, "request_id": new_id("req"), "body": body_json},
+            "error": None,
+        }, ensure_ascii=False))
+
+    output_file_id = new_id("file")
+    with LOCK:
+        FILES[output_file_id] = {"content": "\n".join(output).encode("utf-8"), "filename": f"{batch_id}_output.jsonl", "purpose": "batch_output"}
+        batch.update({
+            "status": "completed",
+            "output_file_id": output_file_id,
+            "completed_at": int(time.time()),
+            "request_counts": {"total": completed + failed, "completed": completed, "failed": failed},
+        })
+    print(f"batch {batch_id} completed: {completed} ok, {failed} failed")
+
+
+class Handler(BaseHTTPRequestHandler):
+    upstream = "https://api.openai.com/v1"
+    delay = 30.0
+
+    def send_json(self, status: int, payload: dict) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def do_POST(self):
+        body = self.read_body()
+        if self.path == "/v1/files":
+            # multipart/form-data: file + purpose
+            message = email.message_from_bytes(
+                f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode("utf-8") + body,
+                policy=email.policy.default,
+            )
+            fields = {part.get_param("name", header="content-disposition"): part for part in message.iter_parts()}
+            file_part = fields["file"]
+            file_id = new_id("file")
+            content = file_part.get_payload(decode=True)
+            with LOCK:
+                FILES[file_id] = {"content": content, "filename": file_part.get_filename(), "purpose": fields["purpose"].get_content().strip()}
+            return self.send_json(200, {"id": file_id, "object": "file", "bytes": len(content), "created_at": int(time.time()),
+                                        "filename": file_part.get_filename(), "purpose": FILES[file_id]["purpose"], "status": "processed"})
+
+        if self.path == "/v1/batches":
+            request = json.loads(body)
+            batch_id = new_id("batch")
+            batch = {
+                "id": batch_id, "object": "batch", "endpoint": request["endpoint"], "errors": None,
+                "input_file_id": request["input_file_id"], "completion_window": request["completion_window"],
+                "status": "validating", "output_file_id": None, "error_file_id": None,
+                "created_at": int(time.time()), "request_counts": {"total": 0, "completed": 0, "failed": 0},
+            }
+            with LOCK:
+                BATCHES[batch_id] = batch
+            threading.Thread(target=run_batch, args=(batch_id, self.upstream, self.headers.get("Authorization", ""), self.delay), daemon=True).start()
+            return self.send_json(200, batch)
+
+        if self.path == "/v1/chat/completions":
+            status, response = forward_chat(self.upstream, self.headers.get("Authorization", ""), body)
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(response)))
+            self.end_headers()
+            self.wfile.write(response)
+            return
+
+        self.send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+    def do_GET(self):
+        parts = self.path.strip("/").split("/")
+        with LOCK:
+            if parts[:2] == ["v1", "batches"] and len(parts) == 3 and parts[2] in BATCHES:
+                return self.send_json(200, BATCHES[parts[2]])
+            if parts[:2] == ["v1", "files"] and len(parts) == 4 and parts[3] == "content" and parts[2] in FILES:
+                content = FILES[parts[2]]["content"]
+                self.send_response(200)
+                self.send_header("Content-Type", "application/octet-stream")
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+                return
+        self.send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the OpenAI Batch API")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=30.0, help="배치 처리 시작 전 대기 시간(초)")
+    parser.add_argument("--upstream", default="https://api.openai.com/v1", help="요청을 전달할 chat completions 엔드포인트")
+    args = parser.parse_args()
+
+    Handler.upstream = args.upstream
+    Handler.delay = args.delay
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), Handler)
+    print(f"Batch API stand-in listening on http://127.0.0.1:{args.port}/v1 (upstream {args.upstream}, delay {args.delay}s)")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
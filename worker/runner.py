@@ -1,13 +1,33 @@
 import asyncio
 import logging
 
+from app.config import get_settings
 from app.queue.consumer import QueueConsumer
 
+# prometheus_client가 없으면 워커 메트릭 포트 비활성화
+try:
+    from prometheus_client import start_http_server
+except ImportError:
+    start_http_server = None
+
 
 logger = logging.getLogger(__name__)
 
 
+def _start_metrics_server() -> None:
+    """LLM/TTS 메트릭은 작업을 실행하는 워커 프로세스에 쌓이므로 워커에서 직접 노출"""
+    port = get_settings().WORKER_METRICS_PORT
+    if not port:
+        return
+    if start_http_server is None:
+        logger.warning("WORKER_METRICS_PORT is set but prometheus_client is not installed")
+        return
+    start_http_server(port)
+    logger.info(f"Worker metrics served on port {port}")
+
+
 async def main() -> None:
+    _start_metrics_server()
     consumer = QueueConsumer()
     logger.info("Worker runner started")
     while True: